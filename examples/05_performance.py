@@ -17,8 +17,8 @@ class PerformanceScene(Example):
         width = self.WINDOW_SIZE[0]
         height = self.WINDOW_SIZE[1]
         self.camera = PerspectiveCamera(fov=45, aspect=width / height, near=1.0, far=1000)
-        # It is very important to set auto_update to false for huge performance gain
-        scene = Scene(background_color=color.rgb["white"], ambient_light=(0.2, 0.2, 0.2), auto_update=False)
+        # Auto update only recomputes the world matrices of nodes which were transformed
+        scene = Scene(background_color=color.rgb["white"], ambient_light=(0.2, 0.2, 0.2))
         light = PointLight(color=(0.8, 0.8, 0.8))
         light.world_position = Vector3([GRID_SIZE / 2., GRID_SIZE / 2., GRID_SIZE / 2.])
         scene.add(light)
@@ -29,9 +29,8 @@ class PerformanceScene(Example):
                     cube.local_position = [i, j, k]
                     scene.add(cube)
         self.camera.local_position = Vector3([GRID_SIZE / 2. - 0.5, GRID_SIZE / 2. - 0.5, GRID_SIZE / 2. - 0.5])
-        # Update matrices once because auto update is disabled
-        scene.update_world_matrix()
-        self.renderer = GLRenderer(scene, self.camera)
+        # Draw all cubes with one instanced draw call
+        self.renderer = GLRenderer(scene, self.camera, instanced=True)
 
     def update(self):
         rot = self.wnd.time * 40
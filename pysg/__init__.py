@@ -10,7 +10,9 @@ from .camera import PerspectiveCamera
 from .camera import OrthographicCamera
 
 # Light
+from .light import DirectionalLight
 from .light import PointLight
+from .light import SpotLight
 
 # Node3D
 from .node_3d import Node3D
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+""" Bounding volume hierarchy over the geometry of a scene.
+
+The hierarchy is a binary tree of axis aligned bounding boxes built from the world space bounds of all objects in
+the render list of a scene. It answers spatial queries without testing every object:
+    ::
+
+        bvh = BoundingVolumeHierarchy(scene)
+        near_objects = bvh.query_sphere(Vector3([0, 0, 0]), 2.)
+        objects, distances = bvh.query_ray(Vector3([0, 0, 10]), Vector3([0, 0, -1]))
+
+The hierarchy keeps itself up to date. If objects were transformed, the boxes of the existing tree are refitted.
+If objects were added to or removed from the scene, the tree is rebuilt. Like the renderers, the hierarchy uses
+the world matrices of the last scene update.
+"""
+import numpy as np
+
+from pysg.culling import boxes_in_frustum
+
+
+class BoundingVolumeHierarchy:
+
+    def __init__(self, scene, leaf_size: int = 4):
+        """ Binary tree of bounding boxes over all objects of a scene.
+
+        Args:
+            scene (Scene): Scene whose render list geometry is indexed.
+            leaf_size (int): Maximum number of objects in one leaf node.
+        """
+        self.scene = scene
+        self.leaf_size = max(int(leaf_size), 1)
+        self._objects = []
+        # Object boxes in leaf order and the index of every box in the objects list
+        self._order = np.zeros(0, dtype=np.intp)
+        self._object_mins = np.zeros((0, 3))
+        self._object_maxs = np.zeros((0, 3))
+        # Tree nodes. Leaves have a count greater zero and reference a range of the object boxes.
+        self._mins = np.zeros((0, 3))
+        self._maxs = np.zeros((0, 3))
+        self._left = np.zeros(0, dtype=np.intp)
+        self._right = np.zeros(0, dtype=np.intp)
+        self._starts = np.zeros(0, dtype=np.intp)
+        self._counts = np.zeros(0, dtype=np.intp)
+        # Inner nodes grouped by depth, used to refit the tree bottom up
+        self._inner_levels = []
+        self._topology_version = None
+        self._bounds_version = None
+
+    @property
+    def objects(self) -> list:
+        """ All objects in the hierarchy.
+
+        Returns:
+            list: Objects of the scene render list at the time of the last rebuild.
+        """
+        self.update()
+        return self._objects
+
+    def update(self) -> None:
+        """ Rebuild the hierarchy if the scene graph changed, or refit it if objects were transformed. """
+        store = self.scene.transform_store
+        if self._topology_version != store.topology_version:
+            self.rebuild()
+            return
+        # Recomputes the boxes of all objects whose world matrix changed since the last query
+        self.scene.object_bounds()
+        if self._bounds_version != store.bounds_version:
+            self.refit()
+
+    def _object_bounds(self) -> tuple:
+        """ World space boxes of all objects in leaf order as minimum and maximum corners. """
+        centers, extents = self.scene.object_bounds()
+        return (centers - extents)[self._order], (centers + extents)[self._order]
+
+    def rebuild(self) -> None:
+        """ Build the tree from scratch. Objects are split at the median along the longest axis of their box
+        centers until a node holds no more than leaf_size objects.
+        """
+        store = self.scene.transform_store
+        self._objects = list(self.scene.render_list.geometry)
+        centers, extents = self.scene.object_bounds()
+        order = np.arange(len(self._objects), dtype=np.intp)
+
+        # A binary tree with at most one object per leaf has less than twice as many nodes as objects
+        capacity = max(2 * len(order) - 1, 0)
+        mins, maxs = np.zeros((capacity, 3)), np.zeros((capacity, 3))
+        left, right = np.full(capacity, -1, dtype=np.intp), np.full(capacity, -1, dtype=np.intp)
+        starts, counts, depths = (np.zeros(capacity, dtype=np.intp) for _ in range(3))
+        # Every entry is (node, start, end, depth). Nodes are numbered in creation order, so children always have a
+        # greater index than their parent.
+        stack = [(0, 0, len(order), 0)] if len(order) > 0 else []
+        node_count = len(stack)
+        while stack:
+            node, start, end, depth = stack.pop()
+            node_centers = centers[order[start:end]]
+            node_extents = extents[order[start:end]]
+            mins[node] = (node_centers - node_extents).min(axis=0)
+            maxs[node] = (node_centers + node_extents).max(axis=0)
+            starts[node], depths[node] = start, depth
+            if end - start <= self.leaf_size:
+                counts[node] = end - start
+            else:
+                axis = np.argmax(np.ptp(node_centers, axis=0))
+                middle = (end - start) // 2
+                order[start:end] = order[start:end][np.argpartition(node_centers[:, axis], middle)]
+                left[node], right[node] = node_count, node_count + 1
+                stack.append((node_count, start, start + middle, depth + 1))
+                stack.append((node_count + 1, start + middle, end, depth + 1))
+                node_count += 2
+
+        self._mins, self._maxs = mins[:node_count], maxs[:node_count]
+        self._left, self._right = left[:node_count], right[:node_count]
+        self._starts, self._counts = starts[:node_count], counts[:node_count]
+        depths = depths[:node_count]
+        inner = np.flatnonzero(self._counts == 0)
+        self._inner_levels = [inner[depths[inner] == depth] for depth in range(depths.max(initial=0), -1, -1)]
+
+        self._order = order
+        self._object_mins = (centers - extents)[order]
+        self._object_maxs = (centers + extents)[order]
+        self._topology_version = store.topology_version
+        self._bounds_version = store.bounds_version
+
+    def refit(self) -> None:
+        """ Recompute all boxes of the tree from the current world matrices without changing its structure. """
+        self._object_mins, self._object_maxs = self._object_bounds()
+        leaves = np.flatnonzero(self._counts > 0)
+        if len(leaves) > 0:
+            # Leaves cover consecutive ranges of the object boxes, sorted by their start they split the boxes
+            leaves = leaves[np.argsort(self._starts[leaves])]
+            starts = self._starts[leaves]
+            self._mins[leaves] = np.minimum.reduceat(self._object_mins, starts)
+            self._maxs[leaves] = np.maximum.reduceat(self._object_maxs, starts)
+        for nodes in self._inner_levels:
+            self._mins[nodes] = np.minimum(self._mins[self._left[nodes]], self._mins[self._right[nodes]])
+            self._maxs[nodes] = np.maximum(self._maxs[self._left[nodes]], self._maxs[self._right[nodes]])
+        self._bounds_version = self.scene.transform_store.bounds_version
+
+    def _query(self, test) -> np.ndarray:
+        """ Traverse the tree level by level and test all nodes of one level at once.
+
+        Args:
+            test: Function which gets the minimum and maximum corners of boxes as Nx3 arrays and returns a boolean
+                array which is True for all boxes which need to be visited.
+
+        Returns:
+            np.ndarray: Positions of all object boxes in leaf order which passed the test.
+        """
+        self.update()
+        hits = []
+        nodes = np.zeros(min(len(self._counts), 1), dtype=np.intp)
+        while len(nodes) > 0:
+            nodes = nodes[test(self._mins[nodes], self._maxs[nodes])]
+            is_leaf = self._counts[nodes] > 0
+            leaves = nodes[is_leaf]
+            if len(leaves) > 0:
+                counts = self._counts[leaves]
+                # Positions of all objects of the visited leaves
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                positions = np.repeat(self._starts[leaves], counts) + offsets
+                hits.append(positions[test(self._object_mins[positions], self._object_maxs[positions])])
+            inner = nodes[~is_leaf]
+            nodes = np.concatenate((self._left[inner], self._right[inner]))
+        return np.sort(np.concatenate(hits)) if hits else np.zeros(0, dtype=np.intp)
+
+    def _objects_at(self, positions: np.ndarray) -> list:
+        return [self._objects[i] for i in self._order[positions]]
+
+    def query_box(self, minimum, maximum) -> list:
+        """ All objects whose bounding box intersects an axis aligned box.
+
+        Args:
+            minimum: Minimum corner of the box.
+            maximum: Maximum corner of the box.
+
+        Returns:
+            list: Intersecting objects.
+        """
+        minimum, maximum = np.asarray(minimum, dtype=float), np.asarray(maximum, dtype=float)
+        return self._objects_at(self._query(
+            lambda mins, maxs: np.all(mins <= maximum, axis=1) & np.all(maxs >= minimum, axis=1)))
+
+    def query_sphere(self, center, radius: float) -> list:
+        """ All objects whose bounding box intersects a sphere.
+
+        Args:
+            center: Center of the sphere.
+            radius (float): Radius of the sphere.
+
+        Returns:
+            list: Intersecting objects.
+        """
+        center = np.asarray(center, dtype=float)
+
+        def test(mins, maxs):
+            closest = np.clip(center, mins, maxs)
+            return np.sum((closest - center) ** 2, axis=1) <= radius ** 2
+
+        return self._objects_at(self._query(test))
+
+    def query_frustum(self, planes: np.ndarray) -> list:
+        """ All objects whose bounding box intersects a frustum.
+
+        Args:
+            planes: Frustum planes as returned by :func:`pysg.culling.frustum_planes`.
+
+        Returns:
+            list: Objects inside or partially inside of the frustum.
+        """
+        return self._objects_at(self._query(
+            lambda mins, maxs: boxes_in_frustum(planes, (mins + maxs) / 2., (maxs - mins) / 2.)))
+
+    def query_ray(self, origin, direction, max_distance: float = np.inf) -> tuple:
+        """ All objects whose bounding box is hit by a ray.
+
+        Args:
+            origin: Start point of the ray.
+            direction: Direction of the ray. Distances are measured in multiples of its length.
+            max_distance (float): Boxes which are entered farther away are ignored.
+
+        Returns:
+            tuple: List of hit objects sorted by distance and an array with the distance at which the ray enters the
+            box of each object. The distance is zero if the origin lies inside of a box.
+        """
+        _, positions, distances = self._query_rays(np.reshape(origin, (1, 3)), np.reshape(direction, (1, 3)),
+                                                   max_distance)
+        return self._objects_at(positions), distances
+
+    def query_rays(self, origins: np.ndarray, directions: np.ndarray, max_distance=np.inf) -> tuple:
+        """ Batched version of query_ray. All rays traverse the tree together.
+
+        Args:
+            origins: Start points of the rays as Nx3 array.
+            directions: Directions of the rays as Nx3 array.
+            max_distance: Maximum distance for all rays or array of length N with one distance per ray.
+
+        Returns:
+            tuple: For every hit of a ray and a box, the index of the ray, the hit object, and the distance at which
+            the ray enters the box. Hits are sorted by ray index and distance.
+        """
+        ray_indices, positions, distances = self._query_rays(origins, directions, max_distance)
+        return ray_indices, self._objects_at(positions), distances
+
+    def _query_rays(self, origins: np.ndarray, directions: np.ndarray, max_distance) -> tuple:
+        """ Traverse the tree with pairs of rays and nodes.
+
+        Returns:
+            tuple: Ray indices, positions of the object boxes in leaf order, and entry distances of all hits.
+        """
+        self.update()
+        origins = np.asarray(origins, dtype=float)
+        with np.errstate(divide='ignore'):
+            inverse_directions = 1. / np.asarray(directions, dtype=float)
+        max_distances = np.broadcast_to(np.asarray(max_distance, dtype=float), (len(origins),))
+
+        def test(rays, mins, maxs):
+            entry, exit_ = _ray_box_distances(origins[rays], inverse_directions[rays], mins, maxs)
+            return (entry <= exit_) & (entry <= max_distances[rays]), entry
+
+        hit_rays, hit_positions, hit_distances = [], [], []
+        rays = np.arange(len(origins) if len(self._counts) > 0 else 0)
+        nodes = np.zeros(len(rays), dtype=np.intp)
+        while len(nodes) > 0:
+            hit, _ = test(rays, self._mins[nodes], self._maxs[nodes])
+            rays, nodes = rays[hit], nodes[hit]
+            is_leaf = self._counts[nodes] > 0
+            leaves = nodes[is_leaf]
+            if len(leaves) > 0:
+                counts = self._counts[leaves]
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                positions = np.repeat(self._starts[leaves], counts) + offsets
+                leaf_rays = np.repeat(rays[is_leaf], counts)
+                hit, entry = test(leaf_rays, self._object_mins[positions], self._object_maxs[positions])
+                hit_rays.append(leaf_rays[hit])
+                hit_positions.append(positions[hit])
+                hit_distances.append(entry[hit])
+            inner = nodes[~is_leaf]
+            rays = np.tile(rays[~is_leaf], 2)
+            nodes = np.concatenate((self._left[inner], self._right[inner]))
+        if not hit_rays:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0)
+        rays, positions, distances = (np.concatenate(hits) for hits in (hit_rays, hit_positions, hit_distances))
+        ordering = np.lexsort((positions, distances, rays))
+        return rays[ordering], positions[ordering], distances[ordering]
+
+
+def _ray_box_distances(origins: np.ndarray, inverse_directions: np.ndarray, mins: np.ndarray,
+                       maxs: np.ndarray) -> tuple:
+    """ Slab test of rays against axis aligned boxes.
+
+    Args:
+        origins: Start points of the rays as Nx3 array.
+        inverse_directions: Reciprocal of the ray directions as Nx3 array.
+        mins: Minimum corners of the boxes as Nx3 array.
+        maxs: Maximum corners of the boxes as Nx3 array.
+
+    Returns:
+        tuple: Distances at which every ray enters and leaves its box. The ray misses the box if the entry distance
+        is greater than the exit distance. The entry distance is zero if the origin lies inside of the box.
+    """
+    with np.errstate(invalid='ignore'):
+        t_1 = (mins - origins) * inverse_directions
+        t_2 = (maxs - origins) * inverse_directions
+    # NaN occurs if the origin lies on a slab boundary parallel to the ray and is ignored by fmin and fmax
+    entry = np.fmax.reduce(np.fmin(t_1, t_2), axis=1)
+    exit_ = np.fmin.reduce(np.fmax(t_1, t_2), axis=1)
+    return np.maximum(entry, 0.), exit_
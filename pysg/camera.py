@@ -2,8 +2,9 @@
 itself is of the type Node3D and can be added to the scene graph. """
 import math
 
+import numpy as np
 import pyrr
-from pyrr import Matrix44
+from pyrr import Matrix44, Vector3
 
 from pysg.error import ParameterError
 from pysg.node_3d import Node3D
@@ -35,6 +36,28 @@ class Camera(Node3D):
             self.__projection_matrix = self._compute_projection_matrix()
         return self.__projection_matrix
 
+    def screen_ray(self, x: float, y: float, viewport: tuple) -> tuple:
+        """ Ray from the camera through a point on the screen, for example to find the object under the mouse
+        with :meth:`pysg.scene.Scene.raycast`.
+
+        Args:
+            x (float): Horizontal screen coordinate in pixel, starting at the left.
+            y (float): Vertical screen coordinate in pixel, starting at the top.
+            viewport (tuple): Viewport (x, y, width, height) which the camera renders into.
+
+        Returns:
+            tuple: Origin of the ray on the near plane and normalized direction of the ray as Vector3.
+        """
+        viewport_x, viewport_y, width, height = viewport
+        ndc_x = 2. * (x - viewport_x) / width - 1.
+        ndc_y = 1. - 2. * (y - viewport_y) / height
+        inverse = np.linalg.inv(np.array(self.projection_matrix * self.world_matrix.inverse))
+        # Matrices transform row vectors, points on the near and far plane in clip space
+        near, far = np.array([[ndc_x, ndc_y, -1., 1.], [ndc_x, ndc_y, 1., 1.]]) @ inverse
+        near, far = near[:3] / near[3], far[:3] / far[3]
+        direction = far - near
+        return Vector3(near), Vector3(direction / np.linalg.norm(direction))
+
     def _compute_projection_matrix(self) -> Matrix44:
         """ Projection matrix calculation based on different camera types.
         Must be implemented by child classes.
@@ -45,6 +68,18 @@ class Camera(Node3D):
         """
         raise NotImplementedError()
 
+    def linearize_depth(self, depth: np.ndarray) -> np.ndarray:
+        """ Convert values of the depth buffer to the distance along the viewing direction of the camera.
+        Must be implemented by child classes.
+
+        Args:
+            depth (np.ndarray): Depth buffer values in the range [0, 1].
+
+        Returns:
+            np.ndarray: Distance from the camera plane in world units. Ranges from near to far.
+        """
+        raise NotImplementedError()
+
 
 class PerspectiveCamera(Camera):
 
@@ -79,6 +114,31 @@ class PerspectiveCamera(Camera):
         self.__near = near
         self.__far = far
 
+    @property
+    def near(self) -> float:
+        """ Distance of the near plane of the camera frustum.
+
+        Returns:
+            float: Near plane distance.
+        """
+        return self.__near
+
+    @property
+    def far(self) -> float:
+        """ Distance of the far plane of the camera frustum.
+
+        Returns:
+            float: Far plane distance.
+        """
+        return self.__far
+
+    def linearize_depth(self, depth: np.ndarray) -> np.ndarray:
+        """ Depth linearization for the perspective camera. Inverts the mapping of the projection matrix from
+        the distance to normalized device coordinates.
+        """
+        ndc_depth = 2. * np.asarray(depth) - 1.
+        return (2. * self.__near * self.__far) / (self.__far + self.__near - ndc_depth * (self.__far - self.__near))
+
     def _compute_projection_matrix(self) -> Matrix44:
         """ Projection matrix calculation for the perspective camera.
             Based on: https://glumpy.github.io/modern-gl.html#projection-matrix
@@ -139,6 +199,28 @@ class OrthographicCamera(Camera):
         self.__near = near
         self.__far = far
 
+    @property
+    def near(self) -> float:
+        """ Distance of the near plane of the camera volume.
+
+        Returns:
+            float: Near plane distance.
+        """
+        return self.__near
+
+    @property
+    def far(self) -> float:
+        """ Distance of the far plane of the camera volume.
+
+        Returns:
+            float: Far plane distance.
+        """
+        return self.__far
+
+    def linearize_depth(self, depth: np.ndarray) -> np.ndarray:
+        """ Depth linearization for the orthographic camera. The depth buffer is linear for this projection. """
+        return self.__near + np.asarray(depth) * (self.__far - self.__near)
+
     def _compute_projection_matrix(self) -> Matrix44:
         """ Projection matrix calculation for the orthographic camera.
                 Based on: https://glumpy.github.io/modern-gl.html#projection-matrix
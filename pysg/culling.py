@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+""" View frustum culling of 3D objects.
+
+All objects are tested against the six planes of the camera frustum at once. Objects which are completely outside
+of the frustum do not need to be drawn. The renderers use these functions to skip invisible objects before the draw
+calls are submitted:
+    ::
+
+        planes = frustum_planes(camera.projection_matrix * camera.world_matrix.inverse)
+        centers, extents = scene.object_bounds()
+        visible = boxes_in_frustum(planes, centers, extents)
+
+The scene keeps the boxes of its objects in the transform store and only recomputes the boxes of objects which
+changed. world_bounds computes the boxes of any list of objects from scratch.
+
+Lights are culled per tile of the screen instead. sphere_tile_ranges finds the tiles which a light can reach and
+tile_lists collects the lights of every tile, so the shaders only loop over the lights of the tile of a pixel.
+
+projected_sizes estimates how large objects appear on the screen. The renderers use it to draw small objects with
+less detailed geometry.
+"""
+import numpy as np
+
+
+def frustum_planes(view_projection) -> np.ndarray:
+    """ Extract the six frustum planes from a view projection matrix.
+
+    Args:
+        view_projection: View projection matrix as computed with projection_matrix * view_matrix in pyrr.
+
+    Returns:
+        np.ndarray: Planes as 6x4 array (left, right, bottom, top, near, far). Every plane (a, b, c, d) is normalized
+        and points into the frustum, so a point p is inside of the plane if a*p.x + b*p.y + c*p.z + d >= 0.
+    """
+    # pyrr matrices transform row vectors, the clip coordinates are the columns of the matrix
+    columns = np.asarray(view_projection, dtype=float).T
+    planes = np.array([
+        columns[3] + columns[0],
+        columns[3] - columns[0],
+        columns[3] + columns[1],
+        columns[3] - columns[1],
+        columns[3] + columns[2],
+        columns[3] - columns[2],
+    ])
+    return planes / np.linalg.norm(planes[:, :3], axis=1)[:, np.newaxis]
+
+
+def world_bounds(objects, world_matrices: np.ndarray) -> tuple:
+    """ Axis aligned bounding boxes of objects in world space.
+
+    The local bounds of every object are transformed with its world matrix. The result encloses the transformed
+    box, so it is conservative for rotated objects.
+
+    Args:
+        objects: List of Object3D instances.
+        world_matrices: World matrices of the transform store the objects live in.
+
+    Returns:
+        tuple: Centers and half extents of the boxes as Nx3 arrays.
+    """
+    if len(objects) == 0:
+        return np.zeros((0, 3)), np.zeros((0, 3))
+    bounds = np.array([object_3d.local_bounds for object_3d in objects], dtype=float)
+    local_centers = (bounds[:, 0] + bounds[:, 1]) / 2.
+    local_extents = (bounds[:, 1] - bounds[:, 0]) / 2.
+    matrices = world_matrices[[object_3d.transform_index for object_3d in objects]]
+    centers = np.einsum('ni,nij->nj', local_centers, matrices[:, :3, :3]) + matrices[:, 3, :3]
+    extents = np.einsum('ni,nij->nj', local_extents, np.abs(matrices[:, :3, :3]))
+    return centers, extents
+
+
+def boxes_in_frustum(planes: np.ndarray, centers: np.ndarray, extents: np.ndarray) -> np.ndarray:
+    """ Test axis aligned bounding boxes against frustum planes.
+
+    Args:
+        planes: Frustum planes as returned by frustum_planes.
+        centers: Centers of the boxes as Nx3 array.
+        extents: Half extents of the boxes as Nx3 array.
+
+    Returns:
+        np.ndarray: Boolean array which is False for all boxes which are completely outside of the frustum.
+    """
+    distances = centers @ planes[:, :3].T + planes[:, 3]
+    radii = extents @ np.abs(planes[:, :3]).T
+    return np.all(distances + radii >= 0., axis=1)
+
+
+def spheres_in_frustum(planes: np.ndarray, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+    """ Test bounding spheres against frustum planes.
+
+    Args:
+        planes: Frustum planes as returned by frustum_planes.
+        centers: Centers of the spheres as Nx3 array.
+        radii: Radii of the spheres as array of length N.
+
+    Returns:
+        np.ndarray: Boolean array which is False for all spheres which are completely outside of the frustum.
+    """
+    distances = centers @ planes[:, :3].T + planes[:, 3]
+    return np.all(distances + np.asarray(radii)[:, np.newaxis] >= 0., axis=1)
+
+
+def projected_sizes(view_projection, centers: np.ndarray, radii: np.ndarray, height: int) -> np.ndarray:
+    """ Diameters of bounding spheres on the screen.
+
+    The size is computed from the distance of the sphere to the camera plane. It is exact in the center of a
+    perspective view and slightly too small towards the edges.
+
+    Args:
+        view_projection: View projection matrix as computed with projection_matrix * view_matrix in pyrr.
+        centers: Centers of the spheres as Nx3 array.
+        radii: Radii of the spheres as array of length N.
+        height (int): Height of the screen in pixel.
+
+    Returns:
+        np.ndarray: Diameter of every sphere in pixel. Infinite for spheres whose center lies behind the camera.
+    """
+    view_projection = np.asarray(view_projection, dtype=float)
+    centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+    # Vertical scale of the projection. The rotation of the view matrix does not change the length of the column.
+    scale = np.linalg.norm(view_projection[:3, 1])
+    w = centers @ view_projection[:3, 3] + view_projection[3, 3]
+    sizes = np.full(len(centers), np.inf)
+    in_front = w > 1e-6
+    sizes[in_front] = np.asarray(radii, dtype=float)[in_front] * scale * height / w[in_front]
+    return sizes
+
+
+def sphere_tile_ranges(view_projection, centers: np.ndarray, radii: np.ndarray, width: int, height: int,
+                       tile_size: int) -> np.ndarray:
+    """ Screen tiles which are covered by bounding spheres, for example the spheres of influence of lights.
+
+    The screen is split into square tiles, starting at the bottom left. The axis aligned bounding box of every sphere
+    is projected to the screen. The result is conservative, it can contain tiles which the sphere does not touch.
+
+    Args:
+        view_projection: View projection matrix as computed with projection_matrix * view_matrix in pyrr.
+        centers: Centers of the spheres as Nx3 array.
+        radii: Radii of the spheres as array of length N.
+        width (int): Width of the screen in pixel.
+        height (int): Height of the screen in pixel.
+        tile_size (int): Width and height of a tile in pixel.
+
+    Returns:
+        np.ndarray: Int array of shape (N, 4) with the first column, first row, last column, and last row of the
+        covered tiles. The first column is larger than the last column for spheres outside of the frustum.
+    """
+    centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+    radii = np.asarray(radii, dtype=float)
+    last_tile = np.array([(width - 1) // tile_size, (height - 1) // tile_size])
+    # Empty ranges for spheres outside of the frustum
+    ranges = np.zeros((len(centers), 4), dtype=int)
+    ranges[:, 0] = 1
+    inside = spheres_in_frustum(frustum_planes(view_projection), centers, radii)
+    if not np.any(inside):
+        return ranges
+
+    # The eight corners of the bounding boxes in clip space
+    signs = np.array([[x, y, z] for x in (-1., 1.) for y in (-1., 1.) for z in (-1., 1.)])
+    corners = centers[inside, np.newaxis] + signs * radii[inside, np.newaxis, np.newaxis]
+    clip = np.concatenate((corners, np.ones(corners.shape[:2] + (1,))), axis=2) @ np.asarray(view_projection)
+    # Boxes which reach behind the camera can cover any part of the screen
+    behind = np.any(clip[:, :, 3] <= 1e-6, axis=1)
+    ndc = clip[:, :, :2] / np.where(behind[:, np.newaxis], 1., clip[:, :, 3])[:, :, np.newaxis]
+    pixels_min = (np.min(ndc, axis=1) + 1.) * 0.5 * (width, height)
+    pixels_max = (np.max(ndc, axis=1) + 1.) * 0.5 * (width, height)
+    first = np.clip(np.floor(pixels_min / tile_size), 0, last_tile).astype(int)
+    last = np.clip(np.floor(pixels_max / tile_size), 0, last_tile).astype(int)
+    first[behind] = 0
+    last[behind] = last_tile
+    ranges[inside] = np.concatenate((first, last), axis=1)
+    return ranges
+
+
+def tile_lists(tile_ranges: np.ndarray, columns: int, rows: int) -> tuple:
+    """ Lists with the items which cover every tile, as they are needed for tiled forward rendering.
+
+    Args:
+        tile_ranges (np.ndarray): Tiles covered by every item as returned by sphere_tile_ranges.
+        columns (int): Number of tile columns of the screen.
+        rows (int): Number of tile rows of the screen.
+
+    Returns:
+        tuple: Int32 array of shape (rows, columns, 2) with the offset and the number of items of every tile, and
+        an int32 array with the indices of the items of all tiles. The items of a tile are stored consecutively,
+        starting at its offset.
+    """
+    tile_ranges = np.asarray(tile_ranges).reshape(-1, 4)
+    in_columns = (tile_ranges[:, 0, np.newaxis] <= np.arange(columns)) & \
+                 (np.arange(columns) <= tile_ranges[:, 2, np.newaxis])
+    in_rows = (tile_ranges[:, 1, np.newaxis] <= np.arange(rows)) & (np.arange(rows) <= tile_ranges[:, 3, np.newaxis])
+    covers = in_rows.T[:, np.newaxis, :] & in_columns.T[np.newaxis, :, :]
+    grid = np.empty((rows, columns, 2), dtype=np.int32)
+    grid[:, :, 1] = np.count_nonzero(covers, axis=2)
+    grid[:, :, 0] = np.cumsum(grid[:, :, 1]).reshape(rows, columns) - grid[:, :, 1]
+    return grid, np.nonzero(covers)[2].astype(np.int32)
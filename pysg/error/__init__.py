@@ -20,4 +20,20 @@ class PyrrTypeError(Error):
 
     def __init__(self, expr, msg):
         self.expr = expr
-        self.msg = msg
\ No newline at end of file
+        self.msg = msg
+
+
+class RenderWorkerError(Error):
+    """Exception raised if a worker process failed to render a frame."""
+
+    def __init__(self, expr, msg):
+        self.expr = expr
+        self.msg = msg
+
+
+class FrameTimeoutError(Error):
+    """Exception raised if a frame was not written or consumed in time."""
+
+    def __init__(self, expr, msg):
+        self.expr = expr
+        self.msg = msg
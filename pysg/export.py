@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+""" Write rendered frames to disk in background threads.
+
+An exporter copies the image of a HeadlessGLRenderer into one of a fixed number of pre-allocated frame buffers and
+hands it to a thread pool which writes it to disk. Rendering continues while the frames are encoded and written. Only
+if all frame buffers wait for the disk, the next write blocks until a buffer is free again:
+    ::
+
+        with NpyExporter('frames.npy', frame_count=1000, width=640, height=480) as exporter:
+            for frame in range(1000):
+                update_scene(frame)
+                renderer.render()
+                exporter.write(renderer)
+"""
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pysg.error import ParameterError
+
+
+class FrameExporter:
+
+    def __init__(self, *, width: int, height: int, workers: int = 1, queue_size: int = 4):
+        """ Base class of all exporters. Subclasses implement _write_frame.
+
+        Args:
+            width (int): Width of the frames in pixel.
+            height (int): Height of the frames in pixel.
+            workers (int): Number of threads which write frames. Frames are written in order if there is one thread.
+            queue_size (int): Number of frames which can wait for a worker thread.
+        """
+        if queue_size < 1:
+            raise ParameterError(queue_size, 'Queue size must be at least one!')
+        self.width = width
+        self.height = height
+        self.frame_count = 0
+        self._free_buffers = queue.Queue()
+        for _ in range(queue_size):
+            self._free_buffers.put(np.empty((height, width, 3), dtype=np.uint8))
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._error = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _write_frame(self, index: int, image: np.ndarray) -> None:
+        """ Write one frame. Called in a worker thread.
+
+        Args:
+            index (int): Index of the frame, starting with 0.
+            image (np.ndarray): Image of shape (height, width, 3) starting with the top row.
+        """
+        raise NotImplementedError()
+
+    def _run(self, index: int, buffer: np.ndarray) -> None:
+        try:
+            # Buffers hold the rows in OpenGL order
+            self._write_frame(index, buffer[::-1])
+        except Exception as e:
+            with self._lock:
+                if self._error is None:
+                    self._error = e
+        finally:
+            self._free_buffers.put(buffer)
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _submit(self, buffer: np.ndarray) -> None:
+        self._executor.submit(self._run, self.frame_count, buffer)
+        self.frame_count += 1
+
+    def write(self, renderer) -> None:
+        """ Copy the current image of a renderer and write it in the background.
+
+        Args:
+            renderer (HeadlessGLRenderer): Renderer with the same image size as the exporter.
+        """
+        self._raise_error()
+        buffer = self._free_buffers.get()
+        try:
+            renderer.current_image_into(buffer)
+        except BaseException:
+            self._free_buffers.put(buffer)
+            raise
+        self._submit(buffer)
+
+    def write_array(self, image: np.ndarray) -> None:
+        """ Copy an image which is already in CPU memory and write it in the background.
+
+        Args:
+            image (np.ndarray): Image of shape (height, width, 3) with dtype uint8 starting with the top row.
+        """
+        self._raise_error()
+        if image.shape != (self.height, self.width, 3):
+            raise ParameterError(image.shape, 'Image shape must be (%d, %d, 3)!' % (self.height, self.width))
+        buffer = self._free_buffers.get()
+        buffer[:] = image[::-1]
+        self._submit(buffer)
+
+    def close(self) -> None:
+        """ Wait until all frames are written and release all resources. Raises the first error of a worker thread.
+        """
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._close()
+        self._raise_error()
+
+    def _close(self) -> None:
+        """ Release the resources of a subclass after all frames were written. """
+        pass
+
+
+class RawVideoExporter(FrameExporter):
+
+    def __init__(self, path: str, *, width: int, height: int, queue_size: int = 4):
+        """ Write all frames in order to one file as raw RGB video stream without header. The stream can be encoded
+        later, for example with ffmpeg -f rawvideo -pix_fmt rgb24 -s WIDTHxHEIGHT -i PATH.
+
+        Args:
+            path (str): Path of the video file. Can also be a named pipe which is read by an encoder.
+            width (int): Width of the frames in pixel.
+            height (int): Height of the frames in pixel.
+            queue_size (int): Number of frames which can wait to be written.
+        """
+        super().__init__(width=width, height=height, workers=1, queue_size=queue_size)
+        self._file = open(path, 'wb')
+
+    def _write_frame(self, index: int, image: np.ndarray) -> None:
+        self._file.write(np.ascontiguousarray(image).data)
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class NpyExporter(FrameExporter):
+
+    def __init__(self, path: str, *, frame_count: int, width: int, height: int, workers: int = 2,
+                 queue_size: int = 8):
+        """ Write the frames to a numpy .npy file of shape (frame_count, height, width, 3). The file is memory mapped,
+        so every frame is copied once into the page cache. It can be read with np.load(path, mmap_mode='r').
+
+        Args:
+            path (str): Path of the .npy file.
+            frame_count (int): Number of frames in the file.
+            width (int): Width of the frames in pixel.
+            height (int): Height of the frames in pixel.
+            workers (int): Number of threads which copy frames.
+            queue_size (int): Number of frames which can wait to be written.
+        """
+        super().__init__(width=width, height=height, workers=workers, queue_size=queue_size)
+        self._frames = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8,
+                                                 shape=(frame_count, height, width, 3))
+
+    def _submit(self, buffer: np.ndarray) -> None:
+        if self.frame_count >= len(self._frames):
+            self._free_buffers.put(buffer)
+            raise ParameterError(self.frame_count, 'File is full with %d frames!' % len(self._frames))
+        super()._submit(buffer)
+
+    def _write_frame(self, index: int, image: np.ndarray) -> None:
+        self._frames[index] = image
+
+    def _close(self) -> None:
+        self._frames.flush()
+        del self._frames
+
+
+class ImageSequenceExporter(FrameExporter):
+
+    def __init__(self, path_pattern: str, *, width: int, height: int, workers: int = None, queue_size: int = None,
+                 **save_kwargs):
+        """ Write every frame to a compressed image file with Pillow. Frames are compressed in parallel, since Pillow
+        releases the GIL while encoding.
+
+        Args:
+            path_pattern (str): Path of the images with a format field for the frame index, for example
+                'frames/{:06d}.png'. The file extension selects the image format.
+            width (int): Width of the frames in pixel.
+            height (int): Height of the frames in pixel.
+            workers (int): Number of threads which compress frames. Uses the number of CPU cores if None.
+            queue_size (int): Number of frames which can wait to be written. Twice the number of workers if None.
+            **save_kwargs: Additional keyword arguments for Image.save, for example compress_level=1 for PNG.
+        """
+        # Optional dependency which is only needed for this exporter
+        from PIL import Image
+
+        workers = workers or os.cpu_count()
+        super().__init__(width=width, height=height, workers=workers, queue_size=queue_size or 2 * workers)
+        self._image = Image
+        self._path_pattern = path_pattern
+        self._save_kwargs = save_kwargs
+
+    def _write_frame(self, index: int, image: np.ndarray) -> None:
+        self._image.fromarray(np.ascontiguousarray(image)).save(self._path_pattern.format(index), **self._save_kwargs)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+""" Uncompressed archive of rendered frames for datasets.
+
+The archive is one file with a small header followed by records of fixed size. Every record holds the color image,
+the linear depth if enabled, and the world and projection matrix of the camera. Appending a frame writes one record
+at the end of the file. The records are numpy structured values, so the archive can be memory mapped and any frame
+is read without decoding:
+    ::
+
+        with FrameArchiveWriter('frames.pysg', width=640, height=480, depth=True) as writer:
+            for frame in range(1000):
+                update_scene(frame)
+                renderer.render()
+                writer.append(renderer)
+
+        frames = open_frame_archive('frames.pysg')
+        image, depth = frames['color'][42], frames['depth'][42]
+"""
+import os
+import struct
+
+import numpy as np
+
+from pysg.error import ParameterError
+
+_MAGIC = b'PYSGARC\x00'
+_VERSION = 1
+# Magic, version, width, height and flags, padded to 64 bytes
+_HEADER = struct.Struct('<8sIIII8x32x')
+_FLAG_DEPTH = 1
+
+
+def frame_record_dtype(width: int, height: int, depth: bool = False) -> np.dtype:
+    """ Type of one frame record of an archive.
+
+    Args:
+        width (int): Width of the frames in pixel.
+        height (int): Height of the frames in pixel.
+        depth (bool): If True the record contains the linear depth.
+
+    Returns:
+        np.dtype: Structured type with the fields world_matrix, projection_matrix, depth if enabled, and color.
+        Images start with the top row. The size is padded to a multiple of 8 bytes.
+    """
+    fields = [('world_matrix', '<f4', (4, 4)), ('projection_matrix', '<f4', (4, 4))]
+    if depth:
+        fields.append(('depth', '<f4', (height, width)))
+    fields.append(('color', 'u1', (height, width, 3)))
+    record = np.dtype(fields)
+    return np.dtype({'names': record.names, 'formats': [record.fields[name][0] for name in record.names],
+                     'offsets': [record.fields[name][1] for name in record.names],
+                     'itemsize': (record.itemsize + 7) // 8 * 8})
+
+
+def _read_header(file) -> tuple:
+    data = file.read(_HEADER.size)
+    if len(data) != _HEADER.size:
+        raise ParameterError(file.name, 'File is not a frame archive!')
+    magic, version, width, height, flags = _HEADER.unpack(data)
+    if magic != _MAGIC:
+        raise ParameterError(file.name, 'File is not a frame archive!')
+    if version != _VERSION:
+        raise ParameterError(version, 'Unsupported frame archive version!')
+    return width, height, bool(flags & _FLAG_DEPTH)
+
+
+def open_frame_archive(path: str, mode: str = 'r') -> np.memmap:
+    """ Memory map all frames of an archive.
+
+    Args:
+        path (str): Path of the archive.
+        mode (str): Mode of np.memmap. 'r' for read-only access, 'r+' to modify frames in place.
+
+    Returns:
+        np.memmap: Structured array with one record per frame. See :func:`frame_record_dtype` for the fields.
+    """
+    with open(path, 'rb') as file:
+        dtype = frame_record_dtype(*_read_header(file))
+    # Ignore an incomplete record at the end, e.g. if the writer was killed
+    frame_count = (os.path.getsize(path) - _HEADER.size) // dtype.itemsize
+    if frame_count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, offset=_HEADER.size, shape=(frame_count,))
+
+
+class FrameArchiveWriter:
+
+    def __init__(self, path: str, *, width: int, height: int, depth: bool = False):
+        """ Append frames to an archive. Frames are added to the end of an existing archive with the same format.
+
+        Args:
+            path (str): Path of the archive.
+            width (int): Width of the frames in pixel.
+            height (int): Height of the frames in pixel.
+            depth (bool): If True the linear depth of the frames is stored too.
+        """
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self._record = np.zeros(1, dtype=frame_record_dtype(width, height, depth))
+        self._image = np.empty((height, width, 3), dtype=np.uint8)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as file:
+                if _read_header(file) != (width, height, depth):
+                    raise ParameterError(path, 'Archive has a different frame size or depth setting!')
+            self._file = open(path, 'r+b')
+            # Drop an incomplete record at the end
+            self.frame_count = (os.path.getsize(path) - _HEADER.size) // self._record.itemsize
+            self._file.truncate(_HEADER.size + self.frame_count * self._record.itemsize)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(_HEADER.pack(_MAGIC, _VERSION, width, height, _FLAG_DEPTH if depth else 0))
+            self.frame_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, renderer) -> None:
+        """ Append the last rendered frame of a renderer with the matrices of its camera.
+
+        Args:
+            renderer (HeadlessGLRenderer): Renderer with the same image size as the archive.
+        """
+        renderer.current_image_into(self._image)
+        self._record['color'][0] = self._image[::-1]
+        if self.depth:
+            self._record['depth'][0] = renderer.current_depth(linear=True)
+        self._set_camera(renderer.camera.world_matrix, renderer.camera.projection_matrix)
+        self._write()
+
+    def append_arrays(self, color: np.ndarray, world_matrix, projection_matrix, depth: np.ndarray = None) -> None:
+        """ Append a frame which is already in CPU memory.
+
+        Args:
+            color (np.ndarray): Image of shape (height, width, 3) with dtype uint8 starting with the top row.
+            world_matrix: World matrix of the camera as 4x4 matrix.
+            projection_matrix: Projection matrix of the camera as 4x4 matrix.
+            depth (np.ndarray): Linear depth of shape (height, width). Needed if the archive stores the depth.
+        """
+        if self.depth and depth is None:
+            raise ParameterError(depth, 'Archive stores the depth of every frame!')
+        self._record['color'][0] = color
+        if self.depth:
+            self._record['depth'][0] = depth
+        self._set_camera(world_matrix, projection_matrix)
+        self._write()
+
+    def _set_camera(self, world_matrix, projection_matrix) -> None:
+        self._record['world_matrix'][0] = world_matrix
+        self._record['projection_matrix'][0] = projection_matrix
+
+    def _write(self) -> None:
+        self._file.write(self._record.data)
+        self.frame_count += 1
+
+    def flush(self) -> None:
+        """ Write all appended frames to the file, so that they can be opened by other processes. """
+        self._file.flush()
+
+    def close(self) -> None:
+        """ Flush and close the archive file. """
+        self._file.close()
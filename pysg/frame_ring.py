@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+""" Ring buffer of rendered frames in shared memory.
+
+The renderer writes an image directly into a slot of the ring buffer and consumer processes read it without copying
+or pickling. Frames are keyed by their frame index, which selects the slot. A producer waits if the slot of a new frame
+still holds a frame which was not consumed yet, so a slow consumer slows down rendering instead of filling the memory.
+
+The ring buffer is passed to the consumer processes as argument when they are started:
+    ::
+
+        def consume(ring, frame_count):
+            for frame in range(frame_count):
+                with ring.read(frame) as image:
+                    encoder.encode(image)
+            ring.close()
+
+        if __name__ == "__main__":
+            with FrameRingBuffer(width=640, height=480, capacity=8) as ring:
+                consumer = multiprocessing.Process(target=consume, args=(ring, 1000))
+                consumer.start()
+                for frame in range(1000):
+                    update_scene(frame)
+                    renderer.render()
+                    ring.write_image(renderer, frame)
+                consumer.join()
+"""
+import multiprocessing
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pysg.error import ParameterError, FrameTimeoutError
+
+_FREE = 0
+_WRITING = 1
+_READY = 2
+_READING = 3
+
+
+class FrameRingBuffer:
+
+    def __init__(self, *, width: int, height: int, capacity: int = 8, components: int = 3, dtype=np.uint8):
+        """ Ring buffer with a fixed number of image slots in shared memory.
+
+        Args:
+            width (int): Width of the images in pixel.
+            height (int): Height of the images in pixel.
+            capacity (int): Number of slots. Limits how many frames the producer can render ahead of the consumers.
+            components (int): Number of color components, 3 for RGB or 4 for RGBA.
+            dtype: Type of the color components, uint8 or float32.
+        """
+        if capacity < 1:
+            raise ParameterError(capacity, 'Capacity must be at least one!')
+        if components not in (3, 4):
+            raise ParameterError(components, 'Components must be 3 or 4!')
+        if np.dtype(dtype) not in (np.uint8, np.float32):
+            raise ParameterError(dtype, 'Dtype must be uint8 or float32!')
+        self.width = width
+        self.height = height
+        self.capacity = capacity
+        self.components = components
+        self.dtype = np.dtype(dtype)
+        self._condition = multiprocessing.get_context('spawn').Condition()
+        image_size = height * width * components * self.dtype.itemsize
+        self._memory = shared_memory.SharedMemory(create=True, size=2 * capacity * 8 + capacity * image_size)
+        self._owner = True
+        self._attach()
+        self._frames[:] = -1
+        self._states[:] = _FREE
+
+    def _attach(self) -> None:
+        """ Create the numpy views of the header and the image slots in shared memory. """
+        header = np.ndarray((2, self.capacity), dtype=np.int64, buffer=self._memory.buf)
+        self._frames = header[0]
+        self._states = header[1]
+        self._images = np.ndarray((self.capacity, self.height, self.width, self.components), dtype=self.dtype,
+                                  buffer=self._memory.buf, offset=header.nbytes)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_memory'] = self._memory.name
+        state['_owner'] = False
+        for view in ('_frames', '_states', '_images'):
+            del state[view]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._memory = shared_memory.SharedMemory(name=state['_memory'])
+        self._attach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _wait(self, predicate, timeout, frame: int) -> None:
+        """ Wait with the acquired condition until the predicate is true. """
+        if not self._condition.wait_for(predicate, timeout):
+            raise FrameTimeoutError(frame, 'Timeout while waiting for the slot of frame %d!' % frame)
+
+    def _set_state(self, slot: int, state: int) -> None:
+        with self._condition:
+            self._states[slot] = state
+            self._condition.notify_all()
+
+    @contextmanager
+    def write(self, frame: int, timeout: float = None):
+        """ Reserve the slot of a frame for writing. Waits until the frame which used the slot before was consumed.
+        The frame can be read as soon as the with block is left without exception.
+
+        Args:
+            frame (int): Index of the frame.
+            timeout (float): Maximum time in seconds to wait for the slot. Waits forever if None.
+
+        Yields:
+            np.ndarray: Slot with shape (height, width, components) in OpenGL order, starting with the bottom row.
+        """
+        slot = frame % self.capacity
+        with self._condition:
+            self._wait(lambda: self._states[slot] == _FREE, timeout, frame)
+            self._frames[slot] = frame
+            self._states[slot] = _WRITING
+        try:
+            yield self._images[slot]
+        except BaseException:
+            self._set_state(slot, _FREE)
+            raise
+        self._set_state(slot, _READY)
+
+    def write_image(self, renderer, frame: int, timeout: float = None) -> None:
+        """ Copy the current image of a renderer directly from vRAM into the slot of a frame.
+
+        Args:
+            renderer (HeadlessGLRenderer): Renderer with the same image size as the ring buffer.
+            frame (int): Index of the frame.
+            timeout (float): Maximum time in seconds to wait for the slot. Waits forever if None.
+        """
+        with self.write(frame, timeout) as image:
+            renderer.current_image_into(image)
+
+    @contextmanager
+    def read(self, frame: int, timeout: float = None):
+        """ Wait until a frame was written and read it without copying. The slot is released for the next frame
+        when the with block is left.
+
+        Args:
+            frame (int): Index of the frame.
+            timeout (float): Maximum time in seconds to wait for the frame. Waits forever if None.
+
+        Yields:
+            np.ndarray: Read-only view of the image with shape (height, width, components) starting with the top row.
+            The view is only valid inside of the with block.
+        """
+        slot = frame % self.capacity
+        with self._condition:
+            self._wait(lambda: self._states[slot] == _READY and self._frames[slot] == frame, timeout, frame)
+            self._states[slot] = _READING
+        image = self._images[slot][::-1]
+        image.flags.writeable = False
+        try:
+            yield image
+        finally:
+            self._set_state(slot, _FREE)
+
+    def close(self) -> None:
+        """ Detach from the shared memory. The process which created the ring buffer also releases it. """
+        if self._memory is None:
+            return
+        del self._frames, self._states, self._images
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+        self._memory = None
@@ -133,12 +133,14 @@ def create_cube(dtype='float32') -> Tuple[np.array, np.array, np.array]:
     return vertices, indices, normals
 
 
-def create_icosahedron(dtype='float32') -> Tuple[np.array, np.array, np.array]:
-    """ Create icosahedron geometry with radius one.
+def create_icosahedron(dtype='float32', subdivisions=0) -> Tuple[np.array, np.array, np.array]:
+    """ Create icosahedron geometry with radius one. Subdivided icosahedrons approximate a sphere.
     seealso:: http://www.songho.ca/opengl/gl_sphere.html
 
     Args:
         dtype: Data type of output numpy array.
+        subdivisions: Number of times every triangle is split into four triangles whose corners lie on the sphere.
+            Subdivided icosahedrons have smooth normals.
 
     Returns:
         Tuple[np.array,np.array,np.array]: Tuple of size 3. First is np array for vertices, second for indices,
@@ -218,9 +220,28 @@ def create_icosahedron(dtype='float32') -> Tuple[np.array, np.array, np.array]:
 
     indices = np.arange(0, 60, dtype='int')
 
+    if subdivisions > 0:
+        triangles = vertices.reshape(-1, 3, 3).astype(float)
+        for _ in range(subdivisions):
+            corner_1, corner_2, corner_3 = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+            middle_1, middle_2, middle_3 = (_on_sphere(corner_1 + corner_2), _on_sphere(corner_2 + corner_3),
+                                            _on_sphere(corner_3 + corner_1))
+            triangles = np.stack([corner_1, middle_1, middle_3, middle_1, corner_2, middle_2,
+                                  middle_3, middle_2, corner_3, middle_1, middle_2, middle_3], axis=1).reshape(-1, 3, 3)
+        # Neighbouring triangles share their corners
+        points, indices = np.unique(np.round(triangles.reshape(-1, 3), 6), axis=0, return_inverse=True)
+        normals = _on_sphere(points).astype(dtype)
+        vertices = (normals * RADIUS).astype(dtype)
+        indices = indices.reshape(-1).astype('int')
+
     return vertices, indices, normals
 
 
+def _on_sphere(points: np.ndarray) -> np.ndarray:
+    """ Move points along their direction onto the sphere with radius one. """
+    return points / np.linalg.norm(points, axis=-1, keepdims=True)
+
+
 def create_plane(dtype='float32') -> Tuple[np.array, np.array, np.array]:
     """ Create standard plane of size one.
 
@@ -321,11 +342,12 @@ def create_triangle(dtype='float32') -> Tuple[np.array, np.array, np.array]:
     return vertices, indices, normals
 
 
-def create_cylinder(dtype='float32') -> Tuple[np.array, np.array, np.array]:
+def create_cylinder(dtype='float32', sides=6) -> Tuple[np.array, np.array, np.array]:
     """ Create standard cylinder with height two and radius one.
 
     Args:
         dtype: Data type of output numpy array.
+        sides: Number of flat sides around the cylinder.
 
     Returns:
         Tuple[np.array,np.array,np.array]: Tuple of size 3. First is np array for vertices, second for indices,
@@ -335,7 +357,6 @@ def create_cylinder(dtype='float32') -> Tuple[np.array, np.array, np.array]:
 
     height = 2.
     radius = 1.
-    sides = 6
 
     # Top and bottom share one center vertices and the triangles form a fan.
     # Each sides needs two unique triangle to render correct normals
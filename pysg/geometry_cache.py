@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+""" Process wide cache of the geometry of all Object3D types.
+
+The geometry functions in :mod:`pysg.geometry` build their arrays in Python loops. The renderers and the ray casts
+get the vertices, indices, and normals of a geometry from this cache, so every geometry is created only once per
+process, no matter how many renderers are started. The arrays are read-only.
+
+Geometries of functions from a module, including functools.partial objects with their tessellation parameters, have a
+name like ``pysg.geometry.create_cylinder(sides=16)``. These geometries can be saved to a .npz file and loaded in
+other processes, for example in the workers of a render pool:
+    ::
+
+        if os.path.exists('geometry.npz'):
+            load_geometry_cache('geometry.npz')
+        renderer = HeadlessGLRenderer(scene, camera, width=640, height=480)
+        save_geometry_cache('geometry.npz')
+"""
+import functools
+
+import numpy as np
+
+from pysg.version import __version__
+
+# Vertices, indices, and normals of every geometry, by name or by function if the function has no name
+_geometries = dict()
+_ARRAY_NAMES = ('vertices', 'indices', 'normals')
+
+
+def geometry_name(create_geometry):
+    """ Name of a geometry function with its arguments, which identifies the geometry in cache files.
+
+    Args:
+        create_geometry: Function without arguments which returns the vertices, indices, and normals of a geometry,
+            or a functools.partial object of such a function.
+
+    Returns:
+        str: Module, name, and arguments of the function. None for lambdas and local functions.
+    """
+    args, keywords = (), dict()
+    if isinstance(create_geometry, functools.partial):
+        create_geometry, args, keywords = create_geometry.func, create_geometry.args, create_geometry.keywords
+    module = getattr(create_geometry, '__module__', None)
+    qualname = getattr(create_geometry, '__qualname__', None)
+    if module is None or qualname is None or '<' in qualname:
+        return None
+    arguments = [repr(arg) for arg in args] + ['{}={!r}'.format(key, keywords[key]) for key in sorted(keywords)]
+    return '{}.{}({})'.format(module, qualname, ', '.join(arguments))
+
+
+def cached_geometry(create_geometry) -> tuple:
+    """ Vertices, indices, and normals of a geometry. The geometry is created on first use.
+
+    Args:
+        create_geometry: Function without arguments which returns the vertices, indices, and normals of a geometry.
+
+    Returns:
+        tuple: Read-only arrays with the vertices, indices, and normals.
+    """
+    key = geometry_name(create_geometry) or create_geometry
+    geometry = _geometries.get(key)
+    if geometry is None:
+        geometry = tuple(np.array(array) for array in create_geometry())
+        for array in geometry:
+            array.setflags(write=False)
+        _geometries[key] = geometry
+    return geometry
+
+
+def clear_geometry_cache() -> None:
+    """ Remove all geometries from the cache, e.g. after a geometry function was changed. """
+    _geometries.clear()
+
+
+def save_geometry_cache(path: str) -> None:
+    """ Save all named geometries of the cache to a .npz file.
+
+    Args:
+        path (str): Path of the file.
+    """
+    arrays = {'version': np.array(__version__)}
+    for key, geometry in _geometries.items():
+        if isinstance(key, str):
+            arrays.update(('{}:{}'.format(key, name), array) for name, array in zip(_ARRAY_NAMES, geometry))
+    np.savez(path, **arrays)
+
+
+def load_geometry_cache(path: str) -> int:
+    """ Add the geometries of a .npz file written by :func:`save_geometry_cache` to the cache. Files of other pysg
+    versions are ignored, as the geometry functions may have changed.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        int: Number of geometries which were loaded.
+    """
+    with np.load(path) as data:
+        if 'version' not in data.files or str(data['version']) != __version__:
+            return 0
+        keys = {name.rsplit(':', 1)[0] for name in data.files if name != 'version'}
+        for key in keys:
+            geometry = tuple(data['{}:{}'.format(key, name)] for name in _ARRAY_NAMES)
+            for array in geometry:
+                array.setflags(write=False)
+            _geometries[key] = geometry
+    return len(keys)
@@ -1,9 +1,26 @@
 # -*- coding: utf-8 -*-
 """ Lights can be added to the scene to illuminate the objects.
+
+A scene can hold any number of lights. Lights with a radius only illuminate objects within this distance. The
+renderers sort these lights into tiles of the screen every frame, so every pixel is only shaded with the lights which
+reach it. Use a radius for scenes with many lights.
+
+Directional and spot lights shine along the negative z axis of their node, like the cameras look along it.
+
+Directional and point lights can cast shadows. The renderers draw the depth of the scene as seen from the light into a
+shadow map. A shadow map is only drawn again if an object within the view volume of the light changed, so static
+lights and objects cost nothing after the first frame.
 """
+import numpy as np
+from pyrr import matrix44
 
+from pysg.error import ParameterError
 from pysg.node_3d import Node3D
 
+# Look direction and up vector of the six shadow maps of a point light: +x, -x, +y, -y, +z, -z
+_CUBE_FACES = (((1., 0., 0.), (0., -1., 0.)), ((-1., 0., 0.), (0., -1., 0.)), ((0., 1., 0.), (0., 0., 1.)),
+               ((0., -1., 0.), (0., 0., -1.)), ((0., 0., 1.), (0., -1., 0.)), ((0., 0., -1.), (0., -1., 0.)))
+
 
 class Light(Node3D):
 
@@ -12,14 +29,89 @@ class Light(Node3D):
         """
         super().__init__(name)
         self.color = color
+        self.shadows = False
+
+    def _shadow_view_projections(self, world_matrix: np.ndarray) -> np.ndarray:
+        """ View projection matrices of the shadow maps of the light.
+
+        Args:
+            world_matrix (np.ndarray): World matrix of the light.
+
+        Returns:
+            np.ndarray: Array of shape (N, 4, 4) with one matrix for each of the N shadow maps of the light.
+        """
+        return np.zeros((0, 4, 4))
 
 
 class PointLight(Light):
 
-    def __init__(self, color: tuple, name: str = "PointLight") -> 'PointLight':
+    def __init__(self, color: tuple, name: str = "PointLight", *, radius: float = None, shadows: bool = False) \
+            -> 'PointLight':
         """ Point light emits light in all directions from a single point.
 
         Args:
             color: The light intensity of light source.
+            radius (float): Distance at which the light fades out completely. If None the light illuminates all
+                objects with full intensity.
+            shadows (bool): If True objects within the radius cast shadows. Needs a radius.
+        """
+        super().__init__(color, name)
+        if shadows and radius is None:
+            raise ParameterError(radius, 'Point lights need a radius to cast shadows!')
+        self.radius = radius
+        self.shadows = shadows
+
+    def _shadow_view_projections(self, world_matrix: np.ndarray) -> np.ndarray:
+        """ Six perspective views from the position of the light, one for each side of a cube. """
+        near, far = self.radius * 0.01, self.radius
+        projection = matrix44.create_perspective_projection(90., 1., near, far)
+        position = np.asarray(world_matrix)[3, :3]
+        return np.array([matrix44.create_look_at(position, position + np.array(direction), np.array(up))
+                         @ projection for direction, up in _CUBE_FACES])
+
+
+class DirectionalLight(Light):
+
+    def __init__(self, color: tuple, name: str = "DirectionalLight", *, shadows: bool = False,
+                 shadow_extent: float = 10.) -> 'DirectionalLight':
+        """ Directional light illuminates all objects from the same direction, like the sun. Only the rotation of
+        the light is used for the illumination.
+
+        Args:
+            color: The light intensity of light source.
+            shadows (bool): If True objects within a cube around the position of the light cast shadows.
+            shadow_extent (float): Half of the edge length of the cube in which objects cast shadows. Larger cubes
+                make the shadows less sharp.
+        """
+        super().__init__(color, name)
+        if shadow_extent <= 0:
+            raise ParameterError(shadow_extent, 'Shadow extent must be greater zero!')
+        self.shadows = shadows
+        self.shadow_extent = shadow_extent
+
+    def _shadow_view_projections(self, world_matrix: np.ndarray) -> np.ndarray:
+        """ One orthographic view of the cube around the position of the light. """
+        world_matrix = np.asarray(world_matrix)
+        position = world_matrix[3, :3]
+        # Lights shine along the negative z axis of their node
+        direction, up = -world_matrix[2, :3], world_matrix[1, :3]
+        extent = self.shadow_extent
+        projection = matrix44.create_orthogonal_projection(-extent, extent, -extent, extent, -extent, extent)
+        return matrix44.create_look_at(position, position + direction, up)[np.newaxis] @ projection
+
+
+class SpotLight(Light):
+
+    def __init__(self, color: tuple, name: str = "SpotLight", *, angle: float = 30., radius: float = None) \
+            -> 'SpotLight':
+        """ Spot light emits light from a single point within a cone.
+
+        Args:
+            color: The light intensity of light source.
+            angle (float): Angle between the axis and the edge of the cone in degree.
+            radius (float): Distance at which the light fades out completely. If None the light illuminates all
+                objects within the cone with full intensity.
         """
         super().__init__(color, name)
+        self.angle = angle
+        self.radius = radius
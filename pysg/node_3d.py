@@ -46,37 +46,118 @@ towards the local x-axis away from the root node. This means that these nodes ar
 world coordinates [3,1,1].
 
 """
-from copy import copy
-
-from pyrr import Matrix44, Vector3, Quaternion
+import numpy as np
+from pyrr import Matrix33, Matrix44, Vector3, Quaternion
 
 from pysg.pyrr_extensions import compose_matrix, quaternion_to_euler_angles, euler_angles_to_quaternion
+from pysg.transform_store import TransformStore
 from pysg.util import pyrr_type_checker, parameters_as_angles_deg_to_rad
 
+_IDENTITY = np.identity(4)
+
 
 class Node3D:
 
-    def __init__(self, name: str = "New Node"):
+    def __init__(self, name: str = "New Node", store: TransformStore = None):
         """  Node element of scene graph (tree structure).
 
         Args:
             name: Name for string representation.
+            store: Store which holds the transforms of the node. Uses the default store if None.
         """
         self.children = list()
         self._parent = None
         self.name = name
 
-        self._local_position = Vector3()
-        self._world_position = Vector3()
+        self._store = store if store is not None else TransformStore.default()
+        self._index = self._store.allocate()
 
-        self._scale = Vector3([1., 1., 1.])
+    def __del__(self):
+        try:
+            self._store.release(self._index)
+        except AttributeError:
+            # Node was never fully initialized
+            pass
+
+    @property
+    def transform_store(self) -> TransformStore:
+        """ The store which holds the transforms of this node.
+
+        Returns:
+            TransformStore: Store of the node.
+        """
+        return self._store
+
+    @property
+    def transform_index(self) -> int:
+        """ Index of the node in its transform store.
+
+        Returns:
+            int: Slot index of the node in :attr:`transform_store`.
+        """
+        return self._index
+
+    def _move_to_store(self, store: TransformStore) -> None:
+        """ Move the transforms of this node and all its descendants to another store. """
+        if store is self._store:
+            return
+        nodes = [self]
+        while nodes:
+            node = nodes.pop()
+            index = store.allocate()
+            node._store.copy_slot(node._index, store, index)
+            node._store.release(node._index)
+            node._store = store
+            node._index = index
+            nodes.extend(node.children)
+
+    def _mark_dirty(self) -> None:
+        """ Mark the local transform of this node as changed. The world matrices of the node and all its descendants
+        are outdated afterwards, but only the node itself is touched.
+        """
+        self._store.mark_changed(self._index)
 
-        self._local_quaternion = Quaternion()
-        self._world_quaternion = Quaternion()
-        self._world_matrix = Matrix44.identity()
-        self._local_matrix = Matrix44.identity()
+    def _ancestors(self) -> list:
+        """ All nodes from the root of the scene graph down to this node.
 
-        self.__matrix_needs_update = True
+        Returns:
+            list: Ancestors of the node ordered from top to bottom, the node itself is the last element.
+        """
+        chain = []
+        node = self
+        while node is not None:
+            chain.append(node)
+            node = node._parent
+        chain.reverse()
+        return chain
+
+    def _refresh_world_matrix(self) -> None:
+        """ Make sure the cached world matrix of this node is up to date.
+
+        The ancestors are visited once from the root downwards. Starting from the first node whose world matrix is
+        outdated, the world matrices of the remaining nodes of the chain are recomputed and written back to the store.
+        """
+        store = self._store
+        chain = self._ancestors()
+        parent_stamp = 0
+        for start, node in enumerate(chain):
+            world_stamp = store.world_stamps[node._index]
+            if world_stamp < store.changed_stamps[node._index] or world_stamp < parent_stamp:
+                break
+            parent_stamp = world_stamp
+        else:
+            return
+        indices = np.array([node._index for node in chain[start:]], dtype=np.intp)
+        store.update_local_matrices(indices)
+        if start == 0:
+            store.world_matrices[indices[0]] = store.local_matrices[indices[0]]
+        else:
+            parent_index = chain[start - 1]._index
+            store.world_matrices[indices[0]] = store.local_matrices[indices[0]] @ store.world_matrices[parent_index]
+        for parent_index, index in zip(indices[:-1], indices[1:]):
+            # Same as parent.world_matrix * local_matrix with pyrr matrices
+            store.world_matrices[index] = store.local_matrices[index] @ store.world_matrices[parent_index]
+        store.world_stamps[indices] = store.clock
 
     @property
     def parent(self):
@@ -90,15 +171,28 @@ class Node3D:
 
     @parent.setter
     def parent(self, parent: 'Node3D') -> None:
-        self._parent = parent
         if parent is None:
             # If parent is set to None local and world transform are the same
-            self._world_position = self._local_position
-            self._world_quaternion = self._local_quaternion
+            self._parent = None
+            self._mark_dirty()
         else:
             # If new root node is added the local transform will be set relative to new root node
-            self._local_quaternion = self._local_quaternion * parent.world_quaternion.inverse
-            self._local_position = self._local_quaternion * (self.world_position - parent.world_position)
+            if self._parent is None:
+                # Without a parent the world transform equals the local transform
+                world_position, world_quaternion = self.local_position, self.local_quaternion
+            else:
+                world_position, world_quaternion = self.world_position, self.world_quaternion
+            self._parent = parent
+            parent._refresh_world_matrix()
+            if np.array_equal(parent._store.world_matrices[parent._index], _IDENTITY):
+                # Below a parent without transform, like the root of a scene, the local transform is the world
+                # transform
+                self._store.local_positions[self._index] = world_position
+                self._store.local_quaternions[self._index] = world_quaternion
+                self._mark_dirty()
+            else:
+                self.world_quaternion = world_quaternion
+                self.world_position = world_position
 
     @property
     def local_position(self):
@@ -111,22 +205,17 @@ class Node3D:
             Vector3: Position of node relative to parent node.
 
         """
-        return copy(self._local_position)
+        return Vector3(self._store.local_positions[self._index])
 
     @local_position.setter
     def local_position(self, local_position: Vector3) -> None:
-        local_position = pyrr_type_checker(local_position, Vector3)
-        self.__matrix_needs_update = True
-        self._local_position = local_position
-        world_position_from_rotation = self._world_quaternion * self._local_position
-        if self._parent is None:
-            self.world_position = world_position_from_rotation
-        else:
-            self.world_position = self._parent.world_position + world_position_from_rotation
+        self._store.local_positions[self._index] = pyrr_type_checker(local_position, Vector3)
+        self._mark_dirty()
 
     @property
     def world_position(self):
-        """ The world position of a node.
+        """ The world position of a node. It is derived from the world matrix, which is only recomputed if the node
+        or one of its ancestors was transformed.
 
         .. note:: The return value is a copy of the original vector and can not be edited directly.
                  This means that code like node.world_position.x += 2 will not work as you might expect it to!
@@ -135,17 +224,25 @@ class Node3D:
             Vector3: Position of node in world space.
 
         """
-        return copy(self._world_position)
+        self._refresh_world_matrix()
+        return Vector3(self._store.world_matrices[self._index, 3, :3])
 
     @world_position.setter
     def world_position(self, world_position: Vector3) -> None:
-        world_position = pyrr_type_checker(world_position, Vector3)
-        self.__matrix_needs_update = True
-        self._world_position = world_position
+        world_position = np.asarray(pyrr_type_checker(world_position, Vector3), dtype=float)
         if self._parent is None:
-            self._local_position = world_position
-        for child in self.children:
-            child.world_position = child.local_position + self._world_position
+            local_position = world_position
+        else:
+            # The world position is the translation row of local_matrix @ parent_world_matrix
+            parent_world_matrix = np.array(self._parent.world_matrix)
+            try:
+                inverse = np.linalg.inv(parent_world_matrix)
+            except np.linalg.LinAlgError:
+                # A parent with zero scale collapses its subtree. Use the closest position which is reachable.
+                inverse = np.linalg.pinv(parent_world_matrix)
+            local_position = (np.append(world_position, 1.) @ inverse)[:3]
+        self._store.local_positions[self._index] = local_position
+        self._mark_dirty()
 
     @property
     def local_quaternion(self):
@@ -158,21 +255,18 @@ class Node3D:
             Quaternion: Quaternion rotation relative to parent node.
 
         """
-        return copy(self._local_quaternion)
+        return Quaternion(self._store.local_quaternions[self._index])
 
     @local_quaternion.setter
     def local_quaternion(self, local_quaternion: Quaternion) -> None:
-        local_quaternion = pyrr_type_checker(local_quaternion, Quaternion)
-        self.__matrix_needs_update = True
-        self._local_quaternion = local_quaternion
-        if self._parent is None:
-            self.world_quaternion = local_quaternion
-        else:
-            self.world_quaternion = local_quaternion * self._parent.world_quaternion
+        self._store.local_quaternions[self._index] = pyrr_type_checker(local_quaternion, Quaternion)
+        self._mark_dirty()
 
     @property
     def world_quaternion(self):
-        """ The world rotation as quaternion.
+        """ The world rotation as quaternion. It is derived from the world matrix if the matrix contains a pure
+        rotation. Otherwise, for example below a parent with non uniform scale, the local rotations of all ancestors
+        are combined.
 
         .. note:: The return value is a copy of the original quaternion and can not be edited directly.
                 Use the quaternion setter instead.
@@ -181,17 +275,27 @@ class Node3D:
             Quaternion: Rotation in world space as quaternion.
 
         """
-        return copy(self._world_quaternion)
+        self._refresh_world_matrix()
+        rotation = self._store.world_matrices[self._index, :3, :3]
+        lengths = np.linalg.norm(rotation, axis=1)
+        if lengths.all():
+            rotation = rotation / lengths[:, np.newaxis]
+            if np.allclose(rotation @ rotation.T, np.identity(3)) and np.linalg.det(rotation) > 0.:
+                return Quaternion.from_matrix(Matrix33(rotation))
+        world_quaternion = Quaternion()
+        for node in self._ancestors():
+            world_quaternion = node.local_quaternion * world_quaternion
+        return world_quaternion
 
     @world_quaternion.setter
     def world_quaternion(self, world_quaternion: Quaternion) -> None:
-        world_quaternion = pyrr_type_checker(world_quaternion, Quaternion)
-        self.__matrix_needs_update = True
-        self._world_quaternion = world_quaternion
+        world_quaternion = Quaternion(np.asarray(pyrr_type_checker(world_quaternion, Quaternion), dtype=float))
         if self._parent is None:
-            self._local_quaternion = world_quaternion
-        for child in self.children:
-            child.world_quaternion = child.world_quaternion * self.world_quaternion
+            local_quaternion = world_quaternion
+        else:
+            local_quaternion = world_quaternion * self._parent.world_quaternion.inverse
+        self._store.local_quaternions[self._index] = local_quaternion
+        self._mark_dirty()
 
     @property
     def local_euler_angles(self):
@@ -271,10 +375,11 @@ class Node3D:
             Matrix44: 4x4 local translation matrix of the current node.
 
         """
-        if self.__matrix_needs_update:
-            self.__matrix_needs_update = False
-            self._local_matrix = compose_matrix(self.local_position, self.local_quaternion, self.scale)
-        return self._local_matrix
+        store, i = self._store, self._index
+        if store.local_matrix_dirty[i]:
+            store.local_matrix_dirty[i] = False
+            store.local_matrices[i] = compose_matrix(self.local_position, self.local_quaternion, self.scale)
+        return Matrix44(store.local_matrices[i])
 
     @property
     def world_matrix(self) -> Matrix44:
@@ -284,7 +389,8 @@ class Node3D:
             Matrix44: 4x4 translation matrix of the current node in world space.
 
         """
-        return self._world_matrix
+        self._refresh_world_matrix()
+        return Matrix44(self._store.world_matrices[self._index])
 
     @property
     def scale(self) -> Vector3:
@@ -294,12 +400,12 @@ class Node3D:
             Vector3: X, Y and Z scale as Vector3.
 
         """
-        return copy(self._scale)
+        return Vector3(self._store.scales[self._index])
 
     @scale.setter
     def scale(self, scale: Vector3) -> None:
-        self.__matrix_needs_update = True
-        self._scale = scale
+        self._store.scales[self._index] = scale
+        self._mark_dirty()
 
     def __repr__(self):
         return "Node(%s)" % self.name
@@ -313,6 +419,9 @@ class Node3D:
             node_3d (Node3D): The child node which shall be added to the scene graph.
         """
         self.children.append(node_3d)
+        # The whole scene graph lives in the transform store of its root
+        node_3d._move_to_store(self._store)
+        self._store.topology_version += 1
         # Local transforms will be updated when setting the parent property
         node_3d.parent = self
 
@@ -324,30 +433,35 @@ class Node3D:
         """
         node_3d.parent = None
         self.children.remove(node_3d)
+        self._store.topology_version += 1
 
     def update_world_matrix(self) -> None:
         """ Updates the world matrix for a given node in the render scene graph."""
+        store = self._store
         if self._parent is None:
-            self._world_matrix = self.local_matrix
+            store.world_matrices[self._index] = self.local_matrix
         else:
-            self._world_matrix = self.parent.world_matrix * self.local_matrix
+            store.world_matrices[self._index] = self.parent.world_matrix * self.local_matrix
+        store.world_stamps[self._index] = store.clock
 
-        for child in self.children:
-            child.update_world_matrix()
+        nodes = list(self.children)
+        while nodes:
+            node = nodes.pop()
+            # Same as parent.world_matrix * local_matrix with pyrr matrices, the parent was updated before
+            store.world_matrices[node._index] = np.array(node.local_matrix) @ store.world_matrices[node._parent._index]
+            store.world_stamps[node._index] = store.clock
+            nodes.extend(node.children)
 
     def get_leaf_nodes(self) -> list:
-        """ Recursively iterate over all children and return list with all leaf Node3Ds (no more children).
+        """ Iterate over all children and return list with all leaf Node3Ds (no more children).
 
         Returns:
             list: List of all children with no more child nodes. Type of list elements is Node3D.
         """
         leafs = []
-
-        def _get_leaf_nodes(node):
-            if node is not None:
-                leafs.append(node)
-                for n in node.children:
-                    _get_leaf_nodes(n)
-
-        _get_leaf_nodes(self)
+        nodes = [self]
+        while nodes:
+            node = nodes.pop()
+            leafs.append(node)
+            nodes.extend(reversed(node.children))
         return leafs
@@ -2,11 +2,29 @@
 """ This module contains all geometric 3D objects which can be added to a scene. All 3D objects inherit from
 the Object3D base class. 3D objects are defined via a color, the object size, and a name."""
 
+from functools import partial
+
+import numpy as np
+from pyrr import Vector3
+
 import pysg.constants.color
+from pysg.geometry import create_cube, create_plane, create_icosahedron, create_circle, create_triangle, \
+    create_cylinder, create_tetrahedral, create_pyramid
+from pysg.geometry_cache import cached_geometry
 from pysg.node_3d import Node3D
 
+# Geometry type of every Object3D type which was looked up before, see geometry_type
+_geometry_types = dict()
+
 
 class Object3D(Node3D):
+    # Axis aligned bounding box (min, max) of the geometry of size one. Objects of unknown type use a large box.
+    _unit_bounds = ((-1., -1., -1.), (1., 1., 1.))
+    # Function which creates the geometry of size one and whether its indices describe a triangle fan
+    _geometry = None
+    _triangle_fan = False
+    # Functions which create the geometry with increasing detail. Used by renderers with level of detail.
+    _lod_geometry = None
 
     def __init__(self, name: str = "Object3D", color=pysg.constants.color.rgb['white']):
         """ A Object3D instances can be added to a scene and rendered.
@@ -19,8 +37,55 @@ class Object3D(Node3D):
         self.size = (1, 1, 1)
         self.color = color
 
+    @property
+    def local_bounds(self) -> tuple:
+        """ Axis aligned bounding box of the object geometry in local space. The geometry is scaled with the
+        object size.
+
+        Returns:
+            tuple: Minimum and maximum corner of the bounding box as Vector3.
+        """
+        corner_1 = np.multiply(self._unit_bounds[0], self.size)
+        corner_2 = np.multiply(self._unit_bounds[1], self.size)
+        return Vector3(np.minimum(corner_1, corner_2)), Vector3(np.maximum(corner_1, corner_2))
+
+    @property
+    def color(self) -> tuple:
+        """ Color of the object as RGB tuple with values from 0 to 1.
+
+        .. note:: Assign a new color instead of modifying the old one in place. Otherwise renderers do not notice
+                the change.
+
+        Returns:
+            tuple: Color of the object.
+        """
+        return self._color
+
+    @color.setter
+    def color(self, color: tuple):
+        self._color = color
+        self._store.mark_object_changed(self._index)
+
+    @property
+    def size(self) -> tuple:
+        """ Size of the object geometry along the local x, y, and z axes. Unlike the scale, the size is not inherited
+        by child nodes.
+
+        Returns:
+            tuple: Size of the object.
+        """
+        return self._size
+
+    @size.setter
+    def size(self, size: tuple):
+        self._size = size
+        self._store.local_bounds[self._index] = self.local_bounds
+        self._store.mark_object_changed(self._index)
+
 
 class CubeObject3D(Object3D):
+    _unit_bounds = ((-0.5, -0.5, -0.5), (0.5, 0.5, 0.5))
+    _geometry = staticmethod(create_cube)
 
     def __init__(self, width: float, height: float, depth: float, color=pysg.constants.color.rgb['white'],
                  name: str = "CubeObject"):
@@ -38,6 +103,8 @@ class CubeObject3D(Object3D):
 
 
 class PlaneObject3D(Object3D):
+    _unit_bounds = ((-0.5, 0., -0.5), (0.5, 0., 0.5))
+    _geometry = staticmethod(create_plane)
 
     def __init__(self, width: float, height: float, color=pysg.constants.color.rgb['white'],
                  name: str = "PlaneObject"):
@@ -58,6 +125,10 @@ class PlaneObject3D(Object3D):
 
 
 class CircleObject3D(Object3D):
+    _unit_bounds = ((-1., 0., -1.), (1., 0., 1.))
+    _geometry = staticmethod(create_circle)
+    _triangle_fan = True
+    _lod_geometry = tuple(partial(create_circle, fan_vertices=vertices) for vertices in (8, 16, 32, 64))
 
     def __init__(self, radius: float, color=pysg.constants.color.rgb['white'],
                  name: str = "CircleObject"):
@@ -77,6 +148,10 @@ class CircleObject3D(Object3D):
 
 
 class IcosahedronObject3D(Object3D):
+    # The subdivided levels of detail reach the sphere with radius one
+    _unit_bounds = ((-1., -1., -1.), (1., 1., 1.))
+    _geometry = staticmethod(create_icosahedron)
+    _lod_geometry = tuple(partial(create_icosahedron, subdivisions=subdivisions) for subdivisions in range(5))
 
     def __init__(self, radius: float, color=pysg.constants.color.rgb['white'],
                  name: str = "IcosahedronObject"):
@@ -92,6 +167,8 @@ class IcosahedronObject3D(Object3D):
 
 
 class TriangleObject3D(Object3D):
+    _unit_bounds = ((-0.5, 0., -0.2887), (0.5, 0., 0.5774))
+    _geometry = staticmethod(create_triangle)
 
     def __init__(self, width: float, height: float, color=pysg.constants.color.rgb['white'],
                  name: str = "TriangleObject"):
@@ -108,6 +185,10 @@ class TriangleObject3D(Object3D):
 
 
 class CylinderObject3D(Object3D):
+    # The levels of detail with more sides reach the circle with radius one
+    _unit_bounds = ((-1., -1., -1.), (1., 1., 1.))
+    _geometry = staticmethod(create_cylinder)
+    _lod_geometry = tuple(partial(create_cylinder, sides=sides) for sides in (8, 16, 32, 64))
 
     def __init__(self, height: float, radius: float, color=pysg.constants.color.rgb['white'],
                  name: str = "CylinderObject"):
@@ -124,6 +205,8 @@ class CylinderObject3D(Object3D):
 
 
 class TetrahedralObject3D(Object3D):
+    _unit_bounds = ((-0.5, -0.5, -0.5), (0.5, 0.5, 0.5))
+    _geometry = staticmethod(create_tetrahedral)
 
     def __init__(self, radius: float, color=pysg.constants.color.rgb['white'],
                  name: str = "BoxObject"):
@@ -139,6 +222,8 @@ class TetrahedralObject3D(Object3D):
 
 
 class PyramidObject3D(Object3D):
+    _unit_bounds = ((-0.5, -0.3334, -0.5), (0.5, 0.6667, 0.5))
+    _geometry = staticmethod(create_pyramid)
 
     def __init__(self, base_size: float, height: float, color=pysg.constants.color.rgb['white'],
                  name: str = "PyramidObject"):
@@ -152,3 +237,63 @@ class PyramidObject3D(Object3D):
         """
         super().__init__(color=color, name=name)
         self.size = (base_size, height, base_size)
+
+
+def register_geometry(object_3d_type: type, create_geometry, *, triangle_fan: bool = False, levels=None) -> None:
+    """ Register the geometry of a custom Object3D subclass, so that renderers can draw it and rays can hit it.
+    Subclasses of the registered type share its geometry unless they register their own. Register the geometry
+    before the first object of the type is created.
+        ::
+
+            def create_quad():
+                vertices = np.array([[-0.5, -0.5, 0.], [0.5, -0.5, 0.], [0.5, 0.5, 0.], [-0.5, 0.5, 0.]])
+                indices = np.array([0, 1, 2, 0, 2, 3])
+                normals = np.array([[0., 0., 1.]] * 4)
+                return vertices, indices, normals
+
+            class QuadObject3D(Object3D):
+                pass
+
+            register_geometry(QuadObject3D, create_quad)
+
+    Args:
+        object_3d_type (type): Subclass of Object3D.
+        create_geometry: Function without arguments which returns the vertices, indices, and normals of the geometry
+            of size one like the functions in :mod:`pysg.geometry`.
+        triangle_fan (bool): If True the indices describe a triangle fan instead of separate triangles.
+        levels: Functions like create_geometry which create the geometry with increasing detail. Renderers with
+            level of detail draw objects with the level which fits their size on the screen. If None the geometry
+            has a single level.
+    """
+    levels = tuple(levels) if levels else None
+    vertices = np.concatenate([np.asarray(cached_geometry(create)[0], dtype=float)
+                               for create in (create_geometry,) + (levels or ())])
+    object_3d_type._geometry = staticmethod(create_geometry)
+    object_3d_type._triangle_fan = triangle_fan
+    object_3d_type._lod_geometry = levels
+    object_3d_type._unit_bounds = (tuple(vertices.min(axis=0)), tuple(vertices.max(axis=0)))
+    # Subclasses which used the geometry of a base class so far may use the new one
+    _geometry_types.clear()
+
+
+def geometry_type(object_3d_type: type):
+    """ The class which defines the geometry of an Object3D type. All types with the same geometry type share one
+    geometry.
+
+    Args:
+        object_3d_type (type): Subclass of Object3D.
+
+    Returns:
+        type: The type itself or the closest base class with a geometry. None if no geometry was registered.
+    """
+    if object_3d_type in _geometry_types:
+        return _geometry_types[object_3d_type]
+    primitive_type = None
+    for base in object_3d_type.__mro__:
+        if base.__dict__.get('_geometry') is not None:
+            primitive_type = base
+            break
+        if base is Object3D:
+            break
+    _geometry_types[object_3d_type] = primitive_type
+    return primitive_type
@@ -51,6 +51,39 @@ def compose_matrix(position: Vector3, quaternion: Quaternion, scale: Vector3) ->
     return translation_matrix * rotation_matrix * scale_matrix
 
 
+def compose_matrices(positions: np.ndarray, quaternions: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """ Vectorized version of compose_matrix which reconstructs many 4x4 matrices at once.
+
+    Args:
+        positions: Positions as Nx3 array.
+        quaternions: Rotations as Nx4 array of quaternions (x, y, z, w).
+        scales: Scales as Nx3 array.
+
+    Returns:
+        np.ndarray: Nx4x4 array of matrices in the same layout as compose_matrix returns them.
+    """
+    qx, qy, qz, qw = quaternions[:, 0], quaternions[:, 1], quaternions[:, 2], quaternions[:, 3]
+    sqx, sqy, sqz, sqw = qx * qx, qy * qy, qz * qz, qw * qw
+    invs = 1. / (sqx + sqy + sqz + sqw)
+
+    matrices = np.zeros((len(positions), 4, 4))
+    # Same rotation matrix as pyrr creates from a quaternion
+    matrices[:, 0, 0] = (sqx - sqy - sqz + sqw) * invs
+    matrices[:, 1, 1] = (-sqx + sqy - sqz + sqw) * invs
+    matrices[:, 2, 2] = (-sqx - sqy + sqz + sqw) * invs
+    matrices[:, 1, 0] = 2. * (qx * qy + qz * qw) * invs
+    matrices[:, 0, 1] = 2. * (qx * qy - qz * qw) * invs
+    matrices[:, 2, 0] = 2. * (qx * qz - qy * qw) * invs
+    matrices[:, 0, 2] = 2. * (qx * qz + qy * qw) * invs
+    matrices[:, 2, 1] = 2. * (qy * qz + qx * qw) * invs
+    matrices[:, 1, 2] = 2. * (qy * qz - qx * qw) * invs
+    # Scale rows and add translation
+    matrices[:, :3, :3] *= scales[:, :, np.newaxis]
+    matrices[:, 3, :3] = positions
+    matrices[:, 3, 3] = 1.
+    return matrices
+
+
 def quaternion_are_equal(q1: Quaternion, q2: Quaternion, epsilon: float = 1e-12) -> bool:
     """ Check whether two quaternions represent the same rotation.
 
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+""" Ray casting against the exact triangles of the 3D objects in a scene.
+
+The bounding volume hierarchy of the scene finds all objects whose bounding box is hit by a ray. Only the triangles
+of these objects are tested. The triangles are the same which are used for rendering, scaled by the object size and
+transformed by the world matrix. No OpenGL context is needed:
+    ::
+
+        origin, direction = camera.screen_ray(mouse_x, mouse_y, renderer.viewport)
+        hit = scene.raycast(origin, direction)
+        if hit is not None:
+            print(hit.object_3d, hit.distance, hit.point)
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from pysg.geometry_cache import cached_geometry
+
+RaycastHit = namedtuple('RaycastHit', ['object_3d', 'distance', 'point'])
+RaycastHit.__doc__ = """ Closest intersection of a ray with the triangles of an object.
+
+Attributes:
+    object_3d (Object3D): The object which was hit.
+    distance (float): Distance from the ray origin to the hit point.
+    point (Vector3): Hit point in world space.
+"""
+
+_unit_triangles = dict()
+
+
+def unit_triangles(object_3d_type: type) -> np.ndarray:
+    """ Triangles of the geometry of size one of an Object3D type. Results are cached per type.
+
+    Args:
+        object_3d_type (type): Subclass of Object3D.
+
+    Returns:
+        np.ndarray: Triangle corners as Tx3x3 array. Empty if the type has no geometry.
+    """
+    triangles = _unit_triangles.get(object_3d_type)
+    if triangles is None:
+        if object_3d_type._geometry is None:
+            triangles = np.zeros((0, 3, 3))
+        else:
+            vertices, indices, _ = cached_geometry(object_3d_type._geometry)
+            if object_3d_type._triangle_fan:
+                # The first index is shared by all triangles of a fan
+                indices = np.column_stack((np.repeat(indices[0], len(indices) - 2), indices[1:-1], indices[2:]))
+            triangles = vertices.astype(float)[np.reshape(indices, (-1, 3))]
+        _unit_triangles[object_3d_type] = triangles
+    return triangles
+
+
+def ray_triangle_distances(origins: np.ndarray, directions: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """ Intersect rays with triangles using the Möller–Trumbore algorithm. Both sides of a triangle are hit.
+
+    Args:
+        origins: Start points of the rays as Nx3 array.
+        directions: Directions of the rays as Nx3 array.
+        triangles: Triangles for every ray as NxTx3x3 array.
+
+    Returns:
+        np.ndarray: NxT array with the distance to every triangle in multiples of the ray direction. Infinity if a
+        triangle is missed.
+    """
+    directions = directions[:, np.newaxis, :]
+    edges_1 = triangles[:, :, 1] - triangles[:, :, 0]
+    edges_2 = triangles[:, :, 2] - triangles[:, :, 0]
+    p = np.cross(directions, edges_2)
+    determinants = np.sum(edges_1 * p, axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse_determinants = 1. / determinants
+        t = origins[:, np.newaxis, :] - triangles[:, :, 0]
+        u = np.sum(t * p, axis=2) * inverse_determinants
+        q = np.cross(t, edges_1)
+        v = np.sum(directions * q, axis=2) * inverse_determinants
+        distances = np.sum(edges_2 * q, axis=2) * inverse_determinants
+        hit = (np.abs(determinants) > 1e-12) & (u >= 0.) & (v >= 0.) & (u + v <= 1.) & (distances >= 0.)
+    return np.where(hit, distances, np.inf)
+
+
+def raycast(bvh, origins: np.ndarray, directions: np.ndarray, max_distance=np.inf) -> tuple:
+    """ Closest hit of many rays with the objects of a bounding volume hierarchy.
+
+    Args:
+        bvh (BoundingVolumeHierarchy): Hierarchy of the objects which can be hit.
+        origins: Start points of the rays as Nx3 array.
+        directions: Directions of the rays as Nx3 array. They do not need to be normalized.
+        max_distance: Maximum distance for all rays or array of length N with one distance per ray.
+
+    Returns:
+        tuple: List with the hit object or None for every ray, and an array with the distance to the hit in world
+        units, which is infinity for rays which hit nothing.
+    """
+    origins = np.asarray(origins, dtype=float).reshape(-1, 3)
+    directions = np.asarray(directions, dtype=float).reshape(-1, 3)
+    directions = directions / np.linalg.norm(directions, axis=1)[:, np.newaxis]
+    ray_indices, objects, _ = bvh.query_rays(origins, directions, max_distance)
+
+    distances = np.full(len(origins), np.inf)
+    hit_objects = [None] * len(origins)
+    if not objects:
+        return hit_objects, distances
+
+    # Narrow phase for all candidates of the same type at once, since they share the same triangles
+    candidates = dict()
+    for candidate, object_3d in enumerate(objects):
+        candidates.setdefault(type(object_3d), []).append(candidate)
+    candidate_distances = np.full(len(objects), np.inf)
+    world_matrices = bvh.scene.transform_store.world_matrices
+    for object_3d_type, indices in candidates.items():
+        triangles = unit_triangles(object_3d_type)
+        if len(triangles) == 0:
+            continue
+        sizes = np.array([objects[i].size for i in indices], dtype=float)
+        matrices = world_matrices[[objects[i].transform_index for i in indices]]
+        # Same transformation as in the vertex shader: scale by the object size, then apply the world matrix
+        world_triangles = np.einsum('ntcj,nji->ntci', triangles[np.newaxis] * sizes[:, np.newaxis, np.newaxis],
+                                    matrices[:, :3, :3]) + matrices[:, np.newaxis, np.newaxis, 3, :3]
+        rays = ray_indices[indices]
+        candidate_distances[indices] = ray_triangle_distances(origins[rays], directions[rays], world_triangles).min(1)
+
+    candidate_distances[candidate_distances > np.broadcast_to(max_distance, len(origins))[ray_indices]] = np.inf
+    np.minimum.at(distances, ray_indices, candidate_distances)
+    for candidate in np.flatnonzero(np.isfinite(candidate_distances)):
+        ray = ray_indices[candidate]
+        if candidate_distances[candidate] == distances[ray] and hit_objects[ray] is None:
+            hit_objects[ray] = objects[candidate]
+    return hit_objects, distances
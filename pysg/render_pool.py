@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+""" Render frames in parallel with several worker processes.
+
+Every worker process builds the scene once and renders with its own HeadlessGLRenderer and standalone OpenGL
+context. The main process only sends small frame descriptions to the workers. The rendered images are written into
+shared memory and never pickled.
+
+The setup and update functions are sent to the worker processes. They must be defined at module level:
+    ::
+
+        def setup():
+            scene = Scene()
+            scene.add(CubeObject3D(1, 1, 1))
+            camera = PerspectiveCamera(fov=45, aspect=1, near=0.1, far=100)
+            return scene, camera
+
+        def update(scene, camera, frame):
+            camera.local_position = Vector3([0, 0, 5 + frame])
+
+        if __name__ == "__main__":
+            with RenderPool(setup, update, width=640, height=480) as pool:
+                images = pool.render(range(1000))
+"""
+import multiprocessing
+import queue
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pysg.error import RenderWorkerError
+
+
+def _worker(setup, update, width: int, height: int, renderer_kwargs: dict, memory_name: str, slot_count: int,
+            tasks, results) -> None:
+    """ Main loop of a worker process. Renders frames until it receives None. """
+    # Import here, the main process does not need an OpenGL context
+    from pysg.renderer import HeadlessGLRenderer
+
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        slots = np.ndarray((slot_count, height, width, 3), dtype=np.uint8, buffer=memory.buf)
+        scene, camera = setup()
+        renderer = HeadlessGLRenderer(scene, camera, width=width, height=height, **renderer_kwargs)
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            index, frame, slot = task
+            try:
+                if update is not None:
+                    update(scene, camera, frame)
+                renderer.render()
+                renderer.current_image_into(slots[slot])
+                results.put((index, slot, None))
+            except Exception:
+                results.put((index, slot, traceback.format_exc()))
+        del slots
+    finally:
+        memory.close()
+
+
+class RenderPool:
+
+    def __init__(self, setup, update=None, *, width: int, height: int, processes: int = None,
+                 slots_per_process: int = 2, **renderer_kwargs):
+        """ Pool of worker processes which render frames of the same scene.
+
+        Args:
+            setup: Function without arguments which returns a tuple (scene, camera). It is called once in every
+                worker process.
+            update: Function with the arguments (scene, camera, frame) which is called in a worker process before
+                a frame is rendered. It applies the changes of one frame, for example transform deltas or a camera
+                pose. Not needed if all frames are the same.
+            width (int): Width of the images in pixel.
+            height (int): Height of the images in pixel.
+            processes (int): Number of worker processes. Uses the number of CPU cores if None.
+            slots_per_process (int): Number of images per worker process in shared memory. Workers wait if all
+                slots hold images which were not consumed yet.
+            **renderer_kwargs: Additional keyword arguments for the HeadlessGLRenderer of every worker.
+        """
+        # Forked processes would inherit the OpenGL state of the main process
+        context = multiprocessing.get_context('spawn')
+        self.width = width
+        self.height = height
+        self.processes = processes or multiprocessing.cpu_count()
+        slot_count = self.processes * slots_per_process
+        self._memory = shared_memory.SharedMemory(create=True, size=slot_count * height * width * 3)
+        self._slots = np.ndarray((slot_count, height, width, 3), dtype=np.uint8, buffer=self._memory.buf)
+        self._free_slots = list(range(slot_count))
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._workers = [context.Process(target=_worker, daemon=True,
+                                         args=(setup, update, width, height, renderer_kwargs, self._memory.name,
+                                               slot_count, self._tasks, self._results))
+                         for _ in range(self.processes)]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _result(self) -> tuple:
+        """ Wait for the next rendered frame.
+
+        Returns:
+            tuple: Index of the frame, used slot, and the traceback of the worker if rendering failed.
+        """
+        while True:
+            try:
+                return self._results.get(timeout=0.1)
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in self._workers):
+                    raise RenderWorkerError(self._workers, 'A worker process terminated unexpectedly!')
+
+    def imap(self, frames):
+        """ Render frames and yield the images as soon as they are ready. Frames are distributed to all workers,
+        so the images can arrive in a different order.
+
+        Args:
+            frames: Iterable of picklable frame descriptions which are passed to the update function.
+
+        Yields:
+            tuple: Index of the frame and the image as array of shape (height, width, 3) starting with the top row.
+            The image is a view into shared memory and only valid until the next image is requested.
+        """
+        frames = enumerate(frames)
+        pending = 0
+        slot = None
+        try:
+            while True:
+                # Hand out all free slots, so the workers are busy while the images are consumed
+                while self._free_slots:
+                    frame = next(frames, None)
+                    if frame is None:
+                        break
+                    self._tasks.put(frame + (self._free_slots.pop(),))
+                    pending += 1
+                if pending == 0:
+                    return
+                index, slot, error = self._result()
+                pending -= 1
+                if error is not None:
+                    raise RenderWorkerError(index, error)
+                # Workers write the rows in OpenGL order
+                yield index, self._slots[slot][::-1]
+                self._free_slots.append(slot)
+                slot = None
+        finally:
+            # Collect the frames which are still rendered if the consumer stopped early
+            if slot is not None:
+                self._free_slots.append(slot)
+            while pending > 0:
+                self._free_slots.append(self._result()[1])
+                pending -= 1
+
+    def render(self, frames) -> np.ndarray:
+        """ Render frames and return all images.
+
+        Args:
+            frames: Sequence of picklable frame descriptions which are passed to the update function.
+
+        Returns:
+            np.ndarray: Images as array of shape (len(frames), height, width, 3) in the order of the frames.
+        """
+        frames = list(frames)
+        images = np.empty((len(frames), self.height, self.width, 3), dtype=np.uint8)
+        for index, image in self.imap(frames):
+            images[index] = image
+        return images
+
+    def close(self) -> None:
+        """ Stop all worker processes and release the shared memory. """
+        if self._memory is None:
+            return
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        del self._slots
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
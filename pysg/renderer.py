@@ -1,26 +1,564 @@
 # -*- coding: utf-8 -*-
 """ All rendering related functions and classes. The ModernGL python library is used for all rendering functions
 in *pysg*."""
+import collections
 import os
+import weakref
 
 import moderngl as mgl
+import numpy as np
 
 from pysg.camera import Camera
-from pysg.geometry import create_cube, create_plane, create_icosahedron, create_circle, create_triangle, \
-    create_cylinder, create_tetrahedral, create_pyramid
+from pysg.culling import frustum_planes, boxes_in_frustum, sphere_tile_ranges, tile_lists, projected_sizes
+from pysg.error import ParameterError
+from pysg.geometry_cache import cached_geometry
+from pysg.light import DirectionalLight, SpotLight
 from pysg.object_3d import PlaneObject3D, IcosahedronObject3D, CubeObject3D, CircleObject3D, TriangleObject3D, \
-    CylinderObject3D, TetrahedralObject3D, PyramidObject3D
+    CylinderObject3D, TetrahedralObject3D, PyramidObject3D, geometry_type
 from pysg.scene import Scene
 
 
+# Built-in Object3D types whose vertex arrays are created with the renderer. Vertex arrays of registered custom types
+# are created on first use.
+_BUILT_IN_TYPES = (PlaneObject3D, IcosahedronObject3D, CubeObject3D, CircleObject3D, TriangleObject3D,
+                   CylinderObject3D, TetrahedralObject3D, PyramidObject3D)
+
+# Shader programs and primitives of every context by the id of the context, kept while a renderer uses the context
+_context_resources = weakref.WeakValueDictionary()
+
+# The instance buffers hold the slot of every instance in the object data texture as int32.
+_INSTANCE_BYTES = 4
+
+# std140 layout of the FrameData uniform block which is shared by all shaders.
+_FRAME_DATA = np.dtype([
+    ('view_projection_matrix', 'f4', (4, 4)),
+    ('ambient_light', 'f4', 4),
+    # Number of lights shaded for every pixel, number of lights sorted into tiles, light tile size, and number of lights
+    # with shadows
+    ('light_info', 'i4', 4),
+    ('viewport', 'i4', 4),
+])
+# Number of object slots uploaded to the ObjectIndices uniform block at once. Must match OBJECT_BATCH_SIZE in the
+# simple shader. The size of the block stays within the 16 KB which every OpenGL implementation supports.
+_OBJECT_BATCH_SIZE = 4096
+_FRAME_DATA_BINDING = 0
+_OBJECT_INDICES_BINDING = 1
+
+# Layout of the object data texture. Every row holds the data of 128 slots with 8 RGBA texels each: the four columns
+# of the model matrix, the color, the size, and two unused texels. Must match the shaders.
+_OBJECTS_PER_ROW = 128
+_OBJECT_TEXELS = 8
+_OBJECT_DATA_TEXTURE_UNIT = 0
+
+# Layout of the light data texture. Every row holds 64 lights with 4 RGBA texels each: the position and the type, the
+# direction and the cosine of the cone angle, the color and the radius, and the first shadow map and the number of
+# shadow maps. Must match simple.frag.
+_LIGHTS_PER_ROW = 64
+_LIGHT_TEXELS = 4
+_POINT_LIGHT = 0
+_DIRECTIONAL_LIGHT = 1
+_SPOT_LIGHT = 2
+# Lights with a radius are sorted into square tiles of the screen with this size in pixel
+_LIGHT_TILE_SIZE = 32
+# Width of the texture with the light indices of all tiles
+_LIGHT_INDICES_PER_ROW = 1024
+_LIGHT_DATA_TEXTURE_UNIT = 1
+_LIGHT_GRID_TEXTURE_UNIT = 2
+_LIGHT_INDICES_TEXTURE_UNIT = 3
+
+# Shadow maps are square tiles of one depth texture with 4 tiles per row. Their view projection matrices are stored in
+# the ShadowData uniform block. Must match simple.frag.
+_SHADOW_MAP_SIZE = 1024
+_SHADOW_MAPS_PER_ROW = 4
+_MAX_SHADOW_MAPS = 32
+_SHADOW_DATA_BINDING = 2
+_SHADOW_MAP_TEXTURE_UNIT = 4
+
+# Objects smaller than this on the screen in pixel use the coarsest level of detail. Every finer level is used for
+# objects twice as large as the previous one, as every level halves the edge length of the geometry.
+_LOD_BASE_SIZE = 16.
+
+
+def _group_by_primitive(objects, primitive_type) -> dict:
+    """ Group objects by their primitive type. The order of the objects within a group is kept.
+
+    Args:
+        objects: Iterable of Object3D instances.
+        primitive_type: Function which returns the primitive type of an object.
+
+    Returns:
+        dict: Lists of objects keyed by primitive type.
+    """
+    groups = dict()
+    for object_3d in objects:
+        groups.setdefault(primitive_type(object_3d), []).append(object_3d)
+    return groups
+
+
+def _instance_indices(objects) -> np.ndarray:
+    """ Slots of objects in the object data texture as they are uploaded to the instance buffers and the
+    ObjectIndices uniform block.
+
+    Args:
+        objects: List of Object3D instances.
+
+    Returns:
+        np.ndarray: Int32 array with the transform index of every object.
+    """
+    return np.fromiter((object_3d.transform_index for object_3d in objects), dtype='i4', count=len(objects))
+
+
+def _pack_objects(objects, world_matrices: np.ndarray) -> np.ndarray:
+    """ Pack the data of objects as it is stored in the object data texture.
+
+    Args:
+        objects: List of Object3D instances.
+        world_matrices: World matrices of the transform store the objects live in.
+
+    Returns:
+        np.ndarray: Float32 array of shape (len(objects), 8, 4). The first four texels of an object hold its world
+        matrix, followed by the color and the size.
+    """
+    object_data = np.zeros((len(objects), _OBJECT_TEXELS, 4), dtype='f4')
+    object_data[:, 0:4] = world_matrices[_instance_indices(objects)]
+    object_data[:, 4, :3] = [object_3d.color for object_3d in objects]
+    object_data[:, 5, :3] = [object_3d.size for object_3d in objects]
+    return object_data
+
+
+def _pack_lights(lights, world_matrices: np.ndarray, shadow_maps: dict = None) -> tuple:
+    """ Pack the data of lights as it is stored in the light data texture. Lights with shadow maps are stored first,
+    followed by the other lights without radius, which reach every pixel, and the lights with radius.
+
+    Args:
+        lights: List of Light instances.
+        world_matrices: World matrices of the transform store the lights live in.
+        shadow_maps (dict): First shadow map and number of shadow maps of the lights which cast shadows.
+
+    Returns:
+        tuple: Float32 array of shape (len(lights), 4, 4), the number of lights which are shaded for every pixel, and
+        the number of lights with shadow maps. The texels of a light hold its position and type, its direction and the
+        cosine of its cone angle, its color and radius, and its first shadow map and number of shadow maps. The radius
+        is zero for lights without radius.
+    """
+    shadow_maps = shadow_maps or dict()
+    lights = sorted(lights, key=lambda light: 0 if light in shadow_maps else
+                    2 if getattr(light, 'radius', None) else 1)
+    light_data = np.zeros((len(lights), _LIGHT_TEXELS, 4), dtype='f4')
+    if not lights:
+        return light_data, 0, 0
+    matrices = world_matrices[[light.transform_index for light in lights]]
+    light_data[:, 0, :3] = matrices[:, 3, :3]
+    # Lights shine along the negative z axis of their node
+    directions = -matrices[:, 2, :3]
+    light_data[:, 1, :3] = directions / np.linalg.norm(directions, axis=1)[:, np.newaxis]
+    for data, light in zip(light_data, lights):
+        data[2, :3] = light.color
+        data[2, 3] = getattr(light, 'radius', None) or 0.
+        if isinstance(light, DirectionalLight):
+            data[0, 3] = _DIRECTIONAL_LIGHT
+        elif isinstance(light, SpotLight):
+            data[0, 3] = _SPOT_LIGHT
+            data[1, 3] = np.cos(np.radians(light.angle))
+        else:
+            data[0, 3] = _POINT_LIGHT
+        data[3, :2] = shadow_maps.get(light, (0, 0))
+    shadow_count = sum(light in shadow_maps for light in lights)
+    return light_data, shadow_count + int(np.count_nonzero(light_data[shadow_count:, 2, 3] == 0.)), shadow_count
+
+
+def _lod_levels(sizes: np.ndarray, level_count: int) -> np.ndarray:
+    """ Level of detail for objects with the given diameters on the screen in pixel, starting with 0 for the coarsest
+    level. """
+    with np.errstate(divide='ignore'):
+        levels = np.ceil(np.log2(np.asarray(sizes, dtype=float) / _LOD_BASE_SIZE))
+    return np.clip(levels, 0, level_count - 1).astype(int)
+
+
+def _row_runs(rows: np.ndarray) -> list:
+    """ Split sorted unique row indices into ranges of consecutive rows.
+
+    Args:
+        rows (np.ndarray): Sorted unique row indices.
+
+    Returns:
+        list: Tuples (first, stop) of every range.
+    """
+    splits = np.flatnonzero(np.diff(rows) > 1) + 1
+    return [(int(run[0]), int(run[-1]) + 1) for run in np.split(rows, splits) if len(run) > 0]
+
+
+def _instance_buffer_reserve(instance_count: int, buffer_size=None):
+    """ Size of a new instance buffer, or None if the existing buffer is large enough.
+
+    Twice the required size is reserved to avoid a reallocation for every newly added object.
+
+    Args:
+        instance_count (int): Number of instances which need to fit into the buffer.
+        buffer_size: Size of the existing buffer in bytes. None if there is no buffer yet.
+
+    Returns:
+        Number of bytes to reserve for a new buffer or None.
+    """
+    required_size = instance_count * _INSTANCE_BYTES
+    if buffer_size is not None and buffer_size >= required_size:
+        return None
+    return max(required_size * 2, _INSTANCE_BYTES)
+
+
+class _ObjectDataTexture:
+
+    def __init__(self, ctx):
+        """ Copy of the world matrices, colors, and sizes of all objects of a scene on the GPU.
+
+        The data lives in a float texture with one texel row per 128 slots of the transform store. Shaders look up
+        the data of an object with its transform index. On every update only the rows with objects whose world matrix,
+        color, or size changed since the last update are uploaded.
+
+        Args:
+            ctx: ModernGL context.
+        """
+        self.ctx = ctx
+        self.texture = None
+        self.uploaded_count = 0
+        self._data = None
+        # Object3D in every slot of the store, or None for slots of other nodes
+        self._slot_objects = []
+        self._is_object = None
+        self._store = None
+        # World and object stamps of all slots at the last update
+        self._world_stamps = None
+        self._object_stamps = None
+        self._topology_version = None
+
+    def update(self, scene: Scene) -> None:
+        """ Upload the changed objects of a scene and bind the texture.
+
+        Args:
+            scene (Scene): Scene with the objects. The world matrices of the last scene update are used.
+        """
+        store = scene.transform_store
+        rows = -(-store.capacity // _OBJECTS_PER_ROW)
+        if self.texture is None or self.texture.height < rows:
+            if self.texture is not None:
+                self.texture.release()
+            self.texture = self.ctx.texture((_OBJECTS_PER_ROW * _OBJECT_TEXELS, rows), 4, dtype='f4')
+            self.texture.filter = (mgl.NEAREST, mgl.NEAREST)
+            self._data = np.zeros((rows * _OBJECTS_PER_ROW, _OBJECT_TEXELS, 4), dtype='f4')
+            self._store = None
+
+        if self._store is not store or self._topology_version != store.topology_version:
+            # Objects were added or removed, pack all of them
+            geometry = scene.render_list.geometry
+            slots = _instance_indices(geometry)
+            self._slot_objects = [None] * len(self._data)
+            for object_3d in geometry:
+                self._slot_objects[object_3d.transform_index] = object_3d
+            self._is_object = np.zeros(len(self._data), dtype=bool)
+            self._is_object[slots] = True
+            self._data[:] = 0.
+            self._data[slots] = _pack_objects(geometry, store.world_matrices)
+            self.texture.write(self._data.tobytes())
+            self.uploaded_count = len(geometry)
+        else:
+            # Slots which were added to a grown store are not in the render list yet
+            count = len(self._world_stamps)
+            is_object = self._is_object[:count]
+            # A world matrix can be recomputed without advancing the clock, so the stamps are compared per slot
+            world_changed = store.world_stamps[:count] != self._world_stamps
+            object_changed = store.object_stamps[:count] != self._object_stamps
+            changed = np.flatnonzero((world_changed | object_changed) & is_object)
+            self._data[changed, 0:4] = store.world_matrices[changed]
+            # Only objects with a new color or size need python attribute access
+            objects = [self._slot_objects[slot] for slot in np.flatnonzero(object_changed & is_object)]
+            if objects:
+                self._data[_instance_indices(objects), 4:6, :3] = \
+                    [(object_3d.color, object_3d.size) for object_3d in objects]
+            for first, stop in _row_runs(np.unique(changed // _OBJECTS_PER_ROW)):
+                rows_data = self._data[first * _OBJECTS_PER_ROW:stop * _OBJECTS_PER_ROW]
+                self.texture.write(rows_data.tobytes(), viewport=(0, first, self.texture.width, stop - first))
+            self.uploaded_count = len(changed)
+        self._store = store
+        self._world_stamps = store.world_stamps.copy()
+        self._object_stamps = store.object_stamps.copy()
+        self._topology_version = store.topology_version
+        self.texture.use(_OBJECT_DATA_TEXTURE_UNIT)
+
+
+class _LightData:
+
+    def __init__(self, ctx):
+        """ Lights of a scene and the lights of every tile of the screen on the GPU.
+
+        Lights without radius and lights with shadows are shaded for every pixel. The other lights with radius are
+        sorted into square tiles of the screen on every update. The shaders look up the tile of a pixel in the light
+        grid texture, which holds the offset and the number of its lights in the light indices texture.
+
+        Args:
+            ctx: ModernGL context.
+        """
+        self.ctx = ctx
+        self.light_texture = self._texture((_LIGHTS_PER_ROW * _LIGHT_TEXELS, 1), 4, 'f4')
+        self.grid_texture = self._texture((1, 1), 2, 'i4')
+        self.indices_texture = self._texture((_LIGHT_INDICES_PER_ROW, 1), 1, 'i4')
+
+    def _texture(self, size: tuple, components: int, dtype: str):
+        texture = self.ctx.texture(size, components, dtype=dtype)
+        texture.filter = (mgl.NEAREST, mgl.NEAREST)
+        return texture
+
+    def _write(self, texture, texels: np.ndarray, components: int, dtype: str):
+        """ Write texels row by row into the first rows of a texture. The texture is recreated if it is too small.
+
+        Returns:
+            Texture which holds the texels.
+        """
+        rows = max(-(-len(texels) // texture.width), 1)
+        if texture.height < rows:
+            size = (texture.width, rows)
+            texture.release()
+            texture = self._texture(size, components, dtype)
+        padded = np.zeros((rows * texture.width,) + texels.shape[1:], dtype=texels.dtype)
+        padded[:len(texels)] = texels
+        texture.write(padded.tobytes(), viewport=(0, 0, texture.width, rows))
+        return texture
+
+    def update(self, scene: Scene, view_projection, viewport: tuple, shadow_maps: dict) -> tuple:
+        """ Upload the lights of a scene, sort them into the tiles of a viewport, and bind the textures.
+
+        Args:
+            scene (Scene): Scene with the lights. The world matrices of the last scene update are used.
+            view_projection: View projection matrix of the camera.
+            viewport (tuple): Viewport (x, y, width, height) of the render pass.
+            shadow_maps (dict): Shadow maps of the lights as returned by _ShadowMaps.update.
+
+        Returns:
+            tuple: Number of lights which are shaded for every pixel, number of lights which are sorted into tiles,
+            and number of lights with shadow maps.
+        """
+        light_data, global_count, shadow_count = _pack_lights(scene.render_list.lights,
+                                                              scene.transform_store.world_matrices, shadow_maps)
+        self.light_texture = self._write(self.light_texture, light_data.reshape(-1, 4), 4, 'f4')
+        tiled_lights = light_data[global_count:]
+        if len(tiled_lights) > 0:
+            width, height = viewport[2:]
+            ranges = sphere_tile_ranges(view_projection, tiled_lights[:, 0, :3], tiled_lights[:, 2, 3], width,
+                                        height, _LIGHT_TILE_SIZE)
+            grid, indices = tile_lists(ranges, -(-width // _LIGHT_TILE_SIZE), -(-height // _LIGHT_TILE_SIZE))
+            if self.grid_texture.size != grid.shape[1::-1]:
+                self.grid_texture.release()
+                self.grid_texture = self._texture(grid.shape[1::-1], 2, 'i4')
+            self.grid_texture.write(grid.tobytes())
+            # Indices in the light data texture
+            self.indices_texture = self._write(self.indices_texture, indices + global_count, 1, 'i4')
+        self.light_texture.use(_LIGHT_DATA_TEXTURE_UNIT)
+        self.grid_texture.use(_LIGHT_GRID_TEXTURE_UNIT)
+        self.indices_texture.use(_LIGHT_INDICES_TEXTURE_UNIT)
+        return global_count, len(tiled_lights), shadow_count
+
+
+class _ShadowMaps:
+
+    def __init__(self, ctx, program, primitive):
+        """ Shadow maps of all lights which cast shadows. Every shadow map is a tile of one depth texture.
+
+        A shadow map is only drawn again if its view projection matrix changed, or if an object within its view
+        volume was added, removed, transformed, or changed since it was drawn.
+
+        Args:
+            ctx: ModernGL context.
+            program: Program which draws the depth of instanced objects.
+            primitive: Function which returns buffers, vertex array, and render mode of a primitive type.
+        """
+        self.ctx = ctx
+        self.program = program
+        self._primitive = primitive
+        # Placeholder until the first light casts shadows
+        self.texture = self._depth_texture((1, 1))
+        self.fbo = None
+        self.uniform_buffer = ctx.buffer(reserve=_MAX_SHADOW_MAPS * 64, dynamic=True)
+        self.update_count = 0
+        # Light, view projection matrix, drawn transform indices, transform store, and the world and object stamps of
+        # the drawn objects of every tile
+        self._tiles = []
+        # Instance buffer and vertex array for every primitive type
+        self._groups = dict()
+
+    def _depth_texture(self, size: tuple):
+        texture = self.ctx.depth_texture(size)
+        # Compare the depth when the texture is sampled, with bilinear filtering of the results
+        texture.compare_func = '<='
+        texture.filter = (mgl.LINEAR, mgl.LINEAR)
+        return texture
+
+    def _resize(self, tile_count: int) -> None:
+        """ Create a new depth texture if it has too few tiles. All tiles are drawn again. """
+        rows = -(-tile_count // _SHADOW_MAPS_PER_ROW)
+        if self.fbo is not None and self.texture.height >= rows * _SHADOW_MAP_SIZE:
+            return
+        if self.fbo is not None:
+            self.fbo.release()
+        self.texture.release()
+        self.texture = self._depth_texture((_SHADOW_MAPS_PER_ROW * _SHADOW_MAP_SIZE, rows * _SHADOW_MAP_SIZE))
+        self.fbo = self.ctx.framebuffer(depth_attachment=self.texture)
+        self._tiles = []
+
+    def _group(self, primitive_type, instance_count: int) -> tuple:
+        """ Returns instance buffer and vertex array for a primitive type. """
+        group = self._groups.get(primitive_type)
+        reserve = _instance_buffer_reserve(instance_count, None if group is None else group[0].size)
+        if reserve is not None:
+            if group is not None:
+                for resource in reversed(group):
+                    resource.release()
+            instance_buffer = self.ctx.buffer(reserve=reserve, dynamic=True)
+            vbo, ibo, _ = self._primitive(primitive_type)[0]
+            group = (instance_buffer, self.ctx.vertex_array(self.program, [(vbo, '3f', 'in_vert'),
+                                                                           (instance_buffer, 'i/i', 'in_index')],
+                                                            index_buffer=ibo))
+            self._groups[primitive_type] = group
+        return group
+
+    def _changed(self, tile: int, light, view_projection: np.ndarray, indices: np.ndarray, store) -> bool:
+        """ Whether a tile needs to be drawn again. """
+        if tile >= len(self._tiles):
+            return True
+        last_light, last_view_projection, last_indices, last_store, world_stamps, object_stamps = self._tiles[tile]
+        # A world matrix can be recomputed without advancing the clock, so the stamps are compared per object
+        return (last_light is not light or last_store is not store
+                or not np.array_equal(last_view_projection, view_projection)
+                or not np.array_equal(last_indices, indices)
+                or not np.array_equal(store.world_stamps[indices], world_stamps)
+                or not np.array_equal(store.object_stamps[indices], object_stamps))
+
+    def _draw(self, tile: int, view_projection: np.ndarray, queue: list) -> None:
+        """ Draw the depth of the objects of a render queue into a tile. """
+        x = tile % _SHADOW_MAPS_PER_ROW * _SHADOW_MAP_SIZE
+        y = tile // _SHADOW_MAPS_PER_ROW * _SHADOW_MAP_SIZE
+        viewport = (x, y, _SHADOW_MAP_SIZE, _SHADOW_MAP_SIZE)
+        self.fbo.clear(depth=1., viewport=viewport)
+        self.ctx.viewport = viewport
+        self.program['ShadowViewProjection'].write(view_projection.astype('f4').tobytes())
+        for primitive_type, indices in queue:
+            instance_buffer, vao = self._group(primitive_type, len(indices))
+            instance_buffer.write(indices.tobytes())
+            vao.render(self._primitive(primitive_type)[2], instances=len(indices))
+
+    def update(self, scene: Scene, queue: list) -> dict:
+        """ Draw the shadow maps which changed, and bind the depth texture and the view projection matrices.
+        Changes the framebuffer and the viewport of the context.
+
+        Args:
+            scene (Scene): Scene with the lights and objects. The world matrices of the last scene update are used.
+            queue (list): Render queue with all objects of the scene, see :meth:`Renderer._render_queue`.
+
+        Returns:
+            dict: First shadow map and number of shadow maps of every light which casts shadows. Lights are left out
+            if the maximum number of shadow maps is reached.
+        """
+        store = scene.transform_store
+        shadow_maps = dict()
+        tiles = []
+        for light in scene.render_list.lights:
+            if not light.shadows:
+                continue
+            view_projections = light._shadow_view_projections(store.world_matrices[light.transform_index])
+            if len(tiles) + len(view_projections) > _MAX_SHADOW_MAPS:
+                continue
+            shadow_maps[light] = (len(tiles), len(view_projections))
+            tiles.extend((light, view_projection) for view_projection in view_projections)
+
+        self.update_count = 0
+        if tiles:
+            self._resize(len(tiles))
+            geometry = scene.render_list.geometry
+            if geometry:
+                centers, extents = scene.object_bounds()
+            self.fbo.use()
+            polygon_offset = self.ctx.polygon_offset
+            # Slope scaled depth offset against self shadowing
+            self.ctx.polygon_offset = (2., 4.)
+            for tile, (light, view_projection) in enumerate(tiles):
+                tile_queue = []
+                if geometry:
+                    visible = boxes_in_frustum(frustum_planes(view_projection), centers, extents)
+                    tile_queue = [(primitive_type, indices[visible[positions]])
+                                  for primitive_type, positions, indices in queue]
+                    tile_queue = [entry for entry in tile_queue if len(entry[1]) > 0]
+                indices = np.concatenate([entry[1] for entry in tile_queue]) if tile_queue else np.zeros(0, 'i4')
+                if self._changed(tile, light, view_projection, indices, store):
+                    self._draw(tile, view_projection, tile_queue)
+                    self._tiles[tile:tile + 1] = [(light, view_projection, indices, store, store.world_stamps[indices],
+                                                   store.object_stamps[indices])]
+                    self.update_count += 1
+            del self._tiles[len(tiles):]
+            self.ctx.polygon_offset = polygon_offset
+            self.uniform_buffer.write(np.array([view_projection for _, view_projection in tiles], dtype='f4')
+                                      .tobytes())
+        self.uniform_buffer.bind_to_uniform_block(_SHADOW_DATA_BINDING)
+        self.texture.use(_SHADOW_MAP_TEXTURE_UNIT)
+        return shadow_maps
+
+
+class _ContextResources:
+
+    def __init__(self, ctx):
+        """ Shader programs and primitives of a context, shared by all renderers which use the context. """
+        self.ctx = ctx
+        shader_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'shader')
+        self.prog = ctx.program(
+            vertex_shader=open(os.path.join(shader_path, 'simple.vert')).read(),
+            fragment_shader=open(os.path.join(shader_path, 'simple.frag')).read())
+
+        self.instanced_prog = ctx.program(
+            vertex_shader=open(os.path.join(shader_path, 'instanced.vert')).read(),
+            fragment_shader=open(os.path.join(shader_path, 'simple.frag')).read())
+
+        self.id_prog = ctx.program(
+            vertex_shader=open(os.path.join(shader_path, 'id.vert')).read(),
+            fragment_shader=open(os.path.join(shader_path, 'id.frag')).read())
+
+        self.shadow_prog = ctx.program(
+            vertex_shader=open(os.path.join(shader_path, 'shadow.vert')).read(),
+            fragment_shader=open(os.path.join(shader_path, 'shadow.frag')).read())
+        self.shadow_prog['ObjectData'].value = _OBJECT_DATA_TEXTURE_UNIT
+        self.prog['ObjectIndices'].binding = _OBJECT_INDICES_BINDING
+        for prog in (self.prog, self.instanced_prog, self.id_prog):
+            prog['FrameData'].binding = _FRAME_DATA_BINDING
+            prog['ObjectData'].value = _OBJECT_DATA_TEXTURE_UNIT
+        for prog in (self.prog, self.instanced_prog):
+            prog['LightData'].value = _LIGHT_DATA_TEXTURE_UNIT
+            prog['LightGrid'].value = _LIGHT_GRID_TEXTURE_UNIT
+            prog['LightIndices'].value = _LIGHT_INDICES_TEXTURE_UNIT
+            prog['ShadowMaps'].value = _SHADOW_MAP_TEXTURE_UNIT
+            prog['ShadowData'].binding = _SHADOW_DATA_BINDING
+        # Buffers, vertex array, and render mode for every primitive type. Created by the renderers on first use.
+        self.primitives = dict()
+
+    @classmethod
+    def of(cls, ctx) -> '_ContextResources':
+        """ The resources of a context. Created for the first renderer which uses the context. """
+        resources = _context_resources.get(id(ctx))
+        if resources is None or resources.ctx is not ctx:
+            resources = cls(ctx)
+            _context_resources[id(ctx)] = resources
+        return resources
+
+
 class Renderer:
 
-    def __init__(self, scene: Scene, camera: Camera):
+    def __init__(self, scene: Scene, camera: Camera, *, instanced: bool = False, frustum_culling: bool = True,
+                 level_of_detail: bool = False):
         """Base class. All renderer implementations need to inherit form this class.
 
         Args:
             scene (Scene): Scene which shall be rendered.
             camera (Camera): Camera which is used to view scene.
+            instanced (bool): If True all objects of the same primitive type are drawn with one instanced
+                draw call.
+            frustum_culling (bool): If True objects outside of the camera frustum are not drawn.
+            level_of_detail (bool): If True round objects are drawn with more triangles the larger they appear on
+                the screen.
 
         """
         self.scene = scene
@@ -35,43 +573,263 @@ class Renderer:
                
         See https://moderngl.readthedocs.io/en/stable/reference/context.html for more information.
         """
+        self.instanced = instanced
+        """ bool: If True, objects are grouped by their primitive type and every group is rendered with
+        a single instanced draw call. Use this mode for scenes with many objects. """
+        self.frustum_culling = frustum_culling
+        """ bool: If True, the bounding boxes of all objects are tested against the camera frustum and only
+        visible objects are drawn. """
+        self.level_of_detail = level_of_detail
+        """ bool: If True, the geometry of circles, cylinders, and icosahedrons is chosen every frame from the size
+        of the object on the screen. Larger icosahedrons become spheres. Objects of the same type and level are still
+        drawn together. Shadow maps and render_views use the default geometry. """
+        self.visible_count = 0
+        """ int: Number of objects which were drawn in the last frame. """
+        self.culled_count = 0
+        """ int: Number of objects which were skipped in the last frame because they were outside of the
+        camera frustum. """
+        self.uploaded_count = 0
+        """ int: Number of objects whose world matrix, color, or size was uploaded to the GPU in the last frame.
+        The data of all objects stays on the GPU, only objects which changed since the last frame are uploaded. """
+        self.shadow_update_count = 0
+        """ int: Number of shadow maps which were drawn in the last frame. Shadow maps are kept if nothing changed
+        within the view volume of the light. """
 
-    def _create_vertex_array(self, vertices, indices, normals):
+    def _create_buffers(self, vertices, indices, normals):
         vbo = self.ctx.buffer(vertices.astype('f4').tobytes())
         ibo = self.ctx.buffer(indices.astype('i4').tobytes())
         nbo = self.ctx.buffer(normals.astype('f4').tobytes())
+        return vbo, ibo, nbo
+
+    def _create_vertex_array(self, vbo, ibo, nbo):
         vao_content = [
             (vbo, '3f', 'in_vert'),
             (nbo, '3f', 'in_norm')
         ]
         return self.ctx.vertex_array(self.prog, vao_content, index_buffer=ibo)
 
+    def _create_instanced_vertex_array(self, vbo, ibo, nbo, instance_buffer):
+        vao_content = [
+            (vbo, '3f', 'in_vert'),
+            (nbo, '3f', 'in_norm'),
+            (instance_buffer, 'i/i', 'in_index')
+        ]
+        return self.ctx.vertex_array(self.instanced_prog, vao_content, index_buffer=ibo)
+
+    def _create_id_vertex_array(self, vbo, ibo, nbo, instance_buffer):
+        vao_content = [
+            (vbo, '3f', 'in_vert'),
+            (instance_buffer, 'i/i', 'in_index')
+        ]
+        return self.ctx.vertex_array(self.id_prog, vao_content, index_buffer=ibo)
+
     def _setup(self):
         """ Call this method from children as soon as context object was create.
         """
         self.ctx.enable(mgl.CULL_FACE)
         self.ctx.front_face = 'ccw'
         self.ctx.enable(mgl.DEPTH_TEST)
-        shader_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'shader')
-        self.prog = self.ctx.program(
-            vertex_shader=open(os.path.join(shader_path, 'simple.vert')).read(),
-            fragment_shader=open(os.path.join(shader_path, 'simple.frag')).read())
-        self.object_color = self.prog['ObjectColor']
-        self.ambient_light = self.prog['AmbientLight']
-        self.point_light_position = self.prog['PointLightPosition']
-        self.point_light_color = self.prog['PointLightColor']
-        self.model_matrix = self.prog['ModelMatrix']
-        self.view_projection_matrix = self.prog['ViewProjectionMatrix']
-        self.model_size = self.prog['ModelSize']
-
-        self.cube_vao = self._create_vertex_array(*create_cube())
-        self.plane_vao = self._create_vertex_array(*create_plane())
-        self.icosahedron_vao = self._create_vertex_array(*create_icosahedron())
-        self.circle_vao = self._create_vertex_array(*create_circle())
-        self.triangle_vao = self._create_vertex_array(*create_triangle())
-        self.cylinder_vao = self._create_vertex_array(*create_cylinder())
-        self.tetrahedral_vao = self._create_vertex_array(*create_tetrahedral())
-        self.pyramid_vao = self._create_vertex_array(*create_pyramid())
+        # Shader programs and primitives are shared by all renderers which use the context
+        self._resources = _ContextResources.of(self.ctx)
+        self.prog = self._resources.prog
+        self.first_object = self.prog['FirstObject']
+        self.instanced_prog = self._resources.instanced_prog
+        self.id_prog = self._resources.id_prog
+        self.shadow_prog = self._resources.shadow_prog
+        # Uniform buffers for the camera and lights of a frame and for the slots of a batch of objects
+        self._frame_uniform_buffer = self.ctx.buffer(reserve=_FRAME_DATA.itemsize, dynamic=True)
+        self._object_uniform_buffer = self.ctx.buffer(reserve=_OBJECT_BATCH_SIZE * 4, dynamic=True)
+        # World matrices, colors, and sizes of all objects which are kept on the GPU between frames
+        self._object_data = _ObjectDataTexture(self.ctx)
+        self._light_data = _LightData(self.ctx)
+        self._shadow_maps = _ShadowMaps(self.ctx, self.shadow_prog, self._primitive)
+
+        # Framebuffer for the object IDs and the objects drawn into it. Created on first pick.
+        self._id_fbo = None
+        self._id_objects = []
+
+        # Buffers, vertex array, and render mode for every primitive type, shared with the other renderers
+        self._primitives = self._resources.primitives
+        for object_3d_type in _BUILT_IN_TYPES:
+            self._primitive(object_3d_type)
+        # Instance buffer and instanced vertex arrays for the color and the ID pass for every primitive type.
+        # Created on first use.
+        self._instance_groups = dict()
+        # Render queue and the state of the scene it was built for
+        self._queue = []
+        self._queue_key = None
+
+        self.cube_vao = self._primitives[CubeObject3D][1]
+        self.plane_vao = self._primitives[PlaneObject3D][1]
+        self.icosahedron_vao = self._primitives[IcosahedronObject3D][1]
+        self.circle_vao = self._primitives[CircleObject3D][1]
+        self.triangle_vao = self._primitives[TriangleObject3D][1]
+        self.cylinder_vao = self._primitives[CylinderObject3D][1]
+        self.tetrahedral_vao = self._primitives[TetrahedralObject3D][1]
+        self.pyramid_vao = self._primitives[PyramidObject3D][1]
+
+    @staticmethod
+    def _primitive_type(object_3d) -> type:
+        """ Returns the primitive type of the given object which is used to look up its vertex array. This is the
+        class which defines the geometry of the object, see :func:`pysg.object_3d.geometry_type`.
+        """
+        primitive_type = geometry_type(type(object_3d))
+        if primitive_type is None:
+            raise NotImplementedError(object_3d, "No geometry registered for object3D type. "
+                                                 "Use pysg.object_3d.register_geometry.")
+        return primitive_type
+
+    def _primitive(self, primitive_type) -> tuple:
+        """ Returns buffers, vertex array, and render mode of a primitive type. Created on first use.
+
+        Args:
+            primitive_type: Primitive type, or tuple of primitive type and level of detail.
+        """
+        primitive = self._primitives.get(primitive_type)
+        if primitive is None:
+            if isinstance(primitive_type, tuple):
+                object_3d_type, level = primitive_type
+                create_geometry = object_3d_type._lod_geometry[level]
+            else:
+                object_3d_type, create_geometry = primitive_type, primitive_type._geometry
+            buffers = self._create_buffers(*cached_geometry(create_geometry))
+            mode = mgl.TRIANGLE_FAN if object_3d_type._triangle_fan else mgl.TRIANGLES
+            primitive = (buffers, self._create_vertex_array(*buffers), mode)
+            self._primitives[primitive_type] = primitive
+        return primitive
+
+    def _render_queue(self) -> list:
+        """ All objects of the render list grouped by primitive type. Groups are sorted by render mode, so every
+        vertex array and render mode is used once per frame. The queue is rebuilt when the scene graph changes.
+
+        Returns:
+            list: Tuples (primitive type, positions in the render list, transform indices) for every group. The
+            objects of a group keep the order of the render list.
+        """
+        geometry = self.scene.render_list.geometry
+        store = self.scene.transform_store
+        key = (store, store.topology_version, len(geometry))
+        if key != self._queue_key:
+            groups = _group_by_primitive(range(len(geometry)),
+                                         lambda position: self._primitive_type(geometry[position]))
+            self._queue = [(primitive_type, np.array(positions, dtype=int),
+                            _instance_indices([geometry[position] for position in positions]))
+                           for primitive_type, positions in groups.items()]
+            self._queue.sort(key=lambda entry: self._primitive(entry[0])[2])
+            self._queue_key = key
+        return self._queue
+
+    def _instance_group(self, object_3d_type, instance_count: int):
+        """ Returns instance buffer, vertex array, and ID pass vertex array for a primitive type.
+        The instance buffer is (re-)created if it is too small to hold all instances.
+        """
+        group = self._instance_groups.get(object_3d_type)
+        reserve = _instance_buffer_reserve(instance_count, None if group is None else group[0].size)
+        if reserve is not None:
+            if group is not None:
+                for resource in reversed(group):
+                    resource.release()
+            instance_buffer = self.ctx.buffer(reserve=reserve, dynamic=True)
+            buffers = self._primitive(object_3d_type)[0]
+            group = (instance_buffer, self._create_instanced_vertex_array(*buffers, instance_buffer),
+                     self._create_id_vertex_array(*buffers, instance_buffer))
+            self._instance_groups[object_3d_type] = group
+        return group
+
+    def _write_frame_data(self, view_projection, lights: bool = True) -> None:
+        """ Upload the camera and the lights to the FrameData uniform block of all shaders, and the objects which
+        changed since the last frame to the object data texture. Set the viewport of the render pass before.
+
+        Args:
+            view_projection: View projection matrix of the camera.
+            lights (bool): If False the lights are not uploaded, for render passes without shading.
+        """
+        frame_data = np.zeros(1, dtype=_FRAME_DATA)
+        frame_data['view_projection_matrix'] = view_projection
+        frame_data['ambient_light'][0, :3] = self.scene.ambient_light
+        viewport = self.ctx.viewport
+        frame_data['viewport'] = viewport
+        # The shadow maps are drawn with the new object data
+        self._object_data.update(self.scene)
+        self.uploaded_count = self._object_data.uploaded_count
+        if lights:
+            fbo = self.ctx.fbo
+            shadow_maps = self._shadow_maps.update(self.scene, self._render_queue())
+            self.shadow_update_count = self._shadow_maps.update_count
+            fbo.use()
+            self.ctx.viewport = viewport
+            global_count, tiled_count, shadow_count = self._light_data.update(self.scene, view_projection, viewport,
+                                                                              shadow_maps)
+            frame_data['light_info'] = (global_count, tiled_count, _LIGHT_TILE_SIZE, shadow_count)
+        self._frame_uniform_buffer.write(frame_data.tobytes())
+        # Other renderers can share the context and its binding points
+        self._frame_uniform_buffer.bind_to_uniform_block(_FRAME_DATA_BINDING)
+
+    def _visible_queue(self, view_projection) -> list:
+        """ The render queue with all objects of the scene which intersect the camera frustum. Updates the visible and
+        culled counts.
+
+        Args:
+            view_projection: View projection matrix of the camera.
+
+        Returns:
+            list: Render queue entries like :meth:`_render_queue` without empty groups. The primitive type of groups
+            with a level of detail is a tuple of primitive type and level.
+        """
+        geometry = self.scene.render_list.geometry
+        queue = self._render_queue()
+        if (self.frustum_culling or self.level_of_detail) and geometry:
+            centers, extents = self.scene.object_bounds()
+        if self.frustum_culling and geometry:
+            visible = boxes_in_frustum(frustum_planes(view_projection), centers, extents)
+            queue = [(primitive_type, positions[visible[positions]], indices[visible[positions]])
+                     for primitive_type, positions, indices in queue]
+            queue = [entry for entry in queue if len(entry[1]) > 0]
+        if self.level_of_detail and geometry:
+            # The bounding sphere encloses the bounding box
+            sizes = projected_sizes(view_projection, centers, np.linalg.norm(extents, axis=1), self.ctx.viewport[3])
+            queue = self._split_levels(queue, sizes)
+        self.visible_count = sum(len(positions) for _, positions, _ in queue)
+        self.culled_count = len(geometry) - self.visible_count
+        return queue
+
+    def _split_levels(self, queue: list, sizes: np.ndarray) -> list:
+        """ Split the groups of primitive types with a level of detail into one group per level.
+
+        Args:
+            queue (list): Render queue entries like :meth:`_render_queue`.
+            sizes (np.ndarray): Size of every object of the render list on the screen in pixel.
+
+        Returns:
+            list: Render queue sorted by render mode. The objects of a level keep the order of the render list.
+        """
+        lod_queue = []
+        for primitive_type, positions, indices in queue:
+            levels = primitive_type._lod_geometry
+            if not levels:
+                lod_queue.append((primitive_type, positions, indices))
+                continue
+            object_levels = _lod_levels(sizes[positions], len(levels))
+            for level in np.unique(object_levels):
+                in_level = object_levels == level
+                lod_queue.append(((primitive_type, int(level)), positions[in_level], indices[in_level]))
+        lod_queue.sort(key=lambda entry: self._primitive(entry[0])[2])
+        return lod_queue
+
+    def _view_projection(self, camera: Camera = None):
+        """ Update the world matrices if needed and return the view projection matrix of a camera.
+
+        Args:
+            camera (Camera): Camera to view the scene. Uses the camera of the renderer if None.
+        """
+        camera = self.camera if camera is None else camera
+        if self.scene.auto_update:
+            self.scene.update_world_matrix()
+
+        if camera._parent is None:
+            camera.update_world_matrix()
+
+        return camera.projection_matrix * camera.world_matrix.inverse
 
     def _render(self) -> None:
         """ Call this method from subclasses to render all objects in the scene.
@@ -79,44 +837,130 @@ class Renderer:
         self.ctx.clear(*self.scene.background_color)
 
         # Update projection matrices
-        if self.scene.auto_update:
-            self.scene.update_world_matrix()
+        view_projection_mat44 = self._view_projection()
+        queue = self._visible_queue(view_projection_mat44)
 
-        if self.camera._parent is None:
-            self.camera.update_world_matrix()
-
-        view_projection_mat44 = self.camera.projection_matrix * self.camera.world_matrix.inverse
-        self.view_projection_matrix.write(view_projection_mat44.astype('f4').tobytes())
-        self.ambient_light.value = self.scene.ambient_light
-
-        # TODO implement several light sources and other types
-        if len(self.scene.render_list.point_lights) > 0:
-            self.point_light_color.value = self.scene.render_list.point_lights[0].color
-            self.point_light_position.value = tuple(self.scene.render_list.point_lights[0].world_position)
-
-        # Render 3D geometries
-        for object_3d in self.scene.render_list.geometry:
-            self.model_matrix.write(object_3d.world_matrix.astype('f4').tobytes())
-            self.object_color.value = object_3d.color
-            self.model_size.value = object_3d.size
-            if issubclass(type(object_3d), PlaneObject3D):
-                self.plane_vao.render(mgl.TRIANGLES)
-            elif issubclass(type(object_3d), IcosahedronObject3D):
-                self.icosahedron_vao.render(mgl.TRIANGLES)
-            elif issubclass(type(object_3d), CubeObject3D):
-                self.cube_vao.render(mgl.TRIANGLES)
-            elif issubclass(type(object_3d), CircleObject3D):
-                self.circle_vao.render(mgl.TRIANGLE_FAN)
-            elif issubclass(type(object_3d), TriangleObject3D):
-                self.triangle_vao.render(mgl.TRIANGLES)
-            elif issubclass(type(object_3d), CylinderObject3D):
-                self.cylinder_vao.render(mgl.TRIANGLES)
-            elif issubclass(type(object_3d), TetrahedralObject3D):
-                self.tetrahedral_vao.render(mgl.TRIANGLES)
-            elif issubclass(type(object_3d), PyramidObject3D):
-                self.pyramid_vao.render(mgl.TRIANGLES)
-            else:
-                raise NotImplementedError(object_3d, "Renderer for object3D not implemented yet")
+        self._write_frame_data(view_projection_mat44)
+        if self.instanced:
+            self._render_instanced(queue)
+            return
+
+        # Render 3D geometries in batches. Like the instanced path, use the world matrices of the last scene update.
+        indices = np.concatenate([entry[2] for entry in queue]) if queue else np.zeros(0, dtype='i4')
+        group_stops = np.cumsum([len(entry[2]) for entry in queue])
+        self._object_uniform_buffer.bind_to_uniform_block(_OBJECT_INDICES_BINDING)
+        for first in range(0, len(indices), _OBJECT_BATCH_SIZE):
+            stop = min(first + _OBJECT_BATCH_SIZE, len(indices))
+            # Orphan the buffer, so the upload does not wait for the draw calls of the previous batch
+            self._object_uniform_buffer.orphan()
+            self._object_uniform_buffer.write(indices[first:stop].tobytes())
+            # Draw the part of every group which lies in this batch
+            group_start = 0
+            for (primitive_type, _, _), group_stop in zip(queue, group_stops):
+                start, end = max(group_start, first), min(group_stop, stop)
+                if start < end:
+                    self.first_object.value = start - first
+                    _, vao, mode = self._primitives[primitive_type]
+                    vao.render(mode, instances=end - start)
+                group_start = group_stop
+
+    def _render_instanced(self, queue: list) -> None:
+        """ Draw every group of the render queue with one instanced draw call. """
+        self._draw_instance_groups(self._upload_instance_groups(queue))
+
+    def _upload_instance_groups(self, queue: list) -> list:
+        """ Write the transform indices of all groups of a render queue to the instance buffers.
+
+        Returns:
+            list: Tuples of primitive type and instance count of all groups.
+        """
+        for primitive_type, _, indices in queue:
+            instance_buffer, _, _ = self._instance_group(primitive_type, len(indices))
+            instance_buffer.write(indices.tobytes())
+        return [(primitive_type, len(indices)) for primitive_type, _, indices in queue]
+
+    def _draw_instance_groups(self, groups: list) -> None:
+        """ Draw instance groups which were uploaded with _upload_instance_groups. """
+        for object_3d_type, instance_count in groups:
+            vao = self._instance_groups[object_3d_type][1]
+            vao.render(self._primitives[object_3d_type][2], instances=instance_count)
+
+    def _render_ids(self) -> None:
+        """ Render the index of every visible object plus one into the ID framebuffer. Zero marks the background.
+        """
+        size = self._framebuffer_size()
+        if self._id_fbo is None or self._id_fbo.size != size:
+            if self._id_fbo is not None:
+                for attachment in self._id_fbo.color_attachments + (self._id_fbo.depth_attachment,):
+                    attachment.release()
+                self._id_fbo.release()
+            self._id_fbo = self.ctx.framebuffer(
+                self.ctx.renderbuffer(size, components=1, dtype='u4'),
+                self.ctx.depth_renderbuffer(size),
+            )
+        previous_fbo = self.ctx.fbo
+        self._id_fbo.use()
+        self._id_fbo.clear()
+
+        view_projection_mat44 = self._view_projection()
+        self._write_frame_data(view_projection_mat44, lights=False)
+        self._id_objects = []
+        geometry = self.scene.render_list.geometry
+        for primitive_type, positions, indices in self._visible_queue(view_projection_mat44):
+            instance_buffer, _, id_vao = self._instance_group(primitive_type, len(indices))
+            instance_buffer.write(indices.tobytes())
+            self.id_prog['FirstId'].value = len(self._id_objects)
+            id_vao.render(self._primitives[primitive_type][2], instances=len(indices))
+            self._id_objects.extend(geometry[position] for position in positions)
+
+        if previous_fbo is not None:
+            previous_fbo.use()
+
+    def pick(self, x: int, y: int):
+        """ The object which is visible at a pixel.
+
+        The scene is rendered into an integer framebuffer where every pixel holds the ID of the visible object. Only
+        the requested pixel is read back.
+
+        Args:
+            x (int): Horizontal pixel coordinate, starting at the left.
+            y (int): Vertical pixel coordinate, starting at the top.
+
+        Returns:
+            Object3D: The object at the pixel, or None if the background is visible.
+        """
+        objects = self.pick_rect(x, y, 1, 1)
+        return objects[0] if objects else None
+
+    def pick_rect(self, x: int, y: int, width: int, height: int) -> list:
+        """ All objects which are visible in a rectangular region.
+
+        Args:
+            x (int): Horizontal pixel coordinate of the left edge, starting at the left.
+            y (int): Vertical pixel coordinate of the top edge, starting at the top.
+            width (int): Width of the region in pixel.
+            height (int): Height of the region in pixel.
+
+        Returns:
+            list: Visible objects in the order of the render list.
+        """
+        frame_width, frame_height = self._framebuffer_size()
+        # Clip the region to the framebuffer. Framebuffer rows start at the bottom.
+        left, right = max(int(x), 0), min(int(x + width), frame_width)
+        top, bottom = max(int(y), 0), min(int(y + height), frame_height)
+        if left >= right or top >= bottom:
+            return []
+        self._render_ids()
+        data = self._id_fbo.read(viewport=(left, frame_height - bottom, right - left, bottom - top),
+                                 components=1, dtype='u4')
+        ids = np.unique(np.frombuffer(data, dtype=np.uint32))
+        objects = [self._id_objects[i - 1] for i in ids[ids > 0]]
+        render_order = {id(object_3d): i for i, object_3d in enumerate(self.scene.render_list.geometry)}
+        return sorted(objects, key=lambda object_3d: render_order[id(object_3d)])
+
+    def _framebuffer_size(self) -> tuple:
+        """ Size (width, height) of the image the renderer draws. Needs to be implemented by sub-classes. """
+        raise NotImplementedError()
 
     def render(self) -> None:
         """ Base render function which needs to be implemented by sub-classes."""
@@ -125,20 +969,30 @@ class Renderer:
 
 class GLRenderer(Renderer):
 
-    def __init__(self, scene: Scene, camera: Camera):
+    def __init__(self, scene: Scene, camera: Camera, *, instanced: bool = False, frustum_culling: bool = True,
+                 level_of_detail: bool = False):
         """Render the scene to a given viewport.
 
         Args:
             scene (Scene): Scene which shall be rendered.
             camera (Camera): Camera which is used to view scene.
+            instanced (bool): If True use instanced rendering. See :attr:`Renderer.instanced`.
+            frustum_culling (bool): If True skip objects outside of the camera frustum.
+                See :attr:`Renderer.frustum_culling`.
+            level_of_detail (bool): If True choose the geometry of round objects from their size on the screen.
+                See :attr:`Renderer.level_of_detail`.
         """
-        super().__init__(scene, camera)
+        super().__init__(scene, camera, instanced=instanced, frustum_culling=frustum_culling,
+                         level_of_detail=level_of_detail)
         self.ctx = mgl.create_context()
         super()._setup()
 
         self.viewport = None
         """ tuple: Viewport is a tuple of size four (x, y, width, height). """
 
+    def _framebuffer_size(self) -> tuple:
+        return tuple(self.viewport[2:])
+
     def render(self) -> None:
         """ Set viewport and call _render() function of base class."""
         self.ctx.viewport = self.viewport
@@ -147,7 +1001,9 @@ class GLRenderer(Renderer):
 
 class HeadlessGLRenderer(Renderer):
 
-    def __init__(self, scene: Scene, camera: Camera, *, width: int, height: int):
+    def __init__(self, scene: Scene, camera: Camera, *, width: int, height: int, instanced: bool = False,
+                 frustum_culling: bool = True, level_of_detail: bool = False, readback_buffers: int = 2,
+                 normal_output: bool = False, ctx: mgl.Context = None):
         """Render the scene to a framebuffer which can be read to CPU memory to be used as an image.
 
         Args:
@@ -155,16 +1011,44 @@ class HeadlessGLRenderer(Renderer):
             camera (Camera): Camera which is used to view scene.
             width (float): Width of output image in pixel
             height (float): Height of output image in pixel
+            instanced (bool): If True use instanced rendering. See :attr:`Renderer.instanced`.
+            frustum_culling (bool): If True skip objects outside of the camera frustum.
+                See :attr:`Renderer.frustum_culling`.
+            level_of_detail (bool): If True choose the geometry of round objects from their size on the screen.
+                See :attr:`Renderer.level_of_detail`.
+            readback_buffers (int): Number of pixel buffers used by current_image_async. Two buffers allow to
+                render the next frame while the last one is copied, more buffers add latency but can hide longer
+                copies.
+            normal_output (bool): If True the world space normals are stored in an additional color attachment
+                during the render pass. They can be read with current_normals.
+            ctx (moderngl.Context): Context to render with. Renderers which share a context also share their shader
+                programs and geometry buffers, e.g. renderers for several resolutions. Use one context for all
+                renderers of a process, as the standalone contexts are not made current before rendering. A
+                standalone context is created if None.
         """
 
-        super().__init__(scene, camera)
-        self.ctx = mgl.create_standalone_context()
+        super().__init__(scene, camera, instanced=instanced, frustum_culling=frustum_culling,
+                         level_of_detail=level_of_detail)
+        self.ctx = mgl.create_standalone_context() if ctx is None else ctx
         super()._setup()
 
-        self.fbo = self.ctx.framebuffer(
-            self.ctx.renderbuffer((width, height)),
-            self.ctx.depth_renderbuffer((width, height)),
-        )
+        color_attachments = [self.ctx.renderbuffer((width, height))]
+        if normal_output:
+            color_attachments.append(self.ctx.renderbuffer((width, height), components=4, dtype='f4'))
+        self.fbo = self.ctx.framebuffer(color_attachments, self.ctx.depth_renderbuffer((width, height)))
+
+        if readback_buffers < 1:
+            raise ParameterError(readback_buffers, 'At least one readback buffer is needed!')
+        self._readback_buffer_count = readback_buffers
+        # Pixel buffers for asynchronous readback. Created on first use.
+        self._readback_buffers = []
+        # Indices of the pixel buffers with pending copies, the oldest frame first
+        self._pending_readbacks = collections.deque()
+        # Framebuffer for the tiles of render_views. Created on first use.
+        self._atlas_fbo = None
+
+    def _framebuffer_size(self) -> tuple:
+        return self.fbo.size
 
     def render(self) -> None:
         """ Render the current scene and camera into a buffer.
@@ -181,3 +1065,174 @@ class HeadlessGLRenderer(Renderer):
             bytes: The rendered byte array. Copy from vRAM to RAM.
         """
         return self.fbo.read(components=3, alignment=1)
+
+    def current_image_into(self, array: np.ndarray) -> np.ndarray:
+        """ Copy the rendered image from vRAM directly into a pre-allocated numpy array without intermediate copies.
+
+        The array receives the rows in OpenGL order, starting with the bottom row. The returned view flips the rows
+        without copying them, so it starts with the top row like the images of common image libraries.
+
+        Args:
+            array (np.ndarray): C-contiguous array of shape (height, width, 3) or (height, width, 4) with dtype
+                uint8 or float32. Float images contain values from 0 to 1.
+
+        Returns:
+            np.ndarray: Vertically flipped view of the array.
+        """
+        width, height = self.fbo.size
+        if array.ndim != 3 or array.shape[:2] != (height, width) or array.shape[2] not in (3, 4):
+            raise ParameterError(array.shape, 'Array shape must be (%d, %d, 3) or (%d, %d, 4)!'
+                                 % (height, width, height, width))
+        if array.dtype not in (np.uint8, np.float32):
+            raise ParameterError(array.dtype, 'Array dtype must be uint8 or float32!')
+        if not array.flags.c_contiguous or not array.flags.writeable:
+            raise ParameterError(array, 'Array must be C-contiguous and writeable!')
+        self.fbo.read_into(array, components=array.shape[2], alignment=1,
+                           dtype='f1' if array.dtype == np.uint8 else 'f4')
+        return array[::-1]
+
+    def current_image_array(self, components: int = 3, dtype=np.uint8) -> np.ndarray:
+        """ The rendered image as numpy array. See current_image_into.
+
+        Args:
+            components (int): Number of color channels, 3 for RGB or 4 for RGBA.
+            dtype: Either uint8 or float32.
+
+        Returns:
+            np.ndarray: Image of shape (height, width, components) starting with the top row.
+        """
+        width, height = self.fbo.size
+        return self.current_image_into(np.empty((height, width, components), dtype=dtype))
+
+    def current_depth(self, linear: bool = True) -> np.ndarray:
+        """ Read the depth buffer of the last render pass.
+
+        Args:
+            linear (bool): If True convert the values to the distance along the viewing direction of the camera,
+                using its near and far plane. Otherwise return the raw depth buffer values in the range [0, 1].
+
+        Returns:
+            np.ndarray: Float32 array of shape (height, width) starting with the top row. Pixels without geometry
+            are at the far plane.
+        """
+        width, height = self.fbo.size
+        depth = np.frombuffer(self.fbo.read(components=1, attachment=-1, alignment=1, dtype='f4'), dtype=np.float32)
+        depth = depth.reshape(height, width)[::-1]
+        if linear:
+            depth = self.camera.linearize_depth(depth).astype(np.float32)
+        return depth
+
+    def current_normals(self) -> np.ndarray:
+        """ Read the world space normals of the last render pass. Needs a renderer created with normal_output.
+
+        Returns:
+            np.ndarray: Float32 array of shape (height, width, 3) starting with the top row. Normals of pixels
+            without geometry are zero.
+        """
+        if len(self.fbo.color_attachments) < 2:
+            raise ParameterError(self, 'Renderer was created without normal output!')
+        width, height = self.fbo.size
+        normals = np.frombuffer(self.fbo.read(components=3, attachment=1, alignment=1, dtype='f4'), dtype=np.float32)
+        normals = normals.reshape(height, width, 3)[::-1].copy()
+        # The clear color is written to all attachments, use the depth buffer to find the background
+        background = self.current_depth(linear=False) == 1.
+        normals[background] = 0.
+        return normals
+
+    def render_views(self, cameras: list, components: int = 3) -> np.ndarray:
+        """ Render the scene from several cameras and read all images back with one transfer.
+
+        The object data is uploaded once and shared by all views. Every view is drawn into its own tile of a large
+        framebuffer. All objects are drawn in every view, frustum culling is not applied.
+
+        Args:
+            cameras (list): Cameras to view the scene. The images have the size of the renderer.
+            components (int): Number of color channels, 3 for RGB or 4 for RGBA.
+
+        Returns:
+            np.ndarray: Array of shape (len(cameras), height, width, components) with dtype uint8. The images start
+            with the top row.
+        """
+        width, height = self.fbo.size
+        max_size = self.ctx.info['GL_MAX_RENDERBUFFER_SIZE']
+        columns = max(min(len(cameras), max_size // width), 1)
+        rows = max(min(-(-len(cameras) // columns), max_size // height), 1)
+        atlas_size = (columns * width, rows * height)
+        if self._atlas_fbo is None or self._atlas_fbo.size != atlas_size:
+            if self._atlas_fbo is not None:
+                for attachment in self._atlas_fbo.color_attachments + (self._atlas_fbo.depth_attachment,):
+                    attachment.release()
+                self._atlas_fbo.release()
+            self._atlas_fbo = self.ctx.framebuffer(
+                self.ctx.renderbuffer(atlas_size),
+                self.ctx.depth_renderbuffer(atlas_size),
+            )
+
+        if self.scene.auto_update:
+            self.scene.update_world_matrix()
+        groups = self._upload_instance_groups(self._render_queue())
+        self.visible_count, self.culled_count = len(self.scene.render_list.geometry), 0
+
+        images = np.empty((len(cameras), height, width, components), dtype=np.uint8)
+        atlas = np.empty((rows * height, columns * width, components), dtype=np.uint8)
+        tiles = columns * rows
+        self._atlas_fbo.use()
+        for first in range(0, len(cameras), tiles):
+            batch = cameras[first:first + tiles]
+            self.ctx.clear(*self.scene.background_color)
+            for tile, camera in enumerate(batch):
+                # Tiles are filled row by row, starting at the bottom left
+                self.ctx.viewport = ((tile % columns) * width, (tile // columns) * height, width, height)
+                self._write_frame_data(self._view_projection(camera))
+                self._draw_instance_groups(groups)
+            self._atlas_fbo.read_into(atlas, components=components, alignment=1)
+            # Split the atlas into tiles and flip every tile vertically
+            tiled = atlas.reshape(rows, height, columns, width, components)[:, ::-1].swapaxes(1, 2)
+            images[first:first + len(batch)] = tiled.reshape(tiles, height, width, components)[:len(batch)]
+        self.fbo.use()
+        return images
+
+    def current_image_async(self):
+        """ Start to copy the current frame to a pixel buffer and return the oldest frame whose copy was started
+        readback_buffers frames ago.
+
+        The copy runs on the GPU while the CPU continues to render the next frames. Reading the data of an older
+        frame does not stall, because its copy is already finished. Call this method after every render and use
+        flush_async_images after the last frame:
+            ::
+
+                for frame in range(frames):
+                    update_scene(frame)
+                    renderer.render()
+                    image = renderer.current_image_async()
+                    if image is not None:
+                        write(image)
+                for image in renderer.flush_async_images():
+                    write(image)
+
+        Returns:
+            bytes: Image in the same format as returned by current_image, or None while the pixel buffers are
+            filled for the first frames.
+        """
+        if not self._readback_buffers:
+            width, height = self.fbo.size
+            self._readback_buffers = [self.ctx.buffer(reserve=width * height * 3)
+                                      for _ in range(self._readback_buffer_count)]
+        image = None
+        if len(self._pending_readbacks) == len(self._readback_buffers):
+            image = self._readback_buffers[self._pending_readbacks[0]].read()
+            self._pending_readbacks.popleft()
+        index = (self._pending_readbacks[-1] + 1) % len(self._readback_buffers) if self._pending_readbacks else 0
+        self.fbo.read_into(self._readback_buffers[index], components=3, alignment=1)
+        self._pending_readbacks.append(index)
+        return image
+
+    def flush_async_images(self) -> list:
+        """ Wait for all pending copies of current_image_async.
+
+        Returns:
+            list: Images of all frames which were not returned yet, the oldest frame first.
+        """
+        images = [self._readback_buffers[index].read() for index in self._pending_readbacks]
+        self._pending_readbacks.clear()
+        return images
@@ -4,9 +4,15 @@
 All children added to this node can be rendered via a renderer.
 
 """
+import numpy as np
+from pyrr import Vector3
+
+from pysg.bvh import BoundingVolumeHierarchy
 from pysg.constants import color
-from pysg.light import PointLight
+from pysg.light import Light, PointLight
 from pysg.node_3d import Node3D
+from pysg.raycast import RaycastHit, raycast
+from pysg.transform_store import TransformStore
 
 
 class RenderLists:
@@ -14,26 +20,40 @@ class RenderLists:
     def __init__(self):
         """ Data object containing lights and geometry list for rendering. """
         self.geometry = list()
+        self.lights = list()
+        """ list: All lights of the scene. """
         self.point_lights = list()
+        """ list: The point lights of the scene, which are also part of the lights list. """
 
 
 class Scene(Node3D):
 
     def __init__(self, background_color: tuple = color.rgb["black"],
-                 ambient_light: tuple = (0., 0., 0.), auto_update: bool = True):
+                 ambient_light: tuple = (0., 0., 0.), auto_update: bool = True, store: TransformStore = None):
         """ The scene object. Must always bee the root node of the scene graph.
 
         Args:
             background_color: The clear color of the scene.
             ambient_light: Light value which will be applied to all objects in scene.
             auto_update: If true the object transform will be updated automatically.
-            Otherwise you have to do it manually.
+            Otherwise you have to do it manually. Renderers draw the world matrices of the last call to
+            update_world_matrix in both cases.
+            store: Store for the transforms of all nodes in the scene. Uses the default store if None.
         """
-        super().__init__()
+        super().__init__(store=store)
         self.auto_update = auto_update
         self.background_color = background_color
         self.ambient_light = ambient_light
         self._render_lists = RenderLists()
+        # Cached hierarchy levels for the world matrix update and the topology version they are based on
+        self._levels = None
+        self._levels_version = None
+        # Clock of the transform store after the last update of all world matrices
+        self._updated_clock = None
+        self._bvh = None
+        # Transform indices of the render list geometry and the topology version they are based on
+        self._geometry_indices = None
+        self._geometry_indices_version = None
 
     @property
     def render_list(self) -> RenderLists:
@@ -44,6 +64,69 @@ class Scene(Node3D):
         """
         return self._render_lists
 
+    @property
+    def bvh(self) -> BoundingVolumeHierarchy:
+        """ Bounding volume hierarchy over all 3D objects of the scene. It is created on first use and kept up to
+        date with the scene.
+
+        Returns:
+            BoundingVolumeHierarchy: Spatial index of the render list geometry.
+        """
+        if self._bvh is None:
+            self._bvh = BoundingVolumeHierarchy(self)
+        return self._bvh
+
+    def object_bounds(self) -> tuple:
+        """ World space bounding boxes of all objects in the render list. Only the boxes of objects which were
+        transformed or resized since the last call are recomputed.
+
+        Like the renderers, the world matrices of the last call to update_world_matrix are used.
+
+        Returns:
+            tuple: Centers and half extents of the boxes as Nx3 arrays in the order of the render list.
+        """
+        store = self.transform_store
+        if self._geometry_indices is None or self._geometry_indices_version != store.topology_version:
+            geometry = self.render_list.geometry
+            self._geometry_indices = np.fromiter((object_3d.transform_index for object_3d in geometry),
+                                                 dtype=np.intp, count=len(geometry))
+            self._geometry_indices_version = store.topology_version
+        return store.update_world_bounds(self._geometry_indices)
+
+    def raycast(self, origin: Vector3, direction: Vector3, max_distance: float = np.inf):
+        """ Find the first object along a ray. The exact triangles of the objects are tested.
+
+        Like the renderers, the world matrices of the last call to update_world_matrix are used.
+
+        Args:
+            origin (Vector3): Start point of the ray in world space.
+            direction (Vector3): Direction of the ray in world space.
+            max_distance (float): Objects farther away than this distance are ignored.
+
+        Returns:
+            RaycastHit: Hit object, distance, and point of the closest hit. None if no object was hit.
+        """
+        objects, distances = raycast(self.bvh, origin, direction, max_distance)
+        if objects[0] is None:
+            return None
+        direction = np.asarray(direction, dtype=float)
+        point = np.asarray(origin, dtype=float) + direction / np.linalg.norm(direction) * distances[0]
+        return RaycastHit(objects[0], distances[0], Vector3(point))
+
+    def raycast_batch(self, origins: np.ndarray, directions: np.ndarray, max_distance=np.inf) -> tuple:
+        """ Find the first object along many rays at once, for example to simulate a lidar sensor.
+
+        Args:
+            origins (np.ndarray): Start points of the rays as Nx3 array.
+            directions (np.ndarray): Directions of the rays as Nx3 array.
+            max_distance: Maximum distance for all rays or array of length N with one distance per ray.
+
+        Returns:
+            tuple: List with the hit object or None for every ray, and an array with the distances to the hits.
+            The distance is infinity for rays which hit nothing.
+        """
+        return raycast(self.bvh, origins, directions, max_distance)
+
     def add(self, node_3d: 'Node3D') -> None:
         """ Overrides base class of Node3D to add an objects to render or light list.
 
@@ -52,12 +135,10 @@ class Scene(Node3D):
         """
 
         for n in (node_3d.get_leaf_nodes()):
-            object_3d_type = type(n)
-            if issubclass(object_3d_type, PointLight):
-                if len(self.render_list.point_lights) < 1:
+            if isinstance(n, Light):
+                self.render_list.lights.append(n)
+                if isinstance(n, PointLight):
                     self.render_list.point_lights.append(n)
-                else:
-                    print('Warning! Not more than one point light in a scene is possible right now.')
             else:
                 self.render_list.geometry.append(n)
 
@@ -71,8 +152,10 @@ class Scene(Node3D):
         """
 
         for n in (node_3d.get_leaf_nodes()):
-            if issubclass(type(n), PointLight):
-                self.render_list.point_lights.remove(n)
+            if isinstance(n, Light):
+                self.render_list.lights.remove(n)
+                if isinstance(n, PointLight):
+                    self.render_list.point_lights.remove(n)
             else:
                 self.render_list.geometry.remove(n)
 
@@ -81,6 +164,46 @@ class Scene(Node3D):
     def clear(self) -> None:
         """ Clears render lists and scene graph. """
 
+        self.render_list.lights = list()
         self.render_list.point_lights = list()
         self.render_list.geometry = list()
         self.children = list()
+        self.transform_store.topology_version += 1
+
+    def _hierarchy_levels(self) -> tuple:
+        """ Flatten the scene graph into levels of equal depth.
+
+        Returns:
+            tuple: Array with the slot indices of all nodes and a list with a tuple of index arrays
+            (nodes, parents of nodes) for every depth below the scene node.
+        """
+        if self._levels is None or self._levels_version != self.transform_store.topology_version:
+            all_indices = [self.transform_index]
+            levels = []
+            current_level = [self]
+            while current_level:
+                next_level = [child for node in current_level for child in node.children]
+                if next_level:
+                    indices = np.array([node.transform_index for node in next_level], dtype=np.intp)
+                    parent_indices = np.array([node.parent.transform_index for node in next_level], dtype=np.intp)
+                    levels.append((indices, parent_indices))
+                    all_indices.extend(indices)
+                current_level = next_level
+            self._levels = (np.array(all_indices, dtype=np.intp), levels)
+            self._levels_version = self.transform_store.topology_version
+        return self._levels
+
+    def update_world_matrix(self) -> None:
+        """ Overrides base class of Node3D to update the world matrices of all nodes in the scene.
+
+        Instead of visiting every node recursively, the scene graph is split into levels of equal depth. The world
+        matrices of all nodes of one level are computed with one batched matrix multiplication. Only nodes which were
+        transformed since the last update, and their descendants, are recomputed.
+        """
+        store = self.transform_store
+        if self._updated_clock == store.clock and self._levels_version == store.topology_version:
+            return
+        all_indices, levels = self._hierarchy_levels()
+        store.update_local_matrices(all_indices)
+        store.update_world_matrices(self.transform_index, levels)
+        self._updated_clock = store.clock
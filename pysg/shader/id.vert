@@ -0,0 +1,38 @@
+#version 330
+
+layout(std140) uniform FrameData {
+    mat4 ViewProjectionMatrix;
+    vec4 AmbientLight;
+    // Number of lights without radius, number of lights with radius, the light tile size in pixel, and the number
+    // of lights with shadows
+    ivec4 LightInfo;
+    // Origin and size of the viewport in pixel
+    ivec4 Viewport;
+};
+
+// World matrices, colors, and sizes of all objects. Every row holds 128 objects with 8 texels each: the four
+// columns of the model matrix, the color, the size, and two unused texels.
+uniform sampler2D ObjectData;
+
+vec4 objectTexel(int index, int texel) {
+    return texelFetch(ObjectData, ivec2((index % 128) * 8 + texel, index / 128), 0);
+}
+
+mat4 objectModelMatrix(int index) {
+    return mat4(objectTexel(index, 0), objectTexel(index, 1), objectTexel(index, 2), objectTexel(index, 3));
+}
+
+uniform int FirstId;
+
+in vec3 in_vert;
+
+// Per instance attribute: slot of the object in the object data texture
+in int in_index;
+
+flat out uint v_id;
+
+void main() {
+    gl_Position = ViewProjectionMatrix * objectModelMatrix(in_index) * vec4(in_vert * objectTexel(in_index, 5).xyz, 1.0);
+    // Zero is reserved for the background
+    v_id = uint(FirstId + gl_InstanceID + 1);
+}
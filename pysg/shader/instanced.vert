@@ -0,0 +1,42 @@
+#version 330
+
+layout(std140) uniform FrameData {
+    mat4 ViewProjectionMatrix;
+    vec4 AmbientLight;
+    // Number of lights without radius, number of lights with radius, the light tile size in pixel, and the number
+    // of lights with shadows
+    ivec4 LightInfo;
+    // Origin and size of the viewport in pixel
+    ivec4 Viewport;
+};
+
+// World matrices, colors, and sizes of all objects. Every row holds 128 objects with 8 texels each: the four
+// columns of the model matrix, the color, the size, and two unused texels.
+uniform sampler2D ObjectData;
+
+vec4 objectTexel(int index, int texel) {
+    return texelFetch(ObjectData, ivec2((index % 128) * 8 + texel, index / 128), 0);
+}
+
+mat4 objectModelMatrix(int index) {
+    return mat4(objectTexel(index, 0), objectTexel(index, 1), objectTexel(index, 2), objectTexel(index, 3));
+}
+
+in vec3 in_vert;
+in vec3 in_norm;
+
+// Per instance attribute: slot of the object in the object data texture
+in int in_index;
+
+out vec3 v_position;
+out vec3 v_normal;
+flat out vec3 v_color;
+
+void main() {
+    mat4 model = objectModelMatrix(in_index);
+    vec4 position = model * vec4(in_vert * objectTexel(in_index, 5).xyz, 1.0);
+    gl_Position = ViewProjectionMatrix * position;
+    v_position = position.xyz;
+    v_normal = transpose(inverse(mat3(model))) * in_norm;
+    v_color = objectTexel(in_index, 4).rgb;
+}
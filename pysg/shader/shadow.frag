@@ -0,0 +1,5 @@
+#version 330
+
+// Only the depth is written into the shadow map
+void main() {
+}
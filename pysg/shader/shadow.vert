@@ -0,0 +1,25 @@
+#version 330
+
+// View projection matrix of the shadow map which is drawn
+uniform mat4 ShadowViewProjection;
+
+// World matrices, colors, and sizes of all objects. Every row holds 128 objects with 8 texels each: the four
+// columns of the model matrix, the color, the size, and two unused texels.
+uniform sampler2D ObjectData;
+
+vec4 objectTexel(int index, int texel) {
+    return texelFetch(ObjectData, ivec2((index % 128) * 8 + texel, index / 128), 0);
+}
+
+mat4 objectModelMatrix(int index) {
+    return mat4(objectTexel(index, 0), objectTexel(index, 1), objectTexel(index, 2), objectTexel(index, 3));
+}
+
+in vec3 in_vert;
+
+// Per instance attribute: slot of the object in the object data texture
+in int in_index;
+
+void main() {
+    gl_Position = ShadowViewProjection * objectModelMatrix(in_index) * vec4(in_vert * objectTexel(in_index, 5).xyz, 1.0);
+}
@@ -1,27 +1,123 @@
 #version 330
 
-uniform vec3 ObjectColor;
-uniform vec3 AmbientLight;
-uniform vec3 PointLightPosition;
-uniform vec3 PointLightColor;
-uniform mat4 ModelMatrix;
+layout(std140) uniform FrameData {
+    mat4 ViewProjectionMatrix;
+    vec4 AmbientLight;
+    // Number of lights without radius, number of lights with radius, the light tile size in pixel, and the number
+    // of lights with shadows
+    ivec4 LightInfo;
+    // Origin and size of the viewport in pixel
+    ivec4 Viewport;
+};
 
-in vec3 v_vert;
-in vec3 v_norm;
+// Lights with 4 texels each, 64 lights per row: the position and the type, the direction and the cosine of the cone
+// angle, the color and the radius, and the first shadow map and the number of shadow maps. Lights with shadows come
+// first, followed by the other lights without radius.
+uniform sampler2D LightData;
+// Offset and number of the lights of every tile of the screen in the light indices
+uniform isampler2D LightGrid;
+// Indices of the lights with radius of all tiles, 1024 per row
+uniform isampler2D LightIndices;
 
-out vec4 f_color;
+// View projection matrices of the shadow maps
+layout(std140) uniform ShadowData {
+    mat4 ShadowMatrices[32];
+};
+// Depth of all shadow maps. Every shadow map is a square tile, 4 tiles per row.
+uniform sampler2DShadow ShadowMaps;
 
-void main() {
-    mat3 normalMatrix = transpose(inverse(mat3(ModelMatrix)));
-    vec3 normal = normalize(normalMatrix * v_norm);
-    vec3 fragPosition = vec3(ModelMatrix * vec4(v_vert, 1));
+#define POINT_LIGHT 0
+#define DIRECTIONAL_LIGHT 1
+#define SPOT_LIGHT 2
+
+vec4 lightTexel(int light, int texel) {
+    return texelFetch(LightData, ivec2((light % 64) * 4 + texel, light / 64), 0);
+}
+
+// Fraction of the light which reaches a position, 0 if it is completely in shadow
+float shadow(int light, vec3 position) {
+    vec4 shadowTexel = lightTexel(light, 3);
+    int map = int(shadowTexel.x);
+    if (int(shadowTexel.y) == 6) {
+        // Side of the cube around a point light which contains the position
+        vec3 direction = position - lightTexel(light, 0).xyz;
+        vec3 axes = abs(direction);
+        if (axes.x >= axes.y && axes.x >= axes.z) {
+            map += direction.x > 0.0 ? 0 : 1;
+        } else if (axes.y >= axes.z) {
+            map += direction.y > 0.0 ? 2 : 3;
+        } else {
+            map += direction.z > 0.0 ? 4 : 5;
+        }
+    }
+    vec4 clip = ShadowMatrices[map] * vec4(position, 1.0);
+    vec3 coords = clip.xyz / clip.w * 0.5 + 0.5;
+    if (any(lessThan(coords, vec3(0.0))) || any(greaterThan(coords, vec3(1.0)))) {
+        return 1.0;
+    }
+    vec2 mapSize = vec2(textureSize(ShadowMaps, 0));
+    float tileSize = mapSize.x / 4.0;
+    // Keep the filter within the tile of the shadow map
+    vec2 texel = clamp(coords.xy * tileSize, 0.5, tileSize - 0.5) + vec2(map % 4, map / 4) * tileSize;
+    return textureLod(ShadowMaps, vec3(texel / mapSize, coords.z), 0.0);
+}
+
+vec3 shade(int light, vec3 position, vec3 normal) {
+    vec4 positionType = lightTexel(light, 0);
+    vec4 directionCone = lightTexel(light, 1);
+    vec4 colorRadius = lightTexel(light, 2);
+    int type = int(positionType.w);
 
-    vec3 surfaceToLight = PointLightPosition - fragPosition;
-    //float diff = max(dot(normal, surfaceToLight), 0.);
-    float brightness = dot(normal, surfaceToLight) / (length(surfaceToLight) * length(normal));
+    vec3 surfaceToLight = -directionCone.xyz;
+    float attenuation = 1.0;
+    if (type != DIRECTIONAL_LIGHT) {
+        surfaceToLight = positionType.xyz - position;
+        if (colorRadius.w > 0.0) {
+            // Smooth falloff which reaches zero at the radius
+            float falloff = length(surfaceToLight) / colorRadius.w;
+            attenuation = clamp(1.0 - falloff * falloff * falloff * falloff, 0.0, 1.0);
+            attenuation *= attenuation;
+        }
+        if (type == SPOT_LIGHT) {
+            float cosAngle = dot(normalize(-surfaceToLight), directionCone.xyz);
+            attenuation *= smoothstep(directionCone.w, mix(directionCone.w, 1.0, 0.1), cosAngle);
+        }
+    }
+    float brightness = dot(normal, normalize(surfaceToLight));
     float diff = clamp(brightness, 0, 1);
+    return diff * attenuation * colorRadius.rgb;
+}
+
+in vec3 v_position;
+in vec3 v_normal;
+flat in vec3 v_color;
+
+layout(location = 0) out vec4 f_color;
+// Only stored if the framebuffer has a second color attachment
+layout(location = 1) out vec3 f_normal;
+
+void main() {
+    vec3 normal = normalize(v_normal);
 
-    vec3 diffuse = diff * PointLightColor;
+    vec3 diffuse = vec3(0.0);
+    for (int light = 0; light < LightInfo.w; light++) {
+        vec3 lightDiffuse = shade(light, v_position, normal);
+        if (any(greaterThan(lightDiffuse, vec3(0.0)))) {
+            diffuse += lightDiffuse * shadow(light, v_position);
+        }
+    }
+    for (int light = LightInfo.w; light < LightInfo.x; light++) {
+        diffuse += shade(light, v_position, normal);
+    }
+    if (LightInfo.y > 0) {
+        ivec2 tile = min((ivec2(gl_FragCoord.xy) - Viewport.xy) / LightInfo.z, textureSize(LightGrid, 0) - 1);
+        ivec2 offsetCount = texelFetch(LightGrid, tile, 0).xy;
+        for (int i = offsetCount.x; i < offsetCount.x + offsetCount.y; i++) {
+            int light = texelFetch(LightIndices, ivec2(i % 1024, i / 1024), 0).x;
+            diffuse += shade(light, v_position, normal);
+        }
+    }
 
-    f_color = vec4(ObjectColor * (AmbientLight + diffuse),1);
-}
\ No newline at end of file
+    f_color = vec4(v_color * (AmbientLight.rgb + diffuse),1);
+    f_normal = normal;
+}
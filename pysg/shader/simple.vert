@@ -1,17 +1,53 @@
 #version 330
 
-uniform mat4 ModelMatrix;
-uniform mat4 ViewProjectionMatrix;
-uniform vec3 ModelSize;
+// Number of object slots per upload, must match _OBJECT_BATCH_SIZE in renderer.py
+#define OBJECT_BATCH_SIZE 4096
+
+layout(std140) uniform FrameData {
+    mat4 ViewProjectionMatrix;
+    vec4 AmbientLight;
+    // Number of lights without radius, number of lights with radius, the light tile size in pixel, and the number
+    // of lights with shadows
+    ivec4 LightInfo;
+    // Origin and size of the viewport in pixel
+    ivec4 Viewport;
+};
+
+// Slots of the objects of a batch in the object data texture, four per array element
+layout(std140) uniform ObjectIndices {
+    ivec4 Indices[OBJECT_BATCH_SIZE / 4];
+};
+
+// World matrices, colors, and sizes of all objects. Every row holds 128 objects with 8 texels each: the four
+// columns of the model matrix, the color, the size, and two unused texels.
+uniform sampler2D ObjectData;
+
+vec4 objectTexel(int index, int texel) {
+    return texelFetch(ObjectData, ivec2((index % 128) * 8 + texel, index / 128), 0);
+}
+
+mat4 objectModelMatrix(int index) {
+    return mat4(objectTexel(index, 0), objectTexel(index, 1), objectTexel(index, 2), objectTexel(index, 3));
+}
+
+// Consecutive objects with the same geometry are drawn as instances of one draw call
+uniform int FirstObject;
 
 in vec3 in_vert;
 in vec3 in_norm;
 
-out vec3 v_vert;
-out vec3 v_norm;
+out vec3 v_position;
+out vec3 v_normal;
+flat out vec3 v_color;
 
 void main() {
-    gl_Position = ViewProjectionMatrix * ModelMatrix * vec4(in_vert * ModelSize, 1.0);
-    v_norm = in_norm;
-    v_vert = in_vert;
-}
\ No newline at end of file
+    int batchIndex = FirstObject + gl_InstanceID;
+    int index = Indices[batchIndex / 4][batchIndex % 4];
+    mat4 model = objectModelMatrix(index);
+    vec4 position = model * vec4(in_vert * objectTexel(index, 5).xyz, 1.0);
+    gl_Position = ViewProjectionMatrix * position;
+    // World space values are interpolated, so the fragment shader does not need the model matrix
+    v_position = position.xyz;
+    v_normal = transpose(inverse(mat3(model))) * in_norm;
+    v_color = objectTexel(index, 4).rgb;
+}
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+""" Contiguous storage for the transforms of all Node3D elements.
+
+Instead of keeping several small pyrr objects per node, all positions, rotations, scales and matrices of
+the nodes are stored in a structure of arrays. Every Node3D only holds an index into a TransformStore.
+This allows to work on the transforms of all nodes at once, for example to update the world matrices or to
+upload them to the GPU, without iterating over python objects.
+
+The store needs about 470 bytes per node, including the bounding boxes of the objects. Every node is still a Python
+object with a name and a list of children, which adds about 350 bytes. A node needs about 800 bytes in total, instead
+of about 2.5 KB with its own pyrr objects.
+
+Per default all nodes share one store. A separate store can be passed to a node or to a scene:
+    ::
+
+        store = TransformStore(capacity=100000)
+        scene = Scene(store=store)
+
+Nodes which are added to a node of another store are moved to the store of their new parent. This way
+a whole scene graph always lives in one store.
+"""
+import numpy as np
+
+from pysg.pyrr_extensions import compose_matrices
+
+
+class TransformStore:
+    _default = None
+
+    def __init__(self, capacity: int = 64):
+        """ Structure of arrays holding the transforms of many nodes.
+
+        Args:
+            capacity (int): Number of nodes for which memory is reserved up front. The store grows automatically
+                if more nodes are allocated.
+        """
+        self.local_positions = np.zeros((0, 3))
+        """ np.ndarray: Local positions of all nodes (Nx3). """
+        self.local_quaternions = np.zeros((0, 4))
+        """ np.ndarray: Local rotations of all nodes as quaternions (Nx4). """
+        self.scales = np.zeros((0, 3))
+        """ np.ndarray: Local scales of all nodes (Nx3). """
+        self.local_matrices = np.zeros((0, 4, 4))
+        """ np.ndarray: Local matrices of all nodes (Nx4x4). """
+        self.world_matrices = np.zeros((0, 4, 4))
+        """ np.ndarray: World matrices of all nodes (Nx4x4). """
+        self.local_matrix_dirty = np.zeros(0, dtype=bool)
+        """ np.ndarray: True for all nodes which need to recompute their local matrix (N). """
+        self.changed_stamps = np.zeros(0, dtype=np.int64)
+        """ np.ndarray: Value of :attr:`clock` when the local transform of a node was changed the last time (N). """
+        self.world_stamps = np.zeros(0, dtype=np.int64)
+        """ np.ndarray: Value of :attr:`clock` when the world matrix of a node was computed the last time (N).
+        A world matrix is up to date if its stamp is not older than the changed stamp of the node and not older than
+        the world stamp of its parent, and if the parent is up to date as well. """
+        self.local_bounds = np.zeros((0, 2, 3))
+        """ np.ndarray: Minimum and maximum corner of the bounding box of an Object3D in local space (Nx2x3). Zero for
+        other nodes. """
+        self.bounds_centers = np.zeros((0, 3))
+        """ np.ndarray: Centers of the world space bounding boxes as of the last call to :meth:`update_world_bounds`
+        (Nx3). """
+        self.bounds_extents = np.zeros((0, 3))
+        """ np.ndarray: Half extents of the world space bounding boxes as of the last call to
+        :meth:`update_world_bounds` (Nx3). """
+        self.object_stamps = np.zeros(0, dtype=np.int64)
+        """ np.ndarray: Value of :attr:`clock` when the color or size of an Object3D was changed the last time, or
+        when the slot was allocated (N). """
+
+        self.clock = 0
+        """ int: Incremented on every change of a local transform, color, or size in this store. """
+        self.topology_version = 0
+        """ int: Incremented whenever nodes of this store are added to or removed from a parent. Can be used to
+        invalidate data which depends on the structure of the scene graph. """
+        self.bounds_version = 0
+        """ int: Incremented whenever :meth:`update_world_bounds` recomputed a bounding box. """
+        # World and object stamps of the nodes when their world space bounding box was computed
+        self._bounds_world_stamps = np.zeros(0, dtype=np.int64)
+        self._bounds_object_stamps = np.zeros(0, dtype=np.int64)
+
+        self._free = []
+        self._used = 0
+        self._reserve(max(capacity, 1))
+
+    @classmethod
+    def default(cls) -> 'TransformStore':
+        """ The store which is used for all nodes which were not explicitly created with another store.
+
+        Returns:
+            TransformStore: The default store.
+        """
+        if cls._default is None:
+            cls._default = TransformStore()
+        return cls._default
+
+    @property
+    def capacity(self) -> int:
+        """ Number of nodes which fit into the store without growing it.
+
+        Returns:
+            int: Current capacity.
+        """
+        return len(self.local_matrix_dirty)
+
+    def __len__(self):
+        return self._used - len(self._free)
+
+    def _reserve(self, capacity: int) -> None:
+        """ Grow all arrays to hold at least the given number of nodes. """
+        old_capacity = self.capacity
+        if capacity <= old_capacity:
+            return
+        for attribute in ('local_positions', 'local_quaternions', 'scales', 'local_matrices', 'world_matrices',
+                          'local_matrix_dirty', 'changed_stamps', 'world_stamps', 'object_stamps', 'local_bounds',
+                          'bounds_centers', 'bounds_extents', '_bounds_world_stamps', '_bounds_object_stamps'):
+            old = getattr(self, attribute)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:old_capacity] = old
+            setattr(self, attribute, new)
+
+    def allocate(self) -> int:
+        """ Reserve a slot for a new node. The slot is initialized with the identity transform.
+
+        Returns:
+            int: Index of the slot.
+        """
+        if self._free:
+            index = self._free.pop()
+        else:
+            if self._used == self.capacity:
+                self._reserve(self.capacity * 2)
+            index = self._used
+            self._used += 1
+        self.local_positions[index] = 0.
+        self.local_quaternions[index] = (0., 0., 0., 1.)
+        self.scales[index] = 1.
+        self.local_matrices[index] = np.identity(4)
+        self.world_matrices[index] = np.identity(4)
+        self.local_matrix_dirty[index] = True
+        self.local_bounds[index] = 0.
+        self.world_stamps[index] = 0
+        self.mark_changed(index)
+        self.object_stamps[index] = self.clock
+        return index
+
+    def mark_changed(self, index: int) -> None:
+        """ Record that the local transform of a node changed. Its world matrix and the world matrices of all its
+        descendants are outdated afterwards. Only the node itself is touched.
+
+        Args:
+            index (int): Slot of the node.
+        """
+        self.clock += 1
+        self.changed_stamps[index] = self.clock
+        self.local_matrix_dirty[index] = True
+
+    def mark_object_changed(self, index: int) -> None:
+        """ Record that the color or size of an Object3D changed. The transform of the node stays valid.
+
+        Args:
+            index (int): Slot of the node.
+        """
+        self.clock += 1
+        self.object_stamps[index] = self.clock
+
+    def release(self, index: int) -> None:
+        """ Mark a slot as unused. It will be reused by the next allocation.
+
+        Args:
+            index (int): Index of the slot which was returned by allocate.
+        """
+        self._free.append(index)
+
+    def copy_slot(self, index: int, target: 'TransformStore', target_index: int) -> None:
+        """ Copy the transform of one slot to a slot of another store.
+
+        The world matrix of the copied node is outdated in the target store.
+
+        Args:
+            index (int): Source slot in this store.
+            target (TransformStore): Target store.
+            target_index (int): Slot in target store.
+        """
+        target.local_positions[target_index] = self.local_positions[index]
+        target.local_quaternions[target_index] = self.local_quaternions[index]
+        target.scales[target_index] = self.scales[index]
+        target.local_matrices[target_index] = self.local_matrices[index]
+        target.world_matrices[target_index] = self.world_matrices[index]
+        target.local_bounds[target_index] = self.local_bounds[index]
+        target.mark_changed(target_index)
+
+    def update_local_matrices(self, indices: np.ndarray) -> None:
+        """ Recompute the local matrices of all given nodes which changed since their last update.
+
+        Args:
+            indices (np.ndarray): Slot indices of the nodes.
+        """
+        dirty_indices = indices[self.local_matrix_dirty[indices]]
+        if len(dirty_indices) > 0:
+            self.local_matrices[dirty_indices] = compose_matrices(self.local_positions[dirty_indices],
+                                                                  self.local_quaternions[dirty_indices],
+                                                                  self.scales[dirty_indices])
+            self.local_matrix_dirty[dirty_indices] = False
+
+    def update_world_matrices(self, root_index: int, levels: list) -> None:
+        """ Compute the world matrices of a hierarchy level by level.
+
+        Only nodes with an outdated world matrix are recomputed. All nodes of one level are computed with one batched
+        matrix multiplication. The local matrices must be up to date.
+
+        Args:
+            root_index (int): Slot of the root node. Its world matrix equals its local matrix.
+            levels (list): Tuples of two index arrays (nodes, parents of nodes) for every depth of the hierarchy,
+                ordered from top to bottom.
+        """
+        if self.world_stamps[root_index] < self.changed_stamps[root_index]:
+            self.world_matrices[root_index] = self.local_matrices[root_index]
+            self.world_stamps[root_index] = self.clock
+        for indices, parent_indices in levels:
+            # Parents are already up to date. A node is outdated if it changed or its parent was computed after it.
+            world_stamps = self.world_stamps[indices]
+            outdated = world_stamps < self.changed_stamps[indices]
+            outdated |= world_stamps < self.world_stamps[parent_indices]
+            if not outdated.any():
+                continue
+            indices = indices[outdated]
+            # Same as parent.world_matrix * local_matrix with pyrr matrices
+            self.world_matrices[indices] = np.matmul(self.local_matrices[indices],
+                                                     self.world_matrices[parent_indices[outdated]])
+            self.world_stamps[indices] = self.clock
+
+    def update_world_bounds(self, indices: np.ndarray) -> tuple:
+        """ Axis aligned bounding boxes of nodes in world space.
+
+        The local bounds are transformed with the world matrices. Only the boxes of nodes whose world matrix or
+        object data changed since they were computed the last time are recomputed, so a static scene costs no more
+        than a few array comparisons. The result encloses the transformed box, so it is conservative for rotated
+        objects.
+
+        Args:
+            indices (np.ndarray): Slot indices of the nodes.
+
+        Returns:
+            tuple: Centers and half extents of the boxes as Nx3 arrays.
+        """
+        # World stamps only grow, but a world matrix can be recomputed without advancing the clock. Comparing for
+        # equality catches every recomputation.
+        outdated = self.world_stamps[indices] != self._bounds_world_stamps[indices]
+        outdated |= self.object_stamps[indices] != self._bounds_object_stamps[indices]
+        if outdated.any():
+            outdated_indices = indices[outdated]
+            bounds = self.local_bounds[outdated_indices]
+            local_centers = (bounds[:, 0] + bounds[:, 1]) / 2.
+            local_extents = (bounds[:, 1] - bounds[:, 0]) / 2.
+            matrices = self.world_matrices[outdated_indices]
+            self.bounds_centers[outdated_indices] = np.einsum('ni,nij->nj', local_centers, matrices[:, :3, :3]) \
+                + matrices[:, 3, :3]
+            self.bounds_extents[outdated_indices] = np.einsum('ni,nij->nj', local_extents, np.abs(matrices[:, :3, :3]))
+            self._bounds_world_stamps[outdated_indices] = self.world_stamps[outdated_indices]
+            self._bounds_object_stamps[outdated_indices] = self.object_stamps[outdated_indices]
+            self.bounds_version += 1
+        return self.bounds_centers[indices], self.bounds_extents[indices]
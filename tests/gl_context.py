@@ -0,0 +1,25 @@
+from unittest import SkipTest
+
+import moderngl as mgl
+
+# Context shared by all tests. Standalone contexts are not made current before rendering, so all renderers of the
+# test process use the same one.
+_context = None
+_error = None
+
+
+def gl_context() -> mgl.Context:
+    """ Standalone OpenGL context for tests which render. Skips the test if no context can be created, e.g. on a
+    machine without display and without EGL.
+    """
+    global _context, _error
+    if _context is None and _error is None:
+        for backend in (dict(), dict(backend='egl')):
+            try:
+                _context = mgl.create_standalone_context(**backend)
+                break
+            except Exception as error:
+                _error = error
+    if _context is None:
+        raise SkipTest('No OpenGL context available: {}'.format(_error))
+    return _context
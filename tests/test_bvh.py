@@ -0,0 +1,98 @@
+from unittest import TestCase
+
+import numpy as np
+from pyrr import Vector3
+
+from pysg import CubeObject3D, OrthographicCamera, Scene
+from pysg.bvh import BoundingVolumeHierarchy
+from pysg.culling import frustum_planes, world_bounds, boxes_in_frustum
+
+
+class TestBoundingVolumeHierarchy(TestCase):
+    def setUp(self):
+        np.random.seed(1)
+        self.scene = Scene()
+        for i in range(200):
+            cube = CubeObject3D(*np.random.uniform(0.1, 1., 3))
+            cube.local_position = Vector3(np.random.uniform(-10., 10., 3))
+            cube.local_euler_angles = Vector3(np.random.uniform(0., 90., 3))
+            self.scene.add(cube)
+        self.scene.update_world_matrix()
+        self.bvh = BoundingVolumeHierarchy(self.scene, leaf_size=3)
+
+    def _bounds(self):
+        centers, extents = world_bounds(self.scene.render_list.geometry, self.scene.transform_store.world_matrices)
+        return centers - extents, centers + extents
+
+    def _brute_force(self, mask):
+        return [object_3d for object_3d, hit in zip(self.scene.render_list.geometry, mask) if hit]
+
+    def test_query_box(self):
+        mins, maxs = self._bounds()
+        minimum, maximum = np.array([-2., -3., -4.]), np.array([3., 2., 1.])
+        expected = self._brute_force(np.all(mins <= maximum, axis=1) & np.all(maxs >= minimum, axis=1))
+        self.assertGreater(len(expected), 0)
+        self.assertCountEqual(self.bvh.query_box(minimum, maximum), expected)
+
+    def test_query_sphere(self):
+        mins, maxs = self._bounds()
+        center = np.array([1., 2., 3.])
+        expected = self._brute_force(np.sum((np.clip(center, mins, maxs) - center) ** 2, axis=1) <= 16.)
+        self.assertGreater(len(expected), 0)
+        self.assertCountEqual(self.bvh.query_sphere(center, 4.), expected)
+
+    def test_query_frustum(self):
+        camera = OrthographicCamera(left=-3, right=3, top=3, bottom=-3, near=1, far=20)
+        camera.local_position = Vector3([0, 0, 10])
+        planes = frustum_planes(camera.projection_matrix * camera.world_matrix.inverse)
+        mins, maxs = self._bounds()
+        expected = self._brute_force(boxes_in_frustum(planes, (mins + maxs) / 2., (maxs - mins) / 2.))
+        self.assertGreater(len(expected), 0)
+        self.assertLess(len(expected), 200)
+        self.assertCountEqual(self.bvh.query_frustum(planes), expected)
+
+    def test_query_ray(self):
+        mins, maxs = self._bounds()
+        # Ray along the x-axis through the box center of the first object
+        y, z = (mins[0, 1:] + maxs[0, 1:]) / 2.
+        objects, distances = self.bvh.query_ray(Vector3([-20, y, z]), Vector3([1, 0, 0]))
+        hit = np.all(mins[:, 1:] <= (y, z), axis=1) & np.all(maxs[:, 1:] >= (y, z), axis=1)
+        self.assertGreater(hit.sum(), 0)
+        self.assertCountEqual(objects, self._brute_force(hit))
+        self.assertTrue(np.all(np.diff(distances) >= 0.))
+        np.testing.assert_almost_equal(distances, np.sort(mins[hit, 0] + 20.))
+
+    def test_query_ray_max_distance(self):
+        objects, distances = self.bvh.query_ray(Vector3([-20, 0.5, 0.5]), Vector3([1, 0, 0]), max_distance=20.)
+        self.assertTrue(np.all(distances <= 20.))
+        self.assertEqual(len(objects), len(distances))
+
+    def test_refit(self):
+        self.bvh.update()
+        moved = self.scene.render_list.geometry[0]
+        moved.local_position = Vector3([100, 100, 100])
+        self.scene.update_world_matrix()
+        self.assertEqual(self.bvh.query_sphere(Vector3([100, 100, 100]), 1.), [moved])
+
+    def test_query_before_update(self):
+        moved = self.scene.render_list.geometry[0]
+        moved.local_position = Vector3([100, 100, 100])
+        # The world matrices are not updated yet, the object is found at its old position
+        self.assertEqual(self.bvh.query_sphere(Vector3([100, 100, 100]), 1.), [])
+        self.scene.update_world_matrix()
+        self.assertEqual(self.bvh.query_sphere(Vector3([100, 100, 100]), 1.), [moved])
+
+    def test_rebuild(self):
+        self.bvh.update()
+        cube = CubeObject3D(1, 1, 1)
+        cube.local_position = Vector3([-100, 0, 0])
+        self.scene.add(cube)
+        self.scene.update_world_matrix()
+        self.assertEqual(self.bvh.query_sphere(Vector3([-100, 0, 0]), 1.), [cube])
+        self.scene.remove(cube)
+        self.assertEqual(self.bvh.query_sphere(Vector3([-100, 0, 0]), 1.), [])
+
+    def test_empty_scene(self):
+        bvh = BoundingVolumeHierarchy(Scene())
+        self.assertEqual(bvh.query_box([-1, -1, -1], [1, 1, 1]), [])
+        self.assertEqual(bvh.query_ray([0, 0, 0], [0, 0, 1])[0], [])
@@ -1,5 +1,7 @@
 from unittest import TestCase
 
+import numpy as np
+
 from pysg import PerspectiveCamera, OrthographicCamera
 from pysg.error import Error
 
@@ -38,6 +40,16 @@ class TestPerspectiveCamera(TestCase):
         with self.assertRaises(Error):
             PerspectiveCamera(fov=45, aspect=0.2, near=0, far=-1)
 
+    def test_linearize_depth(self):
+        camera = PerspectiveCamera(fov=45, aspect=1, near=0.5, far=50)
+        self.assertEqual(camera.near, 0.5)
+        self.assertEqual(camera.far, 50)
+        distances = np.array([0.5, 1., 10., 50.])
+        # Project points in front of the camera and map the normalized device z coordinate to the depth range
+        points = np.column_stack((np.zeros((4, 2)), -distances, np.ones(4))) @ np.array(camera.projection_matrix)
+        depth = (points[:, 2] / points[:, 3] + 1.) / 2.
+        np.testing.assert_almost_equal(camera.linearize_depth(depth), distances)
+
 
 class TestOrthographicCamera(TestCase):
 
@@ -66,3 +78,13 @@ class TestOrthographicCamera(TestCase):
             PerspectiveCamera(fov=45, aspect=0.2, near=-1, far=1)
         with self.assertRaises(Error):
             PerspectiveCamera(fov=45, aspect=0.2, near=0, far=-1)
+
+    def test_linearize_depth(self):
+        camera = OrthographicCamera(left=-1, right=1, top=1, bottom=-1, near=0.5, far=50)
+        self.assertEqual(camera.near, 0.5)
+        self.assertEqual(camera.far, 50)
+        distances = np.array([0.5, 1., 10., 50.])
+        # Project points in front of the camera and map the normalized device z coordinate to the depth range
+        points = np.column_stack((np.zeros((4, 2)), -distances, np.ones(4))) @ np.array(camera.projection_matrix)
+        depth = (points[:, 2] / points[:, 3] + 1.) / 2.
+        np.testing.assert_almost_equal(camera.linearize_depth(depth), distances)
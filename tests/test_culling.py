@@ -0,0 +1,132 @@
+from unittest import TestCase
+from unittest.mock import patch, PropertyMock
+
+import numpy as np
+from pyrr import Vector3
+
+from pysg import CubeObject3D, CylinderObject3D, OrthographicCamera, PerspectiveCamera, Scene
+from pysg.culling import frustum_planes, world_bounds, boxes_in_frustum, spheres_in_frustum, sphere_tile_ranges, \
+    tile_lists, projected_sizes
+from pysg.object_3d import Object3D
+
+
+class TestCulling(TestCase):
+    def setUp(self):
+        self.camera = OrthographicCamera(left=-1, right=1, top=1, bottom=-1, near=1, far=10)
+        self.camera.update_world_matrix()
+        self.planes = frustum_planes(self.camera.projection_matrix * self.camera.world_matrix.inverse)
+
+    def test_frustum_planes(self):
+        np.testing.assert_almost_equal(self.planes, np.array([[1., 0., 0., 1.],
+                                                              [-1., 0., 0., 1.],
+                                                              [0., 1., 0., 1.],
+                                                              [0., -1., 0., 1.],
+                                                              [0., 0., -1., -1.],
+                                                              [0., 0., 1., 10.]]))
+
+    def test_spheres_in_frustum(self):
+        centers = np.array([[0., 0., -5.], [0., 0., 5.], [1.5, 0., -5.], [0., 0., -10.5]])
+        visible = spheres_in_frustum(self.planes, centers, np.array([0.1, 0.1, 0.6, 0.6]))
+        np.testing.assert_equal(visible, np.array([True, False, True, True]))
+        visible = spheres_in_frustum(self.planes, centers, np.array([0.1, 0.1, 0.4, 0.4]))
+        np.testing.assert_equal(visible, np.array([True, False, False, False]))
+
+    def test_sphere_tile_ranges(self):
+        view_projection = self.camera.projection_matrix * self.camera.world_matrix.inverse
+        centers = np.array([[0., 0., -5.], [0., 0., 5.], [0.95, 0., -5.]])
+        ranges = sphere_tile_ranges(view_projection, centers, np.array([0.1, 0.1, 0.1]), 100, 100, 10)
+        np.testing.assert_equal(ranges[[0, 2]], np.array([[4, 4, 5, 5], [9, 4, 9, 5]]))
+        # Empty range for the sphere behind the camera
+        self.assertGreater(ranges[1, 0], ranges[1, 2])
+
+    def test_sphere_tile_ranges_behind_camera(self):
+        camera = PerspectiveCamera(fov=45, aspect=1, near=0.1, far=100)
+        camera.update_world_matrix()
+        view_projection = camera.projection_matrix * camera.world_matrix.inverse
+        ranges = sphere_tile_ranges(view_projection, np.array([[0., 0., 0.5]]), np.array([1.]), 100, 50, 32)
+        np.testing.assert_equal(ranges, np.array([[0, 0, 3, 1]]))
+
+    def test_projected_sizes(self):
+        view_projection = self.camera.projection_matrix * self.camera.world_matrix.inverse
+        sizes = projected_sizes(view_projection, np.array([[0., 0., -2.], [0.5, 0., -9.]]), np.array([0.1, 0.2]), 100)
+        np.testing.assert_almost_equal(sizes, np.array([10., 20.]))
+        camera = PerspectiveCamera(fov=np.pi / 2, aspect=1, near=0.1, far=100)
+        camera.update_world_matrix()
+        view_projection = camera.projection_matrix * camera.world_matrix.inverse
+        sizes = projected_sizes(view_projection, np.array([[0., 0., -10.], [0., 0., -5.], [0., 0., 5.]]),
+                                np.ones(3), 100)
+        np.testing.assert_almost_equal(sizes, np.array([10., 20., np.inf]))
+
+    def test_tile_lists(self):
+        ranges = np.array([[0, 0, 1, 0], [1, 0, 2, 1], [1, 0, 0, 0]])
+        grid, indices = tile_lists(ranges, 3, 2)
+        np.testing.assert_equal(grid[:, :, 1], np.array([[1, 2, 1], [0, 1, 1]]))
+        np.testing.assert_equal(grid[:, :, 0], np.array([[0, 1, 3], [4, 4, 5]]))
+        np.testing.assert_equal(indices, np.array([0, 0, 1, 1, 1, 1]))
+
+    def test_boxes_in_frustum(self):
+        centers = np.array([[0., 0., -5.], [2., 2., -5.], [2., 2., -5.]])
+        extents = np.array([[0.5, 0.5, 0.5], [0.5, 0.5, 0.5], [1.5, 1.5, 0.5]])
+        np.testing.assert_equal(boxes_in_frustum(self.planes, centers, extents), np.array([True, False, True]))
+
+    def test_perspective_camera_moved(self):
+        camera = PerspectiveCamera(fov=45, aspect=1, near=0.1, far=100)
+        camera.local_position = Vector3([10, 0, 0])
+        planes = frustum_planes(camera.projection_matrix * camera.world_matrix.inverse)
+        centers = np.array([[10., 0., -5.], [0., 0., -5.], [10., 0., 5.]])
+        visible = boxes_in_frustum(planes, centers, np.full((3, 3), 0.5))
+        np.testing.assert_equal(visible, np.array([True, False, False]))
+
+    def test_world_bounds(self):
+        scene = Scene()
+        cube = CubeObject3D(2, 4, 6)
+        cube.local_position = Vector3([1, 2, 3])
+        cylinder = CylinderObject3D(2, 1)
+        cylinder.local_euler_angles = Vector3([0, 0, 90])
+        scene.add(cube)
+        scene.add(cylinder)
+        scene.update_world_matrix()
+        centers, extents = world_bounds([cube, cylinder], scene.transform_store.world_matrices)
+        np.testing.assert_almost_equal(centers, np.array([[1., 2., 3.], [0., 0., 0.]]))
+        np.testing.assert_almost_equal(extents, np.array([[1., 2., 3.], [2., 2., 2.]]))
+
+    def test_object_bounds(self):
+        scene = Scene()
+        cubes = [CubeObject3D(1, 1, 1) for _ in range(3)]
+        for i, cube in enumerate(cubes):
+            cube.local_position = Vector3([i, 0, 0])
+            scene.add(cube)
+        scene.update_world_matrix()
+        centers, extents = scene.object_bounds()
+        expected_centers, expected_extents = world_bounds(cubes, scene.transform_store.world_matrices)
+        np.testing.assert_almost_equal(centers, expected_centers)
+        np.testing.assert_almost_equal(extents, expected_extents)
+        # Moved and resized objects get new boxes
+        cubes[1].local_position = Vector3([5, 0, 0])
+        cubes[2].size = (4, 2, 2)
+        scene.update_world_matrix()
+        centers, extents = scene.object_bounds()
+        np.testing.assert_almost_equal(centers[1], np.array([5., 0., 0.]))
+        np.testing.assert_almost_equal(extents[2], np.array([2., 1., 1.]))
+
+    def test_object_bounds_static(self):
+        scene = Scene()
+        for _ in range(3):
+            scene.add(CubeObject3D(1, 1, 1))
+        scene.update_world_matrix()
+        scene.object_bounds()
+        bounds_version = scene.transform_store.bounds_version
+        # A static frame does not touch the objects and computes no box
+        with patch.object(Object3D, 'local_bounds', new_callable=PropertyMock) as local_bounds, \
+                patch.object(Object3D, 'transform_index', new_callable=PropertyMock) as transform_index:
+            scene.update_world_matrix()
+            scene.object_bounds()
+        self.assertEqual(local_bounds.call_count, 0)
+        self.assertEqual(transform_index.call_count, 0)
+        self.assertEqual(scene.transform_store.bounds_version, bounds_version)
+
+    def test_local_bounds(self):
+        cylinder = CylinderObject3D(2, 1)
+        minimum, maximum = cylinder.local_bounds
+        np.testing.assert_almost_equal(np.array(minimum), np.array([-2., -2., -2.]))
+        np.testing.assert_almost_equal(np.array(maximum), np.array([2., 2., 2.]))
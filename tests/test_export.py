@@ -0,0 +1,79 @@
+import os
+import tempfile
+from unittest import TestCase, skipIf
+
+import numpy as np
+from pyrr import Vector3
+
+from pysg import CubeObject3D, HeadlessGLRenderer, OrthographicCamera, Scene
+from pysg.error import ParameterError
+from pysg.export import NpyExporter, RawVideoExporter, ImageSequenceExporter
+from tests.gl_context import gl_context
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class TestExport(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.frames = np.random.randint(0, 255, (5, 3, 4, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_npy_exporter(self):
+        path = os.path.join(self.directory.name, 'frames.npy')
+        with NpyExporter(path, frame_count=5, width=4, height=3, queue_size=2) as exporter:
+            for frame in self.frames:
+                exporter.write_array(frame)
+            with self.assertRaises(ParameterError):
+                exporter.write_array(self.frames[0])
+        np.testing.assert_array_equal(np.load(path, mmap_mode='r'), self.frames)
+
+    def test_raw_video_exporter(self):
+        path = os.path.join(self.directory.name, 'frames.rgb')
+        with RawVideoExporter(path, width=4, height=3, queue_size=2) as exporter:
+            for frame in self.frames:
+                exporter.write_array(frame)
+        np.testing.assert_array_equal(np.fromfile(path, dtype=np.uint8).reshape(self.frames.shape), self.frames)
+
+    def test_write_renderer(self):
+        scene = Scene(ambient_light=(1, 1, 1))
+        cube = CubeObject3D(2, 2, 2)
+        scene.add(cube)
+        camera = OrthographicCamera(left=-4, right=4, top=3, bottom=-3, near=1, far=10)
+        camera.local_position = Vector3([0, 0, 5])
+        renderer = HeadlessGLRenderer(scene, camera, width=4, height=3, ctx=gl_context())
+        small_renderer = HeadlessGLRenderer(scene, camera, width=2, height=2, ctx=gl_context())
+        path = os.path.join(self.directory.name, 'frames.npy')
+        expected = []
+        with NpyExporter(path, frame_count=3, width=4, height=3, queue_size=1) as exporter:
+            for frame in range(3):
+                cube.color = (frame / 2., 0, 1)
+                renderer.render()
+                expected.append(renderer.current_image_array())
+                exporter.write(renderer)
+                # The frame buffer is returned if the image does not fit
+                with self.assertRaises(ParameterError):
+                    exporter.write(small_renderer)
+        self.assertEqual(len({image.tobytes() for image in expected}), 3)
+        np.testing.assert_array_equal(np.load(path), np.array(expected))
+
+    @skipIf(Image is None, 'Pillow is not installed')
+    def test_image_sequence_exporter(self):
+        pattern = os.path.join(self.directory.name, '{:03d}.png')
+        with ImageSequenceExporter(pattern, width=4, height=3, workers=2) as exporter:
+            for frame in self.frames:
+                exporter.write_array(frame)
+        for index, frame in enumerate(self.frames):
+            np.testing.assert_array_equal(np.array(Image.open(pattern.format(index))), frame)
+
+    @skipIf(Image is None, 'Pillow is not installed')
+    def test_worker_error(self):
+        exporter = ImageSequenceExporter(os.path.join(self.directory.name, 'missing', '{}.png'), width=4, height=3)
+        exporter.write_array(self.frames[0])
+        with self.assertRaises(FileNotFoundError):
+            exporter.close()
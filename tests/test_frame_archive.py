@@ -0,0 +1,68 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from pyrr import Vector3
+
+from pysg import PerspectiveCamera
+from pysg.error import ParameterError
+from pysg.frame_archive import FrameArchiveWriter, frame_record_dtype, open_frame_archive
+
+
+class TestFrameArchive(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'frames.pysg')
+        self.camera = PerspectiveCamera(fov=45, aspect=4 / 3, near=0.1, far=100)
+        self.camera.local_position = Vector3([1, 2, 3])
+        self.colors = np.random.randint(0, 255, (3, 3, 5, 3), dtype=np.uint8)
+        self.depths = np.random.uniform(0, 100, (3, 3, 5)).astype(np.float32)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _append(self, frames, depth=True):
+        with FrameArchiveWriter(self.path, width=5, height=3, depth=depth) as writer:
+            for color, depth_image in frames:
+                writer.append_arrays(color, self.camera.world_matrix, self.camera.projection_matrix,
+                                     depth_image if depth else None)
+            return writer.frame_count
+
+    def test_record_dtype(self):
+        self.assertEqual(frame_record_dtype(5, 3).itemsize % 8, 0)
+        self.assertNotIn('depth', frame_record_dtype(5, 3).names)
+        self.assertIn('depth', frame_record_dtype(5, 3, depth=True).names)
+
+    def test_write_read(self):
+        self.assertEqual(self._append(zip(self.colors, self.depths)), 3)
+        frames = open_frame_archive(self.path)
+        self.assertEqual(len(frames), 3)
+        np.testing.assert_array_equal(frames['color'], self.colors)
+        np.testing.assert_array_equal(frames['depth'], self.depths)
+        np.testing.assert_almost_equal(frames['world_matrix'][1], np.array(self.camera.world_matrix))
+        np.testing.assert_almost_equal(frames['projection_matrix'][2], np.array(self.camera.projection_matrix))
+
+    def test_append_existing(self):
+        self._append(zip(self.colors[:2], self.depths[:2]))
+        # An incomplete record at the end is dropped
+        with open(self.path, 'ab') as file:
+            file.write(b'\x00' * 7)
+        self.assertEqual(len(open_frame_archive(self.path)), 2)
+        self.assertEqual(self._append(zip(self.colors[2:], self.depths[2:])), 3)
+        np.testing.assert_array_equal(open_frame_archive(self.path)['color'], self.colors)
+
+    def test_format_mismatch(self):
+        self._append(zip(self.colors, self.depths))
+        with self.assertRaises(ParameterError):
+            FrameArchiveWriter(self.path, width=5, height=3, depth=False)
+        with self.assertRaises(ParameterError):
+            FrameArchiveWriter(self.path, width=4, height=3, depth=True)
+        with open(self.path, 'wb') as file:
+            file.write(b'no archive')
+        with self.assertRaises(ParameterError):
+            open_frame_archive(self.path)
+
+    def test_empty_archive(self):
+        self._append([])
+        self.assertEqual(len(open_frame_archive(self.path)), 0)
@@ -0,0 +1,105 @@
+import multiprocessing
+import threading
+from unittest import TestCase
+
+import numpy as np
+from pyrr import Vector3
+
+from pysg import CubeObject3D, HeadlessGLRenderer, OrthographicCamera, Scene
+from pysg.error import FrameTimeoutError, ParameterError
+from pysg.frame_ring import FrameRingBuffer
+from tests.gl_context import gl_context
+
+
+def _consume(ring, frame_count, results):
+    sums = []
+    for frame in range(frame_count):
+        with ring.read(frame, timeout=10) as image:
+            sums.append(int(image[0, 0, 0]) + int(image[-1, 0, 0]))
+    results.put(sums)
+    ring.close()
+
+
+class TestFrameRingBuffer(TestCase):
+    def setUp(self):
+        self.ring = FrameRingBuffer(width=4, height=3, capacity=2)
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_write_read(self):
+        with self.ring.write(5) as image:
+            self.assertEqual(image.shape, (3, 4, 3))
+            image[0] = 1
+            image[-1] = 2
+        with self.ring.read(5) as image:
+            # Slots are written in OpenGL order, starting with the bottom row
+            self.assertEqual(image[0, 0, 0], 2)
+            self.assertEqual(image[-1, 0, 0], 1)
+            self.assertFalse(image.flags.writeable)
+
+    def test_backpressure(self):
+        with self.ring.write(0):
+            pass
+        # Frame 2 uses the slot of frame 0 which was not consumed yet
+        with self.assertRaises(FrameTimeoutError):
+            with self.ring.write(2, timeout=0.01):
+                pass
+        with self.ring.read(0):
+            pass
+        with self.ring.write(2, timeout=0.01):
+            pass
+
+    def test_read_waits_for_frame(self):
+        with self.assertRaises(FrameTimeoutError):
+            with self.ring.read(1, timeout=0.01):
+                pass
+
+        def write():
+            with self.ring.write(1) as slot:
+                slot.fill(7)
+
+        writer = threading.Timer(0.05, write)
+        writer.start()
+        with self.ring.read(1, timeout=10) as image:
+            self.assertTrue(np.all(image == 7))
+        writer.join()
+
+    def test_failed_write_releases_slot(self):
+        with self.assertRaises(ValueError):
+            with self.ring.write(0):
+                raise ValueError()
+        with self.assertRaises(FrameTimeoutError):
+            with self.ring.read(0, timeout=0.01):
+                pass
+        with self.ring.write(0, timeout=0.01):
+            pass
+
+    def test_consumer_process(self):
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        consumer = context.Process(target=_consume, args=(self.ring, 10, results))
+        consumer.start()
+        for frame in range(10):
+            with self.ring.write(frame, timeout=10) as image:
+                image[:] = frame
+        self.assertEqual(results.get(timeout=10), [2 * frame for frame in range(10)])
+        consumer.join()
+
+    def test_write_image(self):
+        scene = Scene(ambient_light=(1, 1, 1))
+        cube = CubeObject3D(2, 2, 2, color=(1, 0, 0))
+        scene.add(cube)
+        camera = OrthographicCamera(left=-4, right=4, top=3, bottom=-3, near=1, far=10)
+        camera.local_position = Vector3([0, 0, 5])
+        renderer = HeadlessGLRenderer(scene, camera, width=4, height=3, ctx=gl_context())
+        renderer.render()
+        self.ring.write_image(renderer, 0)
+        with self.ring.read(0) as image:
+            self.assertTrue(np.any(image[..., 0] == 255))
+            np.testing.assert_array_equal(image[::-1], renderer.current_image_array())
+        # A renderer with another image size releases the slot again
+        small_renderer = HeadlessGLRenderer(scene, camera, width=2, height=2, ctx=gl_context())
+        with self.assertRaises(ParameterError):
+            self.ring.write_image(small_renderer, 1)
+        self.ring.write_image(renderer, 1, timeout=0.01)
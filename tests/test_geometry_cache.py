@@ -0,0 +1,56 @@
+import os
+import tempfile
+from functools import partial
+from unittest import TestCase
+
+import numpy as np
+
+from pysg import geometry_cache
+from pysg.geometry import create_cube, create_cylinder
+from pysg.geometry_cache import cached_geometry, clear_geometry_cache, geometry_name, load_geometry_cache, \
+    save_geometry_cache
+
+
+class TestGeometryCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'geometry.npz')
+        clear_geometry_cache()
+
+    def tearDown(self):
+        clear_geometry_cache()
+        self.directory.cleanup()
+
+    def test_geometry_name(self):
+        self.assertEqual(geometry_name(create_cube), 'pysg.geometry.create_cube()')
+        self.assertEqual(geometry_name(partial(create_cylinder, sides=16)), 'pysg.geometry.create_cylinder(sides=16)')
+        self.assertIsNone(geometry_name(lambda: create_cube()))
+
+    def test_cached_geometry(self):
+        vertices, indices, normals = cached_geometry(create_cube)
+        np.testing.assert_equal(vertices, create_cube()[0])
+        self.assertFalse(vertices.flags.writeable)
+        # Equal partial objects share the geometry
+        self.assertIs(cached_geometry(partial(create_cylinder, sides=8))[0],
+                      cached_geometry(partial(create_cylinder, sides=8))[0])
+
+    def test_save_and_load(self):
+        expected = cached_geometry(partial(create_cylinder, sides=8))
+        cached_geometry(lambda: create_cube())
+        save_geometry_cache(self.path)
+        clear_geometry_cache()
+        # Geometries of lambdas are not saved
+        self.assertEqual(load_geometry_cache(self.path), 1)
+        for array, expected_array in zip(cached_geometry(partial(create_cylinder, sides=8)), expected):
+            np.testing.assert_equal(array, expected_array)
+
+    def test_load_other_version(self):
+        cached_geometry(create_cube)
+        save_geometry_cache(self.path)
+        clear_geometry_cache()
+        version = geometry_cache.__version__
+        geometry_cache.__version__ = '0.0.0'
+        try:
+            self.assertEqual(load_geometry_cache(self.path), 0)
+        finally:
+            geometry_cache.__version__ = version
@@ -0,0 +1,193 @@
+from unittest import TestCase
+
+import numpy as np
+from pyrr import Vector3
+
+from pysg import CubeObject3D, HeadlessGLRenderer, OrthographicCamera, PlaneObject3D, Scene
+from pysg.error import ParameterError
+from pysg.light import DirectionalLight
+from tests.gl_context import gl_context
+
+WIDTH = 80
+HEIGHT = 60
+
+
+class TestHeadlessGLRenderer(TestCase):
+    def setUp(self):
+        self.ctx = gl_context()
+        # Full ambient light, so the pixels have the exact object colors
+        self.scene = Scene(background_color=(0, 0, 0), ambient_light=(1, 1, 1))
+        # Ten pixels per unit, the camera looks along -z
+        self.camera = OrthographicCamera(left=-4, right=4, top=3, bottom=-3, near=1, far=21)
+        self.camera.local_position = Vector3([0, 0, 10])
+        self.red_cube = CubeObject3D(2, 2, 2, color=(1, 0, 0))
+        self.red_cube.local_position = Vector3([-2, 0, 0])
+        self.blue_cube = CubeObject3D(2, 2, 2, color=(0, 0, 1))
+        self.blue_cube.local_position = Vector3([2, 0, 0])
+        self.scene.add(self.red_cube)
+        self.scene.add(self.blue_cube)
+
+    def _renderer(self, **kwargs) -> HeadlessGLRenderer:
+        return HeadlessGLRenderer(self.scene, self.camera, width=WIDTH, height=HEIGHT, ctx=self.ctx, **kwargs)
+
+    def test_pick(self):
+        renderer = self._renderer()
+        self.assertIs(renderer.pick(20, 30), self.red_cube)
+        self.assertIs(renderer.pick(60, 30), self.blue_cube)
+        self.assertIsNone(renderer.pick(40, 30))
+        self.assertIsNone(renderer.pick(-1, 30))
+
+    def test_pick_moved(self):
+        renderer = self._renderer()
+        self.blue_cube.local_position = Vector3([0, 2, 0])
+        self.assertIs(renderer.pick(40, 10), self.blue_cube)
+        self.assertIsNone(renderer.pick(60, 30))
+
+    def test_pick_rect(self):
+        renderer = self._renderer(instanced=True)
+        self.assertEqual(renderer.pick_rect(0, 0, WIDTH, HEIGHT), [self.red_cube, self.blue_cube])
+        self.assertEqual(renderer.pick_rect(50, 20, 100, 100), [self.blue_cube])
+        self.assertEqual(renderer.pick_rect(35, 0, 10, HEIGHT), [])
+
+    def test_current_image_async(self):
+        renderer = self._renderer(readback_buffers=2)
+        expected, images = [], []
+        for frame in range(5):
+            self.red_cube.color = (frame / 4., 0, 0)
+            renderer.render()
+            expected.append(renderer.current_image())
+            images.append(renderer.current_image_async())
+        self.assertEqual(len(set(expected)), 5)
+        # The first frames are returned with a delay of two frames
+        self.assertEqual(images[:2], [None, None])
+        self.assertEqual(images[2:] + renderer.flush_async_images(), expected)
+        self.assertEqual(renderer.flush_async_images(), [])
+
+    def test_readback_buffers(self):
+        with self.assertRaises(ParameterError):
+            self._renderer(readback_buffers=0)
+
+    def test_current_image_into(self):
+        renderer = self._renderer()
+        renderer.render()
+        array = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+        image = renderer.current_image_into(array)
+        self.assertTrue(np.shares_memory(image, array))
+        expected = np.frombuffer(renderer.current_image(), dtype=np.uint8).reshape(HEIGHT, WIDTH, 3)[::-1]
+        np.testing.assert_array_equal(image, expected)
+        # The first row of the image is the top row
+        np.testing.assert_array_equal(image[30, 20], [255, 0, 0])
+        np.testing.assert_array_equal(image[30, 60], [0, 0, 255])
+
+    def test_current_image_array(self):
+        renderer = self._renderer()
+        renderer.render()
+        image = renderer.current_image_array(components=4, dtype=np.float32)
+        self.assertEqual(image.shape, (HEIGHT, WIDTH, 4))
+        np.testing.assert_almost_equal(image[30, 20], [1., 0., 0., 1.])
+        np.testing.assert_almost_equal(image[30, 60, :3], [0., 0., 1.])
+
+    def test_current_image_into_invalid(self):
+        renderer = self._renderer()
+        renderer.render()
+        for array in (np.zeros((WIDTH, HEIGHT, 3), dtype=np.uint8), np.zeros((HEIGHT, WIDTH, 2), dtype=np.uint8),
+                      np.zeros((HEIGHT, WIDTH, 3), dtype=np.float64),
+                      np.zeros((HEIGHT, WIDTH * 2, 3), dtype=np.uint8)[:, ::2]):
+            with self.assertRaises(ParameterError):
+                renderer.current_image_into(array)
+
+    def test_render_views(self):
+        renderer = self._renderer()
+        cameras = []
+        for x in (-2, 0, 2):
+            camera = OrthographicCamera(left=-4, right=4, top=3, bottom=-3, near=1, far=21)
+            camera.local_position = Vector3([x, 0, 10])
+            cameras.append(camera)
+        images = renderer.render_views(cameras, components=4)
+        self.assertEqual(images.shape, (3, HEIGHT, WIDTH, 4))
+        # Every tile equals the image of a separate render with the camera
+        for camera, image in zip(cameras, images):
+            renderer.camera = camera
+            renderer.render()
+            np.testing.assert_array_equal(image, renderer.current_image_array(components=4))
+        # The cubes move in the opposite direction of the camera
+        np.testing.assert_array_equal(images[0, 30, 40, :3], [255, 0, 0])
+        np.testing.assert_array_equal(images[2, 30, 40, :3], [0, 0, 255])
+
+    def test_depth_and_normals(self):
+        self.blue_cube.local_euler_angles = Vector3([0, 45, 0])
+        renderer = self._renderer(normal_output=True)
+        renderer.render()
+        depth = renderer.current_depth()
+        self.assertEqual(depth.shape, (HEIGHT, WIDTH))
+        # The front face of the red cube is at z=1, the camera at z=10, and the far plane at distance 21
+        self.assertAlmostEqual(depth[30, 20], 9., places=4)
+        self.assertAlmostEqual(depth[5, 5], 21., places=4)
+        # The edge of the rotated cube is at z=sqrt(2), the pixel center is half a pixel behind it
+        self.assertAlmostEqual(depth[30, 60], 10. - np.sqrt(2.) + 0.05, places=3)
+        # Raw depth buffer values of an orthographic camera grow linearly from the near to the far plane
+        self.assertAlmostEqual(renderer.current_depth(linear=False)[30, 20], 0.4, places=4)
+
+        normals = renderer.current_normals()
+        self.assertEqual(normals.shape, (HEIGHT, WIDTH, 3))
+        np.testing.assert_almost_equal(normals[30, 20], [0., 0., 1.], decimal=4)
+        np.testing.assert_almost_equal(normals[30, 55], [-np.sqrt(0.5), 0., np.sqrt(0.5)], decimal=4)
+        np.testing.assert_almost_equal(normals[30, 65], [np.sqrt(0.5), 0., np.sqrt(0.5)], decimal=4)
+        np.testing.assert_array_equal(normals[5, 5], [0., 0., 0.])
+
+    def test_normals_without_normal_output(self):
+        renderer = self._renderer()
+        renderer.render()
+        with self.assertRaises(ParameterError):
+            renderer.current_normals()
+
+    def test_manual_update_after_render(self):
+        self.scene.auto_update = False
+        self.scene.update_world_matrix()
+        for instanced in (False, True):
+            renderer = self._renderer(instanced=instanced)
+            self.red_cube.local_position = Vector3([-2, 0, 0])
+            self.scene.update_world_matrix()
+            renderer.render()
+            self.red_cube.local_position = Vector3([-2, 2, 0])
+            # Renderers draw the world matrices of the last update
+            renderer.render()
+            np.testing.assert_array_equal(renderer.current_image_array()[30, 20], [255, 0, 0])
+            self.scene.update_world_matrix()
+            renderer.render()
+            image = renderer.current_image_array()
+            np.testing.assert_array_equal(image[30, 20], [0, 0, 0])
+            np.testing.assert_array_equal(image[10, 20], [255, 0, 0])
+
+    def test_shadow_caster_moved(self):
+        scene = Scene(background_color=(0, 0, 0), ambient_light=(0, 0, 0), auto_update=False)
+        scene.add(PlaneObject3D(20, 20))
+        cube = CubeObject3D(2, 2, 2)
+        cube.local_position = Vector3([-2, 2, 0])
+        scene.add(cube)
+        # The light shines down at an angle, the shadow of the cube falls into the upper half of the image
+        sun = DirectionalLight(color=(1, 1, 1), shadows=True, shadow_extent=10.)
+        sun.local_euler_angles = Vector3([45, 0, 0])
+        scene.add(sun)
+        camera = OrthographicCamera(left=-4, right=4, top=3, bottom=-3, near=1, far=21)
+        camera.local_position = Vector3([0, 10, 0])
+        camera.local_euler_angles = Vector3([90, 0, 0])
+        scene.update_world_matrix()
+        renderer = HeadlessGLRenderer(scene, camera, width=WIDTH, height=HEIGHT, ctx=self.ctx)
+        renderer.render()
+        image = renderer.current_image_array()
+        self.assertEqual(image[10, 20, 0], 0)
+        self.assertGreater(image[10, 60, 0], 0)
+
+        cube.local_position = Vector3([2, 2, 0])
+        # The new color redraws the shadow map, still with the world matrix of the last update
+        cube.color = (1, 1, 1)
+        renderer.render()
+        self.assertEqual(renderer.shadow_update_count, 1)
+        self.assertEqual(renderer.current_image_array()[10, 20, 0], 0)
+        scene.update_world_matrix()
+        renderer.render()
+        self.assertEqual(renderer.shadow_update_count, 1)
+        image = renderer.current_image_array()
+        self.assertGreater(image[10, 20, 0], 0)
+        self.assertEqual(image[10, 60, 0], 0)
@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pysg import DirectionalLight, PointLight, SpotLight
+from pysg.error import Error
+
+
+def project(point, view_projection):
+    clip = np.append(point, 1.) @ view_projection
+    return clip[:3] / clip[3]
+
+
+class TestLight(TestCase):
+
+    def test_parameter_errors(self):
+        with self.assertRaises(Error):
+            PointLight((1, 1, 1), shadows=True)
+        with self.assertRaises(Error):
+            DirectionalLight((1, 1, 1), shadow_extent=0)
+
+    def test_no_shadow_maps(self):
+        self.assertEqual(SpotLight((1, 1, 1))._shadow_view_projections(np.eye(4)).shape, (0, 4, 4))
+
+    def test_point_light_shadow_maps(self):
+        light = PointLight((1, 1, 1), radius=10., shadows=True)
+        world_matrix = np.eye(4)
+        world_matrix[3, :3] = [1., 2., 3.]
+        view_projections = light._shadow_view_projections(world_matrix)
+        self.assertEqual(view_projections.shape, (6, 4, 4))
+        # Every side of the cube sees the point along its axis in the center
+        for face, direction in enumerate(([1, 0, 0], [-1, 0, 0], [0, 1, 0], [0, -1, 0], [0, 0, 1], [0, 0, -1])):
+            ndc = project(np.array([1., 2., 3.]) + 5. * np.array(direction), view_projections[face])
+            np.testing.assert_almost_equal(ndc[:2], [0., 0.])
+            self.assertTrue(-1. < ndc[2] < 1.)
+        # Points beyond the radius are outside of the view volume
+        self.assertGreater(project(np.array([1., 2., -8.]), view_projections[5])[2], 1.)
+
+    def test_directional_light_shadow_map(self):
+        light = DirectionalLight((1, 1, 1), shadows=True, shadow_extent=5.)
+        view_projections = light._shadow_view_projections(np.eye(4))
+        self.assertEqual(view_projections.shape, (1, 4, 4))
+        # The light shines along the negative z axis
+        np.testing.assert_almost_equal(project(np.array([0., 0., -5.]), view_projections[0]), [0., 0., 1.])
+        np.testing.assert_almost_equal(project(np.array([5., 5., 5.]), view_projections[0]), [1., 1., -1.])
@@ -151,6 +151,26 @@ class TestNode3D(TestCase, CustomAssertions):
         np.testing.assert_almost_equal(np.array(new_child.local_position), np.array([0., 1., 2.]))
         np.testing.assert_almost_equal(np.array(new_child.world_position), np.array([1., 2., 3.]))
 
+    def test_add_keeps_world_transform(self):
+        # The local transform is kept below a parent without transform
+        new_child = Node3D("new_child")
+        new_child.local_position = Vector3([1, 2, 3])
+        new_child.local_euler_angles = Vector3([0, 45, 0])
+        quaternion = new_child.local_quaternion
+        self.child_1.add(new_child)
+        np.testing.assert_almost_equal(np.array(new_child.local_position), np.array([1., 2., 3.]))
+        self.assertQuaternionAreEqual(new_child.local_quaternion, quaternion, epsilon=1e-9)
+        # Moving the node from a transformed parent keeps its world transform
+        self.child_2.local_position = Vector3([1, 1, 1])
+        self.child_2.local_euler_angles = Vector3([0, 90, 0])
+        moved = Node3D("moved")
+        self.child_2.add(moved)
+        world_position, world_quaternion = moved.world_position, moved.world_quaternion
+        moved.parent = self.child_1
+        np.testing.assert_almost_equal(np.array(moved.world_position), np.array(world_position))
+        np.testing.assert_almost_equal(np.array(moved.local_position), np.array(world_position))
+        self.assertQuaternionAreEqual(moved.world_quaternion, world_quaternion, epsilon=1e-9)
+
     def test_remove(self):
         new_child = Node3D("new_child")
         self.root.add(new_child)
@@ -158,3 +178,33 @@ class TestNode3D(TestCase, CustomAssertions):
         self.root.remove(new_child)
         self.assertEqual(new_child.parent, None)
         self.assertFalse(new_child in self.root.children)
+
+    def test_world_position_rotated_parent(self):
+        self.root.local_euler_angles = Vector3([0, 90, 0])
+        self.child_2.local_position = Vector3([1, 0, 0])
+        np.testing.assert_almost_equal(np.array(self.child_2.world_position),
+                                       np.array(self.child_2.world_matrix)[3, :3])
+        self.child_2.world_position = Vector3([0, 0, 2])
+        np.testing.assert_almost_equal(np.array(self.child_2.world_position), np.array([0., 0., 2.]))
+        np.testing.assert_almost_equal(np.array(self.child_2_1.world_position), np.array([0., 0., 2.]))
+
+    def test_world_quaternion_setter(self):
+        self.root.local_euler_angles = Vector3([30, 0, 0])
+        self.child_2.world_quaternion = Quaternion([0, 0, 1, 0])
+        self.assertQuaternionAreEqual(self.child_2.world_quaternion, Quaternion([0, 0, 1, 0]), epsilon=1e-9)
+
+    def test_deep_hierarchy(self):
+        node = self.root
+        for i in range(1500):
+            child = Node3D("chain_%d" % i)
+            node.add(child)
+            node = child
+        self.root.local_position = Vector3([1, 2, 3])
+        np.testing.assert_almost_equal(np.array(node.world_position), np.array([1., 2., 3.]))
+        self.root.update_world_matrix()
+        np.testing.assert_almost_equal(np.array(node.world_matrix)[3, :3], np.array([1., 2., 3.]))
+
+    def test_world_position_zero_scale_parent(self):
+        self.root.scale = Vector3([0, 0, 0])
+        self.child_2.world_position = Vector3([1, 2, 3])
+        np.testing.assert_almost_equal(np.array(self.child_2.world_position), np.array([0., 0., 0.]))
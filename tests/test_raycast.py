@@ -0,0 +1,109 @@
+from unittest import TestCase
+
+import numpy as np
+from pyrr import Vector3
+
+from pysg import CircleObject3D, CubeObject3D, IcosahedronObject3D, OrthographicCamera, PerspectiveCamera, \
+    PlaneObject3D, Scene
+from pysg.raycast import unit_triangles, ray_triangle_distances
+
+
+class TestRaycast(TestCase):
+    def setUp(self):
+        self.scene = Scene()
+        self.cube = CubeObject3D(2, 2, 2)
+        self.cube.local_position = Vector3([0, 0, -10])
+        self.sphere = IcosahedronObject3D(1)
+        self.sphere.local_position = Vector3([5, 0, -10])
+        self.plane = PlaneObject3D(4, 4)
+        self.plane.local_position = Vector3([0, -5, 0])
+        for object_3d in (self.cube, self.sphere, self.plane):
+            self.scene.add(object_3d)
+        self.scene.update_world_matrix()
+
+    def test_ray_triangle_distances(self):
+        triangles = np.array([[[[0., 0., 0.], [1., 0., 0.], [0., 1., 0.]]]])
+        origins = np.array([[0.2, 0.2, 1.]])
+        np.testing.assert_almost_equal(ray_triangle_distances(origins, np.array([[0., 0., -2.]]), triangles), [[0.5]])
+        self.assertEqual(ray_triangle_distances(origins, np.array([[0., 0., 1.]]), triangles)[0, 0], np.inf)
+        origins = np.array([[0.8, 0.8, 1.]])
+        self.assertEqual(ray_triangle_distances(origins, np.array([[0., 0., -1.]]), triangles)[0, 0], np.inf)
+
+    def test_unit_triangles(self):
+        self.assertEqual(unit_triangles(CubeObject3D).shape, (12, 3, 3))
+        # Triangle fan with 41 vertices
+        self.assertEqual(unit_triangles(CircleObject3D).shape, (39, 3, 3))
+
+    def test_raycast_closest(self):
+        hit = self.scene.raycast(Vector3([0, 0, 0]), Vector3([0, 0, -1]))
+        self.assertIs(hit.object_3d, self.cube)
+        self.assertAlmostEqual(hit.distance, 9.)
+        np.testing.assert_almost_equal(np.array(hit.point), np.array([0., 0., -9.]))
+        hit = self.scene.raycast(Vector3([0, 0, -20]), Vector3([0, 0, 2]))
+        self.assertIs(hit.object_3d, self.cube)
+        self.assertAlmostEqual(hit.distance, 9.)
+
+    def test_raycast_exact_triangles(self):
+        # The ray hits the bounding box of the icosahedron but misses its triangles
+        self.assertIsNone(self.scene.raycast(Vector3([5.8, 0.8, 0]), Vector3([0, 0, -1])))
+        self.assertIs(self.scene.raycast(Vector3([5, 0, 0]), Vector3([0, 0, -1])).object_3d, self.sphere)
+
+    def test_raycast_max_distance(self):
+        self.assertIsNone(self.scene.raycast(Vector3([0, 0, 0]), Vector3([0, 0, -1]), max_distance=8.))
+        self.assertIsNotNone(self.scene.raycast(Vector3([0, 0, 0]), Vector3([0, 0, -1]), max_distance=9.5))
+
+    def test_raycast_transformed(self):
+        self.cube.local_euler_angles = Vector3([0, 45, 0])
+        self.scene.update_world_matrix()
+        hit = self.scene.raycast(Vector3([0, 0, 0]), Vector3([0, 0, -1]))
+        self.assertAlmostEqual(hit.distance, 10. - np.sqrt(2.))
+        self.plane.scale = Vector3([0.1, 1, 0.1])
+        self.scene.update_world_matrix()
+        self.assertIsNone(self.scene.raycast(Vector3([1, 0, 1]), Vector3([0, -1, 0])))
+        self.assertIs(self.scene.raycast(Vector3([0.1, 0, 0.1]), Vector3([0, -1, 0])).object_3d, self.plane)
+
+    def test_raycast_batch(self):
+        origins = np.zeros((4, 3))
+        directions = np.array([[0., 0., -1.], [0.5, 0., -1.], [0., -1., 0.], [0., 1., 0.]])
+        objects, distances = self.scene.raycast_batch(origins, directions)
+        self.assertEqual(objects, [self.cube, self.sphere, self.plane, None])
+        self.assertAlmostEqual(distances[0], 9.)
+        self.assertAlmostEqual(distances[2], 5.)
+        self.assertEqual(distances[3], np.inf)
+
+    def test_raycast_moved(self):
+        self.assertIs(self.scene.raycast(Vector3([0, 0, 0]), Vector3([0, 0, -1])).object_3d, self.cube)
+        self.cube.local_position = Vector3([0, 10, -10])
+        # Until the scene is updated the cube is hit at its old position
+        self.assertIs(self.scene.raycast(Vector3([0, 0, 0]), Vector3([0, 0, -1])).object_3d, self.cube)
+        self.scene.update_world_matrix()
+        hit = self.scene.raycast(Vector3([0, 10, 0]), Vector3([0, 0, -1]))
+        self.assertIs(hit.object_3d, self.cube)
+        self.assertAlmostEqual(hit.distance, 9.)
+        self.assertIsNone(self.scene.raycast(Vector3([0, 0, 0]), Vector3([0, 0, -1])))
+
+    def test_raycast_batch_moved(self):
+        origins = np.array([[0., 0., 0.], [0., 10., 0.]])
+        directions = np.array([[0., 0., -1.], [0., 0., -1.]])
+        self.assertEqual(self.scene.raycast_batch(origins, directions)[0], [self.cube, None])
+        self.cube.local_position = Vector3([0, 10, -10])
+        self.assertEqual(self.scene.raycast_batch(origins, directions)[0], [self.cube, None])
+        self.scene.update_world_matrix()
+        self.assertEqual(self.scene.raycast_batch(origins, directions)[0], [None, self.cube])
+
+    def test_screen_ray(self):
+        camera = PerspectiveCamera(fov=45, aspect=2, near=0.1, far=100)
+        camera.local_position = Vector3([0, 0, 5])
+        origin, direction = camera.screen_ray(100, 50, (0, 0, 200, 100))
+        np.testing.assert_almost_equal(np.array(origin), np.array([0., 0., 4.9]))
+        np.testing.assert_almost_equal(np.array(direction), np.array([0., 0., -1.]))
+        self.assertIs(self.scene.raycast(origin, direction).object_3d, self.cube)
+        # Screen y starts at the top
+        _, direction = camera.screen_ray(100, 0, (0, 0, 200, 100))
+        self.assertGreater(direction[1], 0.)
+
+    def test_screen_ray_orthographic(self):
+        camera = OrthographicCamera(left=-10, right=10, top=10, bottom=-10, near=1, far=100)
+        origin, direction = camera.screen_ray(150, 50, (0, 0, 200, 200))
+        np.testing.assert_almost_equal(np.array(origin), np.array([5., 5., -1.]))
+        np.testing.assert_almost_equal(np.array(direction), np.array([0., 0., -1.]))
@@ -0,0 +1,72 @@
+from unittest import TestCase, skipIf
+
+import moderngl as mgl
+import numpy as np
+from pyrr import Vector3
+
+from pysg import CubeObject3D, OrthographicCamera, Scene
+from pysg.error import RenderWorkerError
+from pysg.render_pool import RenderPool
+
+WIDTH = 8
+HEIGHT = 6
+
+
+def _context_available() -> bool:
+    """ Whether the worker processes can create a standalone context with the default backend. """
+    try:
+        mgl.create_standalone_context().release()
+        return True
+    except Exception:
+        return False
+
+
+def setup():
+    scene = Scene(background_color=(0, 0, 0), ambient_light=(1, 1, 1))
+    scene.add(CubeObject3D(100, 100, 1, color=(1, 1, 1)))
+    camera = OrthographicCamera(left=-4, right=4, top=3, bottom=-3, near=1, far=21)
+    camera.local_position = Vector3([0, 0, 10])
+    return scene, camera
+
+
+def update(scene, camera, frame):
+    if frame < 0:
+        raise ValueError('Negative frame')
+    scene.render_list.geometry[0].color = (frame / 10., 0, 0)
+
+
+def failing_setup():
+    raise ValueError('Scene can not be created')
+
+
+class TestRenderPool(TestCase):
+    def test_worker_setup_error(self):
+        pool = RenderPool(failing_setup, width=WIDTH, height=HEIGHT, processes=1)
+        with self.assertRaises(RenderWorkerError):
+            pool.render(range(3))
+        pool.close()
+        self.assertIsNone(pool._memory)
+        self.assertFalse(any(worker.is_alive() for worker in pool._workers))
+        # Closing twice does nothing
+        pool.close()
+
+    @skipIf(not _context_available(), 'No OpenGL context available')
+    def test_render(self):
+        with RenderPool(setup, update, width=WIDTH, height=HEIGHT, processes=2) as pool:
+            images = pool.render(range(10))
+        self.assertEqual(images.shape, (10, HEIGHT, WIDTH, 3))
+        # Images are returned in the order of the frames
+        np.testing.assert_array_equal(images[:, 0, 0, 1:], 0)
+        np.testing.assert_array_equal(images[:, 0, 0, 0], np.round(np.arange(10) / 10. * 255))
+
+    @skipIf(not _context_available(), 'No OpenGL context available')
+    def test_imap_releases_slots(self):
+        with RenderPool(setup, update, width=WIDTH, height=HEIGHT, processes=1, slots_per_process=2) as pool:
+            for _ in pool.imap(range(10)):
+                break
+            self.assertEqual(sorted(pool._free_slots), [0, 1])
+            # Failed frames are reported with their index, the slots stay usable
+            with self.assertRaises(RenderWorkerError):
+                pool.render([1, -1, 2])
+            self.assertEqual(sorted(pool._free_slots), [0, 1])
+            self.assertEqual(len(pool.render(range(3))), 3)
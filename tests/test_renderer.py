@@ -0,0 +1,143 @@
+from unittest import TestCase
+
+import numpy as np
+from pyrr import Vector3
+
+from pysg import CircleObject3D, CubeObject3D, PlaneObject3D, PointLight, Scene
+from pysg.geometry import create_circle, create_triangle, create_icosahedron, create_cylinder
+from pysg.light import DirectionalLight, SpotLight
+from pysg.object_3d import Object3D, geometry_type, register_geometry
+from pysg.renderer import Renderer, _group_by_primitive, _instance_indices, _instance_buffer_reserve, _pack_objects, \
+    _pack_lights, _row_runs, _lod_levels
+
+
+class TestInstancing(TestCase):
+    def setUp(self):
+        self.scene = Scene()
+        self.cube_1 = CubeObject3D(1, 2, 3, color=(0.1, 0.2, 0.3))
+        self.plane = PlaneObject3D(4, 5, color=(0.4, 0.5, 0.6))
+        self.cube_2 = CubeObject3D(7, 8, 9, color=(0.7, 0.8, 0.9))
+        self.cube_2.local_position = Vector3([1, 2, 3])
+        for object_3d in (self.cube_1, self.plane, self.cube_2):
+            self.scene.add(object_3d)
+        self.scene.update_world_matrix()
+
+    def test_group_by_primitive(self):
+        groups = _group_by_primitive(self.scene.render_list.geometry, Renderer._primitive_type)
+        self.assertEqual(groups[CubeObject3D], [self.cube_1, self.cube_2])
+        self.assertEqual(groups[PlaneObject3D], [self.plane])
+
+    def test_group_by_primitive_subclass(self):
+        class CustomCube(CubeObject3D):
+            pass
+
+        groups = _group_by_primitive([CustomCube(1, 1, 1)], Renderer._primitive_type)
+        self.assertEqual(list(groups.keys()), [CubeObject3D])
+
+    def test_register_geometry(self):
+        class TriangleFanObject3D(Object3D):
+            pass
+
+        class SubTriangleFanObject3D(TriangleFanObject3D):
+            pass
+
+        with self.assertRaises(NotImplementedError):
+            Renderer._primitive_type(TriangleFanObject3D())
+        register_geometry(TriangleFanObject3D, create_circle, triangle_fan=True)
+        self.assertIs(Renderer._primitive_type(SubTriangleFanObject3D()), TriangleFanObject3D)
+        self.assertTrue(TriangleFanObject3D._triangle_fan)
+        np.testing.assert_almost_equal(np.array(TriangleFanObject3D().local_bounds),
+                                       np.array(CircleObject3D(1).local_bounds))
+        # Subclasses can register their own geometry, also after they used the geometry of their base class
+        register_geometry(SubTriangleFanObject3D, create_triangle)
+        self.assertIs(geometry_type(SubTriangleFanObject3D), SubTriangleFanObject3D)
+        self.assertIs(Renderer._primitive_type(SubTriangleFanObject3D()), SubTriangleFanObject3D)
+        self.assertFalse(SubTriangleFanObject3D._triangle_fan)
+
+    def test_register_geometry_levels(self):
+        class DiscObject3D(Object3D):
+            pass
+
+        register_geometry(DiscObject3D, lambda: create_circle(fan_vertices=3), triangle_fan=True,
+                          levels=[lambda: create_circle(fan_vertices=8)])
+        self.assertEqual(len(DiscObject3D._lod_geometry), 1)
+        # The bounds enclose all levels
+        np.testing.assert_almost_equal(np.array(DiscObject3D().local_bounds),
+                                       np.array(CircleObject3D(1).local_bounds))
+
+    def test_lod_levels(self):
+        np.testing.assert_equal(_lod_levels(np.array([0., 10., 16., 17., 40., 200., np.inf]), 4),
+                                np.array([0, 0, 0, 1, 2, 3, 3]))
+
+    def test_geometry_levels(self):
+        for subdivisions in range(3):
+            vertices, indices, normals = create_icosahedron(subdivisions=subdivisions)
+            self.assertEqual(len(indices), 60 * 4 ** subdivisions)
+            np.testing.assert_almost_equal(np.linalg.norm(vertices, axis=1), np.ones(len(vertices)), decimal=6)
+            # Counter clockwise triangles face outwards
+            triangles = vertices[indices.reshape(-1, 3)]
+            faces = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+            self.assertTrue(np.all(np.einsum('ij,ij->i', faces, triangles.mean(axis=1)) > 0))
+        vertices, indices, normals = create_cylinder(sides=16)
+        self.assertEqual(len(indices), 16 * 4 * 3)
+        self.assertEqual(len(vertices), 16 * 6 + 2)
+
+    def test_geometry_type(self):
+        self.assertIs(geometry_type(CubeObject3D), CubeObject3D)
+        self.assertIsNone(geometry_type(Object3D))
+
+    def test_instance_indices(self):
+        indices = _instance_indices([self.cube_1, self.cube_2])
+        self.assertEqual(indices.dtype, np.int32)
+        self.assertEqual(list(indices), [self.cube_1.transform_index, self.cube_2.transform_index])
+
+    def test_instance_buffer_reserve(self):
+        # New buffer reserves twice the required size
+        self.assertEqual(_instance_buffer_reserve(10), 10 * 4 * 2)
+        # Large enough buffers are kept
+        self.assertIsNone(_instance_buffer_reserve(10, 10 * 4))
+        # Too small buffers grow
+        self.assertEqual(_instance_buffer_reserve(11, 10 * 4), 11 * 4 * 2)
+        # Empty groups still get a buffer
+        self.assertEqual(_instance_buffer_reserve(0), 4)
+
+    def test_pack_objects(self):
+        data = _pack_objects([self.cube_1, self.cube_2], self.scene.transform_store.world_matrices)
+        # Eight texels per object: matrix, color, size, and two unused texels
+        self.assertEqual(data.shape, (2, 8, 4))
+        self.assertEqual(data.dtype, np.float32)
+        np.testing.assert_almost_equal(data[1, 0:4], np.array(self.cube_2.world_matrix))
+        np.testing.assert_almost_equal(data[0, 4], np.array([0.1, 0.2, 0.3, 0.]))
+        np.testing.assert_almost_equal(data[1, 5], np.array([7., 8., 9., 0.]))
+
+    def test_pack_lights(self):
+        point_light = PointLight((0.1, 0.2, 0.3), radius=2.)
+        point_light.local_position = Vector3([1, 2, 3])
+        directional_light = DirectionalLight((0.4, 0.5, 0.6))
+        spot_light = SpotLight((0.7, 0.8, 0.9), angle=60.)
+        spot_light.local_euler_angles = Vector3([90, 0, 0])
+        for light in (point_light, directional_light, spot_light):
+            self.scene.add(light)
+        self.scene.update_world_matrix()
+        data, global_count, shadow_count = _pack_lights(self.scene.render_list.lights,
+                                                        self.scene.transform_store.world_matrices)
+        # Lights without radius first: directional light, spot light, point light
+        self.assertEqual(data.shape, (3, 4, 4))
+        self.assertEqual((global_count, shadow_count), (2, 0))
+        np.testing.assert_almost_equal(data[:, 0, 3], np.array([1., 2., 0.]))
+        np.testing.assert_almost_equal(data[0, 1, :3], np.array([0., 0., -1.]))
+        np.testing.assert_almost_equal(data[1, 1], np.array([0., -1., 0., 0.5]))
+        np.testing.assert_almost_equal(data[2, 0, :3], np.array([1., 2., 3.]))
+        np.testing.assert_almost_equal(data[2, 2], np.array([0.1, 0.2, 0.3, 2.]))
+        # Lights with shadow maps come first and are shaded for every pixel
+        data, global_count, shadow_count = _pack_lights(self.scene.render_list.lights,
+                                                        self.scene.transform_store.world_matrices,
+                                                        {point_light: (1, 6)})
+        self.assertEqual((global_count, shadow_count), (3, 1))
+        np.testing.assert_almost_equal(data[:, 0, 3], np.array([0., 1., 2.]))
+        np.testing.assert_almost_equal(data[0, 3, :2], np.array([1., 6.]))
+        np.testing.assert_almost_equal(data[1, 3, :2], np.array([0., 0.]))
+
+    def test_row_runs(self):
+        self.assertEqual(_row_runs(np.array([0, 1, 2, 5, 7, 8])), [(0, 3), (5, 6), (7, 9)])
+        self.assertEqual(_row_runs(np.array([], dtype=int)), [])
@@ -1,6 +1,10 @@
 from unittest import TestCase
 
-from pysg import CubeObject3D, PointLight, Scene
+import numpy as np
+from pyrr import Vector3
+
+from pysg import CubeObject3D, Node3D, PointLight, Scene
+from pysg.light import DirectionalLight, SpotLight
 from pysg.testing import CustomAssertions
 
 
@@ -19,8 +23,22 @@ class TestScene(TestCase, CustomAssertions):
         self.assertEqual(self.scene.render_list.point_lights[0], light)
         light2 = PointLight(color=(1, 1, 1))
         self.scene.add(light2)
-        # Only one point light per scene is possible
-        self.assertEqual(len(self.scene.render_list.point_lights), 1)
+        self.assertEqual(self.scene.render_list.point_lights, [light, light2])
+
+    def test_add_lights(self):
+        point_light = PointLight(color=(1, 1, 1), radius=2.)
+        directional_light = DirectionalLight(color=(1, 1, 1))
+        spot_light = SpotLight(color=(1, 1, 1), angle=20.)
+        for light in (point_light, directional_light, spot_light):
+            self.scene.add(light)
+        self.assertEqual(self.scene.render_list.lights, [point_light, directional_light, spot_light])
+        self.assertEqual(self.scene.render_list.point_lights, [point_light])
+        self.assertEqual(len(self.scene.render_list.geometry), 0)
+        self.scene.remove(point_light)
+        self.assertEqual(self.scene.render_list.lights, [directional_light, spot_light])
+        self.assertEqual(self.scene.render_list.point_lights, [])
+        self.scene.clear()
+        self.assertEqual(self.scene.render_list.lights, [])
 
     def test_remove(self):
         cube = CubeObject3D(1, 1, 1)
@@ -34,3 +52,70 @@ class TestScene(TestCase, CustomAssertions):
         self.scene.clear()
         self.assertEqual(len(self.scene.render_list.geometry), 0)
         self.assertEqual(len(self.scene.children), 0)
+
+    def _create_hierarchy(self):
+        rng = np.random.RandomState(0)
+        nodes = [self.scene]
+        for i in range(200):
+            node = Node3D("node_%d" % i)
+            node.local_position = Vector3(rng.uniform(-5, 5, 3))
+            node.local_euler_angles = Vector3(rng.uniform(-180, 180, 3))
+            node.scale = Vector3(rng.uniform(0.5, 2, 3))
+            nodes[rng.randint(len(nodes))].add(node)
+            nodes.append(node)
+        return nodes
+
+    def test_update_world_matrix_equals_recursive(self):
+        nodes = self._create_hierarchy()
+        self.scene.update_world_matrix()
+        batched = [node.world_matrix for node in nodes]
+        Node3D.update_world_matrix(self.scene)
+        for node, world_matrix in zip(nodes, batched):
+            np.testing.assert_almost_equal(np.array(world_matrix), np.array(node.world_matrix))
+
+    def test_update_world_matrix_after_topology_change(self):
+        nodes = self._create_hierarchy()
+        self.scene.update_world_matrix()
+        nodes[-1].parent.remove(nodes[-1])
+        nodes[5].add(nodes[-1])
+        nodes[-2].local_position = Vector3([1, 2, 3])
+        self.scene.update_world_matrix()
+        batched = [node.world_matrix for node in nodes]
+        Node3D.update_world_matrix(self.scene)
+        for node, world_matrix in zip(nodes, batched):
+            np.testing.assert_almost_equal(np.array(world_matrix), np.array(node.world_matrix))
+
+    def test_update_world_matrix_only_dirty(self):
+        nodes = self._create_hierarchy()
+        self.scene.update_world_matrix()
+        store = self.scene.transform_store
+        indices = [node.transform_index for node in nodes]
+        self.assertFalse((store.world_stamps[indices] < store.changed_stamps[indices]).any())
+        moved = nodes[3]
+        moved.local_position = Vector3([4, 5, 6])
+        # Setters only touch the transformed node itself
+        outdated = store.world_stamps < store.changed_stamps
+        self.assertEqual([node for node in nodes if outdated[node.transform_index]], [moved])
+        # World matrices are derived from the transformed ancestor before the scene is updated
+        fresh = [node.world_matrix for node in moved.get_leaf_nodes()]
+        self.scene.update_world_matrix()
+        for node, world_matrix in zip(moved.get_leaf_nodes(), fresh):
+            np.testing.assert_almost_equal(np.array(world_matrix), np.array(node.world_matrix))
+        batched = [node.world_matrix for node in nodes]
+        Node3D.update_world_matrix(self.scene)
+        for node, world_matrix in zip(nodes, batched):
+            np.testing.assert_almost_equal(np.array(world_matrix), np.array(node.world_matrix))
+
+        # Updating only a subtree must not hide later changes of its dirty ancestors
+        parent = Node3D("parent")
+        child = Node3D("child")
+        child.local_position = Vector3([1, 0, 0])
+        self.scene.add(parent)
+        parent.add(child)
+        self.scene.update_world_matrix()
+        parent.scale = Vector3([2, 2, 2])
+        # Updating only the subtree clears the flag of the child while the parent stays dirty
+        child.update_world_matrix()
+        parent.scale = Vector3([3, 3, 3])
+        self.scene.update_world_matrix()
+        np.testing.assert_almost_equal(np.array(child.world_matrix)[3, :3], np.array([3., 0., 0.]))
@@ -0,0 +1,89 @@
+from unittest import TestCase
+
+import numpy as np
+from pyrr import Vector3
+
+from pysg import Node3D, Scene, CubeObject3D
+from pysg.transform_store import TransformStore
+
+
+class TestTransformStore(TestCase):
+    def setUp(self):
+        self.store = TransformStore(capacity=2)
+
+    def test_allocate_identity(self):
+        index = self.store.allocate()
+        np.testing.assert_almost_equal(self.store.world_matrices[index], np.identity(4))
+        np.testing.assert_almost_equal(self.store.local_quaternions[index], np.array([0., 0., 0., 1.]))
+        np.testing.assert_almost_equal(self.store.scales[index], np.array([1., 1., 1.]))
+
+    def test_grow(self):
+        indices = [self.store.allocate() for _ in range(10)]
+        self.assertEqual(len(set(indices)), 10)
+        self.assertEqual(len(self.store), 10)
+        self.assertGreaterEqual(self.store.capacity, 10)
+
+    def test_release_reuses_slot(self):
+        index = self.store.allocate()
+        self.store.allocate()
+        self.store.release(index)
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.allocate(), index)
+
+    def test_grow_keeps_data(self):
+        node = Node3D(store=self.store)
+        node.local_position = Vector3([1, 2, 3])
+        nodes = [Node3D(store=self.store) for _ in range(10)]
+        np.testing.assert_almost_equal(np.array(node.local_position), np.array([1., 2., 3.]))
+        self.assertEqual(len(nodes), 10)
+
+    def test_node_release_on_delete(self):
+        node = Node3D(store=self.store)
+        self.assertEqual(len(self.store), 1)
+        del node
+        self.assertEqual(len(self.store), 0)
+
+    def test_add_moves_to_parent_store(self):
+        root = Node3D(store=self.store)
+        child = Node3D()
+        grand_child = Node3D()
+        child.add(grand_child)
+        grand_child.local_position = Vector3([1, 2, 3])
+        root.add(child)
+        self.assertIs(child.transform_store, self.store)
+        self.assertIs(grand_child.transform_store, self.store)
+        np.testing.assert_almost_equal(np.array(grand_child.world_position), np.array([1., 2., 3.]))
+
+    def test_scene_store(self):
+        scene = Scene(store=self.store)
+        cube = CubeObject3D(1, 1, 1)
+        cube.local_position = Vector3([0, 1, 0])
+        scene.add(cube)
+        scene.update_world_matrix()
+        np.testing.assert_almost_equal(self.store.world_matrices[cube.transform_index][3, :3],
+                                       np.array([0., 1., 0.]))
+
+    def test_move_deep_hierarchy(self):
+        root = Node3D()
+        node = root
+        for i in range(1200):
+            child = Node3D()
+            node.add(child)
+            node = child
+        node.local_position = Vector3([1, 2, 3])
+        scene = Scene(store=self.store)
+        scene.add(root)
+        self.assertIs(node.transform_store, self.store)
+        np.testing.assert_almost_equal(np.array(node.world_position), np.array([1., 2., 3.]))
+
+    def test_object_stamps(self):
+        cube = CubeObject3D(1, 1, 1)
+        store, index = cube.transform_store, cube.transform_index
+        clock = store.clock
+        cube.color = (1, 0, 0)
+        self.assertGreater(store.object_stamps[index], clock)
+        self.assertLess(store.changed_stamps[index], store.object_stamps[index])
+        clock = store.clock
+        cube.size = (2, 2, 2)
+        self.assertEqual(store.object_stamps[index], store.clock)
+        self.assertGreater(store.clock, clock)